@@ -4,6 +4,7 @@ from flask_migrate import Migrate
 
 from app.config import Config
 from app.database import db
+from app.extensions import socketio
 
 # Create extensions instances
 migrate = Migrate()
@@ -47,12 +48,44 @@ def create_app():
     from app.storefront import models as storefront_models  # noqa
     
     # Initialize CORS
-    CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}})
+    CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}}, expose_headers=["X-Next-Cursor"])
     
     # Register blueprints
     from app.user.controllers import users as users_blueprint
     app.register_blueprint(users_blueprint, url_prefix='/api/users')
     from app.storefront.controllers import orders as orders_blueprint
     app.register_blueprint(orders_blueprint)
+
+    # Metrics: request timing, DB query/pool instrumentation and /metrics
+    if app.config.get("METRICS_ENABLED", True):
+        from app.monitoring.instruments import install_flask, instrument_engine
+        from app.monitoring.controllers import monitoring as monitoring_blueprint
+        install_flask(app)
+        with app.app_context():
+            instrument_engine(db.engine)
+        app.register_blueprint(monitoring_blueprint)
+
+    # Trace spans for statements run inside a traced email workflow
+    from app.monitoring import tracing
+    if tracing.TRACING_ENABLED:
+        with app.app_context():
+            tracing.trace_engine(db.engine)
+
+    # Opt-in SQL profiling per request / tool call, with N+1 detection
+    if app.config.get("SQL_PROFILE"):
+        from app.monitoring import profiler
+        profiler.install_flask(app)
+        with app.app_context():
+            profiler.profile_engine(db.engine)
+
+    # Initialize SocketIO; a message queue lets other processes (MCP server,
+    # email agent) emit to clients connected here
+    socketio.init_app(app, message_queue=app.config.get("SOCKETIO_MESSAGE_QUEUE"))
+    from app.storefront.events import register_socket_handlers
+    register_socket_handlers(socketio)
+
+    # Register CLI commands
+    from app.storefront.commands import reconcile_totals_command
+    app.cli.add_command(reconcile_totals_command)
     
     return app
@@ -1,15 +1,21 @@
+from typing import Optional
 from openai import OpenAI
+from .calls import client_kwargs
 
 
 class OpenAIModel:
-    def __init__(self, api_key: str) -> None:
+    def __init__(self, api_key: Optional[str]) -> None:
         """
         Args:
             model_name: The name of the openai model we are using
-            api_key: The api key for our openai model
+            api_key: The api key for our openai model. If None, the key from
+                client_kwargs() or OPENAI_API_KEY is used.
         Returns:
         """
-        self.client = OpenAI(api_key=api_key)
+        kwargs = client_kwargs()
+        if api_key is not None:
+            kwargs["api_key"] = api_key
+        self.client = OpenAI(**kwargs)
 
     def get_client(self) -> OpenAI:
         """
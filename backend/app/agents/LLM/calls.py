@@ -0,0 +1,133 @@
+"""
+Non-blocking wrappers around OpenAI client calls.
+
+Agents accept either an ``AsyncOpenAI`` client, which is awaited directly, or a
+synchronous ``OpenAI`` client, whose calls are offloaded onto a dedicated thread
+pool so they never block the event loop.
+
+Set LLM_BASE_URL (e.g. http://127.0.0.1:8060/v1, see fake_server.py) to point
+every client built by create_client at another OpenAI-compatible server.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Optional
+
+from openai import AsyncOpenAI, OpenAI  # type: ignore
+
+from app.monitoring.instruments import record_llm_call
+
+LLM_THREAD_POOL_SIZE = int(os.environ.get("LLM_THREAD_POOL_SIZE", "32"))
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL") or None
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool used for synchronous LLM clients."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=LLM_THREAD_POOL_SIZE, thread_name_prefix="llm"
+        )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the shared thread pool, waiting for in-flight calls."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def client_kwargs() -> dict:
+    """Constructor arguments that honour LLM_BASE_URL."""
+    if not LLM_BASE_URL:
+        return {}
+    # A local stand-in doesn't check the key, but the SDK insists on one
+    return {"base_url": LLM_BASE_URL, "api_key": os.environ.get("OPENAI_API_KEY") or "local"}
+
+
+def create_client(asynchronous: bool = True) -> OpenAI | AsyncOpenAI:
+    """Build an OpenAI client, pointed at LLM_BASE_URL when it is set."""
+    return AsyncOpenAI(**client_kwargs()) if asynchronous else OpenAI(**client_kwargs())
+
+
+def is_async_client(llm: Any) -> bool:
+    """Check whether the client returns awaitables from its create methods."""
+    return isinstance(llm, AsyncOpenAI)
+
+
+async def _call(llm: Any, api: str, create, **kwargs) -> Any:
+    started = time.perf_counter()
+    try:
+        if is_async_client(llm):
+            response = await create(**kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(get_executor(), partial(create, **kwargs))
+    except Exception:
+        record_llm_call(api, kwargs.get("model"), time.perf_counter() - started, error=True)
+        raise
+    # Streams report latency to the first byte and no token usage
+    record_llm_call(api, kwargs.get("model"), time.perf_counter() - started, response)
+    return response
+
+
+async def create_chat_completion(llm: OpenAI | AsyncOpenAI, **kwargs) -> Any:
+    """
+    Call ``llm.chat.completions.create`` without blocking the event loop.
+
+    Args:
+        llm: An OpenAI or AsyncOpenAI client.
+        **kwargs: Passed through to ``chat.completions.create``.
+
+    Returns:
+        The completion (or stream) returned by the client.
+    """
+    return await _call(llm, "chat.completions", llm.chat.completions.create, **kwargs)
+
+
+async def iterate_stream(llm: OpenAI | AsyncOpenAI, stream: Any) -> AsyncIterator[Any]:
+    """
+    Iterate a streamed completion without blocking the event loop.
+
+    Streams from a synchronous client block on every read, so each next()
+    runs on the shared thread pool.
+
+    Args:
+        llm: The client that created the stream.
+        stream: The stream returned by a ``create`` call with ``stream=True``.
+
+    Yields:
+        The stream's events (e.g. chat.completion.chunk objects).
+    """
+    if is_async_client(llm):
+        async for event in stream:
+            yield event
+        return
+    loop = asyncio.get_running_loop()
+    iterator = iter(stream)
+    end = object()
+    while True:
+        event = await loop.run_in_executor(get_executor(), next, iterator, end)
+        if event is end:
+            return
+        yield event
+
+
+async def create_response(llm: OpenAI | AsyncOpenAI, **kwargs) -> Any:
+    """
+    Call ``llm.responses.create`` without blocking the event loop.
+
+    Args:
+        llm: An OpenAI or AsyncOpenAI client.
+        **kwargs: Passed through to ``responses.create``.
+
+    Returns:
+        The response (or stream) returned by the client.
+    """
+    return await _call(llm, "responses", llm.responses.create, **kwargs)
@@ -0,0 +1,417 @@
+"""
+Minimal OpenAI-compatible stand-in server for local benchmarking.
+
+Serves ``POST /v1/chat/completions`` and ``POST /v1/responses`` after a
+configurable artificial latency. Each request is handled on its own thread so
+concurrent clients overlap their waits like they would against the real API.
+With tokens_per_s set, chat completions also take time to generate (about
+four characters per token), and ``stream=True`` requests get their content as
+server-sent chunks at that rate, like a real streamed completion.
+
+Modes:
+- canned: every request gets the same reply (``content``).
+- record: requests are forwarded to the real API (``upstream``) and each
+  successful exchange is appended to a JSONL cassette with its latency.
+- replay: requests are answered from the cassette, matched on endpoint and
+  request body, so a recorded run can be repeated offline. Set latency to
+  None to replay each call's recorded latency instead of a fixed one.
+
+Usage:
+    server = FakeLLMServer(latency=0.2)
+    server.start()
+    client = OpenAI(base_url=server.base_url, api_key="fake")
+    ...
+    server.stop()
+
+Or as a process the agents reach through LLM_BASE_URL:
+    python -m app.agents.LLM.fake_server --mode record --cassette llm_cassette.jsonl
+    python -m app.agents.LLM.fake_server --mode replay --cassette llm_cassette.jsonl --latency recorded
+    LLM_BASE_URL=http://127.0.0.1:8060/v1 make agent
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+DEFAULT_CONTENT = json.dumps(
+    {"items": [{"name": "Pro Laptop (Black)", "quantity": 1}]}
+)
+DEFAULT_UPSTREAM = "https://api.openai.com/v1"
+MODES = ("canned", "record", "replay")
+# Request headers passed through to the upstream API when recording
+FORWARDED_HEADERS = ("Authorization", "Content-Type", "OpenAI-Organization", "OpenAI-Project")
+# Content characters per generated token, for tokens_per_s and stream chunking
+CHARS_PER_TOKEN = 4
+
+
+def endpoint_of(path: str) -> str:
+    """The API endpoint of a request path, without the /v1 prefix or query string."""
+    path = path.split("?", 1)[0]
+    return path[len("/v1"):] if path.startswith("/v1/") else path
+
+
+def request_key(endpoint: str, payload: dict) -> str:
+    """Cassette key of a request: its endpoint and canonical JSON body."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded exchanges in a JSONL file, one per line.
+
+    Identical requests recorded more than once are replayed in turn, so a run
+    that retried or repeated a call sees the same sequence of answers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[dict]] = {}
+        self._next: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def lookup(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._next.get(key, 0)
+            self._next[key] = index + 1
+            return entries[index % len(entries)]
+
+    def append(self, entry: dict) -> None:
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def chat_completion_body(model: str, content: str) -> dict:
+    """Build a chat.completions response body."""
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def chat_completion_chunks(body: dict) -> List[bytes]:
+    """Server-sent events streaming a chat.completions body, one token-sized piece per chunk."""
+    content = body["choices"][0]["message"]["content"] or ""
+    base = {"id": body["id"], "object": "chat.completion.chunk", "created": body["created"], "model": body["model"]}
+
+    def event(delta: dict, finish_reason: Optional[str] = None) -> bytes:
+        chunk = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+    events = [event({"role": "assistant", "content": ""})]
+    events += [event({"content": content[i:i + CHARS_PER_TOKEN]}) for i in range(0, len(content), CHARS_PER_TOKEN)]
+    events.append(event({}, "stop"))
+    events.append(b"data: [DONE]\n\n")
+    return events
+
+
+class EventStream:
+    """A streamed reply: server-sent events, each written at its offset (seconds) from the start."""
+
+    def __init__(self, events: List[bytes], offsets: Optional[List[float]] = None):
+        self.events = events
+        self.offsets = offsets or [0.0] * len(events)
+
+
+def chat_completion_stream(body: dict, interval: float) -> EventStream:
+    """
+    Stream a chat.completions body one token every interval seconds.
+
+    The role chunk goes out at once and the closing chunks with the last
+    token, so the stream ends when the same unstreamed reply would be ready.
+    """
+    events = chat_completion_chunks(body)
+    tokens = len(events) - 3
+    offsets = [0.0] + [(i + 1) * interval for i in range(tokens)] + [tokens * interval] * 2
+    return EventStream(events, offsets)
+
+
+def response_body(model: str, content: str) -> dict:
+    """Build a responses API response body."""
+    return {
+        "id": f"resp_{uuid.uuid4().hex[:12]}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex[:12]}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": content, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+    }
+
+
+class FakeLLMServer:
+    """
+    Background HTTP server speaking a subset of the OpenAI API.
+
+    Attributes:
+        latency (float | None): Seconds to sleep before answering each request;
+            None replays recorded latencies (replay mode only).
+        content (str): Assistant message content returned in canned mode and
+            for replay misses.
+        mode (str): "canned", "record" or "replay".
+        strict (bool): In replay mode, answer unrecorded requests with 404
+            instead of the canned reply.
+        tokens_per_s (float | None): Generation speed of chat completions;
+            None answers instantly after the latency.
+        request_count (int): Number of requests served so far.
+        miss_count (int): Replay requests with no recorded answer.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[float] = 0.2,
+        content: str = DEFAULT_CONTENT,
+        mode: str = "canned",
+        cassette: Optional[str] = None,
+        upstream: str = DEFAULT_UPSTREAM,
+        strict: bool = False,
+        tokens_per_s: Optional[float] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+        if mode != "canned" and not cassette:
+            raise ValueError(f"{mode} mode needs a cassette file")
+        self.latency = latency
+        self.content = content
+        self.mode = mode
+        self.strict = strict
+        self.tokens_per_s = tokens_per_s
+        self.upstream = upstream.rstrip("/")
+        self.cassette = Cassette(cassette) if cassette else None
+        self.request_count = 0
+        self.miss_count = 0
+        self._count_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def handle(self, path: str, payload: dict) -> Optional[dict]:
+        """Produce the canned response body for a request, or None for unknown paths."""
+        model = payload.get("model", "fake-model")
+        if path.endswith("/chat/completions"):
+            return chat_completion_body(model, self.content)
+        if path.endswith("/responses"):
+            return response_body(model, self.content)
+        return None
+
+    def serve(self, path: str, raw: bytes, headers) -> tuple:
+        """
+        Answer one request according to the mode.
+
+        Returns:
+            tuple: (status, content_type, body bytes or EventStream, latency to
+                apply in seconds before answering)
+        """
+        try:
+            payload = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            payload = {}
+        endpoint = endpoint_of(path)
+
+        if self.mode == "record":
+            return self._forward(endpoint, payload, raw, headers)
+
+        if self.mode == "replay":
+            entry = self.cassette.lookup(request_key(endpoint, payload))
+            if entry is not None:
+                latency = entry["latency_s"] if self.latency is None else self.latency
+                return entry["status"], entry["content_type"], entry["body"].encode("utf-8"), latency
+            with self._count_lock:
+                self.miss_count += 1
+            if self.strict:
+                error = {"error": {"message": f"No recorded response for {endpoint}", "type": "replay_miss"}}
+                return 404, "application/json", json.dumps(error).encode("utf-8"), 0.0
+
+        body = self.handle(endpoint, payload)
+        if body is None:
+            error = {"error": {"message": f"Unknown endpoint {endpoint}", "type": "invalid_request_error"}}
+            return 404, "application/json", json.dumps(error).encode("utf-8"), 0.0
+        latency = self.latency or 0.0
+        if endpoint.endswith("/chat/completions"):
+            interval = 1.0 / self.tokens_per_s if self.tokens_per_s else 0.0
+            if payload.get("stream"):
+                return 200, "text/event-stream", chat_completion_stream(body, interval), latency
+            content = body["choices"][0]["message"]["content"] or ""
+            latency += -(-len(content) // CHARS_PER_TOKEN) * interval
+        return 200, "application/json", json.dumps(body).encode("utf-8"), latency
+
+    def _forward(self, endpoint: str, payload: dict, raw: bytes, headers) -> tuple:
+        """Proxy the request upstream and record a successful answer."""
+        request = urllib.request.Request(self.upstream + endpoint, data=raw, method="POST")
+        for name in FORWARDED_HEADERS:
+            if headers.get(name):
+                request.add_header(name, headers[name])
+        started = time.perf_counter()
+        try:
+            # Streams are buffered whole, then recorded and replayed as one body
+            with urllib.request.urlopen(request, timeout=600) as response:
+                status, content_type, body = response.status, response.headers.get("Content-Type", "application/json"), response.read()
+        except urllib.error.HTTPError as e:
+            # Errors are passed through but not recorded
+            return e.code, e.headers.get("Content-Type", "application/json"), e.read(), 0.0
+        latency = time.perf_counter() - started
+        self.cassette.append({
+            "key": request_key(endpoint, payload),
+            "endpoint": endpoint,
+            "model": payload.get("model"),
+            "status": status,
+            "content_type": content_type,
+            "latency_s": round(latency, 4),
+            "request": payload,
+            "body": body.decode("utf-8"),
+        })
+        return status, content_type, body, 0.0
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                with server._count_lock:
+                    server.request_count += 1
+                try:
+                    status, content_type, data, latency = server.serve(self.path, raw, self.headers)
+                except Exception as e:
+                    status, content_type, latency = 502, "application/json", 0.0
+                    data = json.dumps({"error": {"message": f"Stand-in server error: {e}", "type": "server_error"}}).encode("utf-8")
+                if latency > 0:
+                    time.sleep(latency)
+                if isinstance(data, EventStream):
+                    # No Content-Length: the stream ends when the connection closes
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Cache-Control", "no-cache")
+                    self.end_headers()
+                    start = time.monotonic()
+                    for event, offset in zip(data.events, data.offsets):
+                        delay = start + offset - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                        self.wfile.write(event)
+                        self.wfile.flush()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the OpenAI-compatible stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8060)
+    parser.add_argument("--mode", choices=MODES, default="canned")
+    parser.add_argument("--cassette", help="JSONL file to record to or replay from")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM, help="API to forward to in record mode")
+    parser.add_argument(
+        "--latency", default="0.2",
+        help='Seconds added to every reply, or "recorded" to replay recorded latencies',
+    )
+    parser.add_argument("--tokens-per-s", type=float, help="Generation speed of chat completions (default instant)")
+    parser.add_argument("--strict", action="store_true", help="404 on replay misses instead of a canned reply")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    latency = None if args.latency == "recorded" else float(args.latency)
+    server = FakeLLMServer(
+        host=args.host,
+        port=args.port,
+        latency=latency,
+        mode=args.mode,
+        cassette=args.cassette,
+        upstream=args.upstream,
+        strict=args.strict,
+        tokens_per_s=args.tokens_per_s,
+    )
+    recorded = f", {len(server.cassette)} recorded calls" if server.cassette is not None else ""
+    print(f"[fake_server] {args.mode} mode on {server.base_url}{recorded}")
+    print(f"[fake_server] Point the agents at it with LLM_BASE_URL={server.base_url}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if args.mode == "replay":
+            print(f"[fake_server] Served {server.request_count} requests, {server.miss_count} replay misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,39 @@
+import asyncio
+import warnings
 from typing import Any, Dict, Optional, Union, Optional
 from fastmcp.client.client import Client # type: ignore
 from contextlib import asynccontextmanager
+import httpx
+from app.monitoring import tracing
+
+DEFAULT_MCP_URL = "http://localhost:8050/sse"
+
+
+class MCPNotConnectedError(RuntimeError):
+    """Raised when a call is made before connect() or after disconnect()."""
+
+
+def never_sent(error: BaseException) -> bool:
+    """Whether a failed tool call provably never reached the server.
+
+    Only errors raised before the request was written qualify: calling a
+    disconnected client, or failing to open the connection at all. Anything
+    else (timeouts, dropped connections, bad replies) may have run the tool.
+    """
+    return isinstance(error, (MCPNotConnectedError, ConnectionRefusedError, httpx.ConnectError))
+
+
+def _warn_server_arg(server: Optional[str]) -> None:
+    if server is not None:
+        warnings.warn(
+            "call_tool's server argument is deprecated and ignored",
+            DeprecationWarning,
+            stacklevel=3,
+        )
 
 
 class MCPClient:
-    def __init__(self, config: Union[str, dict] = "http://localhost:8050/sse"):
+    def __init__(self, config: Union[str, dict] = DEFAULT_MCP_URL):
         """Initialize the MCP client.
 
         Args:
@@ -50,7 +79,7 @@ class MCPClient:
     async def list_servers(self) -> list:
         """List available MCP servers."""
         if not self._is_connected:
-            raise RuntimeError("Not connected to MCP server(s)")
+            raise MCPNotConnectedError("Not connected to MCP server(s)")
         return list(self._client.servers.keys())
 
     async def list_tools(self) -> list:
@@ -60,7 +89,7 @@ class MCPClient:
             list: List of available tools.
         """
         if not self._is_connected:
-            raise RuntimeError("Not connected to MCP server(s)")
+            raise MCPNotConnectedError("Not connected to MCP server(s)")
         return await self._client.list_tools()
 
     async def get_tools(self) -> list[dict[str, Any]]:
@@ -70,7 +99,7 @@ class MCPClient:
             list[dict[str, Any]]: List of tools in OpenAI function calling format.
         """
         if not self._is_connected:
-            raise RuntimeError("Not connected to MCP server(s)")
+            raise MCPNotConnectedError("Not connected to MCP server(s)")
 
         tools = await self.list_tools()
         openai_tools = []
@@ -94,25 +123,122 @@ class MCPClient:
         return openai_tools
 
     async def call_tool(
-        self, 
-        tool_name: str, 
-        arguments: Dict[str, Any], 
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
         server: Optional[str] = None
     ) -> Any:
         """Call a tool.
 
+        Inside a trace, the trace context travels in the request's ``_meta``.
+
         Args:
             tool_name (str): The name of the tool to call.
             arguments (Dict[str, Any]): The arguments to pass to the tool.
-            server (str, optional): Specific server to call the tool on.
-                                 If None, the client will try to find the tool
-                                 in any of the available servers.
+            server (str, optional): Deprecated and ignored. The client talks to
+                                 one server, so there is nothing to select.
 
         Returns:
             Any: The result of the tool call.
         """
         if not self._is_connected:
-            raise RuntimeError("Not connected to MCP server(s)")
-            
-        result = await self._client.call_tool(tool_name, arguments, server)
+            raise MCPNotConnectedError("Not connected to MCP server(s)")
+        _warn_server_arg(server)
+
+        with tracing.span(f"mcp.call_tool {tool_name}", kind="client", tool=tool_name):
+            result = await self._client.call_tool(tool_name, arguments, meta=tracing.propagation_meta())
         return result.content[0].text if result.content else None
+
+
+class MCPClientPool:
+    """A fixed-size pool of connected MCPClient sessions.
+
+    Exposes the same interface as MCPClient so it can be handed to an agent
+    directly. Each call borrows an idle session for the duration of the call,
+    letting concurrent workers share a bounded number of connections.
+    """
+
+    def __init__(self, config: Union[str, dict] = DEFAULT_MCP_URL, size: int = 4):
+        """Initialize the pool.
+
+        Args:
+            config (Union[str, dict]): Passed through to each MCPClient.
+            size (int): Number of sessions to open.
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.config = config
+        self.size = size
+        self._clients: list[MCPClient] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._is_connected = False
+
+    async def connect(self):
+        """Open every session in the pool."""
+        if self._is_connected:
+            return
+
+        self._clients = [MCPClient(self.config) for _ in range(self.size)]
+        await asyncio.gather(*(client.connect() for client in self._clients))
+        self._idle = asyncio.Queue()
+        for client in self._clients:
+            self._idle.put_nowait(client)
+        self._is_connected = True
+
+    async def disconnect(self):
+        """Close every session in the pool."""
+        if not self._is_connected:
+            return
+        await asyncio.gather(
+            *(client.disconnect() for client in self._clients),
+            return_exceptions=True,
+        )
+        self._clients = []
+        self._idle = None
+        self._is_connected = False
+
+    @asynccontextmanager
+    async def session(self):
+        """Context manager for pool lifetime."""
+        try:
+            await self.connect()
+            yield self
+        finally:
+            await self.disconnect()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow an idle session, waiting if all are in use."""
+        client = await self._acquire_idle()
+        try:
+            yield client
+        finally:
+            self._idle.put_nowait(client)
+
+    async def _acquire_idle(self) -> MCPClient:
+        if not self._is_connected:
+            raise MCPNotConnectedError("Not connected to MCP server(s)")
+        return await self._idle.get()
+
+    async def list_tools(self) -> list:
+        async with self.acquire() as client:
+            return await client.list_tools()
+
+    async def get_tools(self) -> list[dict[str, Any]]:
+        async with self.acquire() as client:
+            return await client.get_tools()
+
+    async def call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        server: Optional[str] = None
+    ) -> Any:
+        """Call a tool on the next idle session. See MCPClient.call_tool."""
+        _warn_server_arg(server)
+        with tracing.span("mcp.acquire", kind="internal"):
+            client = await self._acquire_idle()
+        try:
+            return await client.call_tool(tool_name, arguments)
+        finally:
+            self._idle.put_nowait(client)
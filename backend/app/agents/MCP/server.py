@@ -1,10 +1,15 @@
 import json
+import threading
+from collections import OrderedDict
 from flask import has_app_context, current_app
 from app import create_app
 from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.utilities.logging import get_logger
-from app.storefront.services.order import OrderService
-from app.storefront.services.inventory import InventoryService
+from app.storefront.services.order import InsufficientStockError, OrderService
+from app.storefront.services.inventory import PRICE_HINT_CANDIDATES, InventoryService
+from app.monitoring.instruments import instrument_tool
+from app.monitoring.registry import CONTENT_TYPE, registry
+from app.monitoring import tracing
 from typing import Optional
 
 logger = get_logger(__name__)
@@ -23,11 +28,87 @@ with app.app_context():
         port=8050,  # only used for SSE transport (set this to any port)
     )
 
+    def _extract_order_id(cart):
+        """Robustly extract order_id from the cart argument (list, dict or id)."""
+        order_id = None
+        if isinstance(cart, list):
+            if cart and isinstance(cart[0], dict) and 'id' in cart[0]:
+                order_id = cart[0]['id']
+            elif cart and isinstance(cart[0], int):
+                order_id = cart[0]
+        elif isinstance(cart, dict) and 'id' in cart:
+            order_id = cart['id']
+        elif isinstance(cart, int):
+            order_id = cart
+        return order_id
+
+    def _resolve_stock_item_ids(refs: list, unit_prices: Optional[list] = None) -> list:
+        """Resolve item ids or names to stock item ids.
+
+        Exact names are looked up in one query and the misses are fuzzy matched
+        in one vectorized call. A unit price quoted with a name picks among its
+        closest fuzzy matches. Unresolvable refs get a ValueError in their slot.
+        """
+        from app.storefront.models import StockItem
+        resolved: list = [None] * len(refs)
+        positions_by_name: dict[str, list[int]] = {}
+        price_by_name: dict[str, float] = {}
+        for index, ref in enumerate(refs):
+            if not isinstance(ref, str):
+                resolved[index] = ref
+            elif ref.strip().isdigit():
+                # Ids round-trip through find_inventory as strings
+                resolved[index] = int(ref)
+            else:
+                positions_by_name.setdefault(ref, []).append(index)
+                unit_price = _price_hint(unit_prices[index] if unit_prices else None)
+                if unit_price and ref not in price_by_name:
+                    price_by_name[ref] = unit_price
+        if not positions_by_name:
+            return resolved
+
+        names = list(positions_by_name)
+        print(f"[resolve] Looking up StockItems by name: {names}")
+        found = {
+            item.name: item.id
+            for item in StockItem.query.filter(StockItem.name.in_(names)).all()
+        }
+        misses = [name for name in names if name not in found]
+        if misses:
+            print(f"[resolve] No exact match for {misses}, trying fuzzy matching...")
+            k = PRICE_HINT_CANDIDATES if price_by_name else 1
+            for name, matches in zip(misses, InventoryService.fuzzy_match(misses, k=k)):
+                matches = InventoryService.prefer_quoted_price(matches, price_by_name.get(name))
+                if matches:
+                    found[name] = matches[0].id
+                    print(f"[resolve] Fuzzy match found for '{name}': {matches[0].name} (id={matches[0].id})")
+        for name, positions in positions_by_name.items():
+            value = found.get(name) or ValueError(f"Stock item with name or keyword '{name}' not found")
+            for index in positions:
+                resolved[index] = value
+        return resolved
+
+    def _price_hint(value) -> Optional[float]:
+        """A positive unit price from a tool argument, or None."""
+        try:
+            price = float(value)
+        except (TypeError, ValueError):
+            return None
+        return price if price > 0 else None
+
+    def _resolve_stock_item_id(stock_item_id: str | int, unit_price: Optional[float] = None) -> int:
+        """Resolve a single item id or name. See _resolve_stock_item_ids."""
+        resolved = _resolve_stock_item_ids([stock_item_id], [unit_price])[0]
+        if isinstance(resolved, Exception):
+            raise resolved
+        return resolved
+
     @mcp.tool(
         name="add_to_cart",
-        description="Add a part to the cart given the part id. Requires an existing order/cart (create one first if needed). Use this as the primary way to fulfill an order. Only use find_inventory if add_to_cart fails for a specific item.",
+        description="Add a part to the cart given the part id. Requires an existing order/cart (create one first if needed). Use this as the primary way to fulfill an order. Only use find_inventory if add_to_cart fails for a specific item. An optional unit_price quoted in the order helps pick the right part when the name isn't exact.",
     )
-    def add_to_cart(stock_item_id: str | int, quantity: int, cart) -> str:
+    @instrument_tool
+    def add_to_cart(stock_item_id: str | int, quantity: int, cart, unit_price: Optional[float] = None) -> str:
         print(f"[add_to_cart] Received cart argument: {cart}")
         print(f"[add_to_cart] Received stock_item_id argument: {stock_item_id}")
         if not cart:
@@ -39,37 +120,12 @@ with app.app_context():
             print("[add_to_cart] Result:", json.dumps(result, indent=2))
             return json.dumps(result)
         try:
-            # Robustly extract order_id from cart
-            order_id = None
-            if isinstance(cart, list):
-                if cart and isinstance(cart[0], dict) and 'id' in cart[0]:
-                    order_id = cart[0]['id']
-                elif cart and isinstance(cart[0], int):
-                    order_id = cart[0]
-            elif isinstance(cart, dict) and 'id' in cart:
-                order_id = cart['id']
-            elif isinstance(cart, int):
-                order_id = cart
+            order_id = _extract_order_id(cart)
             print(f"[add_to_cart] Using order_id: {order_id}")
             if not order_id:
                 raise ValueError("Could not extract order_id from cart argument")
             # If stock_item_id is not an int, look up by name
-            from app.storefront.models import StockItem
-            from app.storefront.services.inventory import InventoryService
-            stock_id = stock_item_id
-            if isinstance(stock_item_id, str):
-                print(f"[add_to_cart] Looking up StockItem by name: {stock_item_id}")
-                item = StockItem.query.filter_by(name=stock_item_id).first()
-                if not item:
-                    print(f"[add_to_cart] No exact match for '{stock_item_id}', trying fuzzy/keyword search...")
-                    matches = InventoryService.list_stock_items(search=stock_item_id)
-                    if matches:
-                        item = matches[0]
-                        print(f"[add_to_cart] Fuzzy match found: {item.name} (id={item.id})")
-                    else:
-                        raise ValueError(f"Stock item with name or keyword '{stock_item_id}' not found")
-                stock_id = item.id
-                print(f"[add_to_cart] Found StockItem id: {stock_id}")
+            stock_id = _resolve_stock_item_id(stock_item_id, unit_price)
             order_service.add_item_to_cart(
                 order_id=order_id, stock_item_id=stock_id, quantity=quantity
             )
@@ -81,11 +137,97 @@ with app.app_context():
             result = {"msg": f"Error adding item to cart: {str(e)}"}
             print("[add_to_cart] Result:", json.dumps(result, indent=2))
             return json.dumps(result)
-        result = {"msg": "Unknown error"}
-        print("[add_to_cart] Result:", json.dumps(result, indent=2))
-        return json.dumps(result)
+
+    # add_items_to_cart results by batch_id, so a caller whose reply was lost can
+    # repeat the call without adding the lines twice. Only the latest batches are
+    # kept, in memory, so a repeat after a server restart adds the lines again.
+    _batches: "OrderedDict[str, dict]" = OrderedDict()
+    _batches_lock = threading.Lock()
+    BATCHES_KEPT = 1024
+
+    @mcp.tool(
+        name="add_items_to_cart",
+        description="Add several parts to the cart in one call. 'items' is a list of objects with 'stock_item_id' (id or name), 'quantity' and optionally the 'unit_price' quoted in the order, which helps pick the right part when the name isn't exact. All lines are inserted in a single transaction and a result is returned for each line, with the stock_item_id it resolved to. Pass a unique batch_id to make the call safe to repeat: a repeated batch_id returns the first call's results instead of adding the lines again. Prefer this over repeated add_to_cart calls.",
+    )
+    @instrument_tool
+    def add_items_to_cart(items: list[dict], cart, batch_id: Optional[str] = None) -> str:
+        if not batch_id:
+            return json.dumps(_add_items(items, cart))
+        with _batches_lock:
+            batch = _batches.get(batch_id)
+            if batch is None:
+                batch = _batches[batch_id] = {"lock": threading.Lock(), "result": None}
+                while len(_batches) > BATCHES_KEPT:
+                    _batches.popitem(last=False)
+        # A repeat waits for the first call and gets its results
+        with batch["lock"]:
+            if batch["result"] is not None:
+                print(f"[add_items_to_cart] Replaying batch {batch_id}")
+                return json.dumps(dict(batch["result"], replayed=True))
+            result = _add_items(items, cart)
+            if result["results"]:
+                batch["result"] = result
+            return json.dumps(result)
+
+    def _add_items(items: list[dict], cart) -> dict:
+        print(f"[add_items_to_cart] Received cart argument: {cart}")
+        print(f"[add_items_to_cart] Received {len(items or [])} line(s)")
+        if not cart:
+            result = {"msg": "Cart is empty", "results": []}
+            print("[add_items_to_cart] Result:", json.dumps(result, indent=2))
+            return result
+        if not items:
+            result = {"msg": "At least one item is required", "results": []}
+            print("[add_items_to_cart] Result:", json.dumps(result, indent=2))
+            return result
+        try:
+            order_id = _extract_order_id(cart)
+            print(f"[add_items_to_cart] Using order_id: {order_id}")
+            if not order_id:
+                raise ValueError("Could not extract order_id from cart argument")
+
+            # Resolve every line first; unresolved lines are reported, not fatal
+            results: list[dict | None] = [None] * len(items)
+            refs = [line.get("stock_item_id") if isinstance(line, dict) else None for line in items]
+            present = [index for index, ref in enumerate(refs) if ref]
+            resolved = dict(zip(present, _resolve_stock_item_ids(
+                [refs[index] for index in present],
+                [items[index].get("unit_price") for index in present],
+            )))
+            lines, positions = [], []
+            for index, line in enumerate(items):
+                if not refs[index]:
+                    results[index] = {"ok": False, "msg": "Item id is required"}
+                    continue
+                stock_id = resolved[index]
+                if isinstance(stock_id, Exception):
+                    results[index] = {"ok": False, "msg": f"Error adding item to cart: {str(stock_id)}"}
+                    continue
+                lines.append({"stock_item_id": stock_id, "quantity": line.get("quantity", 1)})
+                positions.append(index)
+
+            if lines:
+                for index, line_result in zip(positions, order_service.add_items_to_cart(order_id, lines)):
+                    if not line_result["ok"]:
+                        line_result["msg"] = f"Error adding item to cart: {line_result['msg']}"
+                    results[index] = line_result
+
+            for index, line_result in enumerate(results):
+                line_result["index"] = index
+                line_result["ref"] = items[index].get("stock_item_id") if isinstance(items[index], dict) else None
+
+            added = sum(1 for line_result in results if line_result["ok"])
+            result = {"msg": f"{added} of {len(items)} item(s) added to cart", "results": results}
+            print("[add_items_to_cart] Result:", json.dumps(result, indent=2))
+            return result
+        except Exception as e:
+            print(f"[add_items_to_cart] Exception: {e}")
+            result = {"msg": f"Error adding items to cart: {str(e)}", "results": []}
+            print("[add_items_to_cart] Result:", json.dumps(result, indent=2))
+            return result
 
     @mcp.tool(name="remove_from_cart", description="Remove a item from the cart")
+    @instrument_tool
     def remove_from_cart(stock_item_id: int | str, cart: list) -> str:
         if not cart:
             result = {"msg": "Cart is empty"}
@@ -112,6 +254,7 @@ with app.app_context():
         return json.dumps(result)
 
     @mcp.tool(name="find_inventory", description="Search the database inventory for a part")
+    @instrument_tool
     def find_inventory(keyword: str, min_price: float, max_price: float) -> str:
         """
         Only use this tool if add_to_cart fails for a specific item (e.g., item not found or unavailable). Do NOT call this for every item up front.
@@ -147,7 +290,38 @@ with app.app_context():
         print("[find_inventory] Result:", json.dumps(results, indent=2))
         return result
 
+    @mcp.tool(
+        name="resolve_items",
+        description="Resolve several free-text item names to stock items in one call. Returns the top-k ranked candidates per name with similarity scores. Optional unit_prices (one per name, null where unknown) move candidates priced close to the quoted price first. Use this for items that add_items_to_cart could not find.",
+    )
+    @instrument_tool
+    def resolve_items(names: list[str], k: int = 3, min_score: float = 0.3, unit_prices: Optional[list[Optional[float]]] = None) -> str:
+        if not names:
+            result = {"msg": "At least one name is required", "results": []}
+            print("[resolve_items] Result:", json.dumps(result, indent=2))
+            return json.dumps(result)
+        try:
+            if unit_prices is not None and len(unit_prices) != len(names):
+                raise ValueError("unit_prices must have one entry per name")
+            candidates = inventory_service.resolve_items(
+                [str(name) for name in names], k=k, min_score=min_score,
+                unit_prices=[_price_hint(price) for price in unit_prices] if unit_prices else None,
+            )
+            results = [
+                {"name": name, "candidates": matches}
+                for name, matches in zip(names, candidates)
+            ]
+            result = {"results": results}
+            print("[resolve_items] Result:", json.dumps(result, indent=2))
+            return json.dumps(result)
+        except Exception as e:
+            print(f"[resolve_items] Exception: {e}")
+            result = {"msg": f"Error resolving items: {str(e)}", "results": []}
+            print("[resolve_items] Result:", json.dumps(result, indent=2))
+            return json.dumps(result)
+
     @mcp.tool(name="checkout_cart", description="Check out the cart")
+    @instrument_tool
     def checkout_cart(cart_id: str) -> str:
         if not cart_id:
             result = {"msg": "Cart id is required"}
@@ -162,6 +336,11 @@ with app.app_context():
             }
             print("[checkout_cart] Result:", json.dumps(result, indent=2))
             return json.dumps(result)
+        except InsufficientStockError as e:
+            print(f"[checkout_cart] Exception: {e}")
+            result = {"msg": f"Error placing order: {str(e)}", "short_lines": e.shortages}
+            print("[checkout_cart] Result:", json.dumps(result, indent=2))
+            return json.dumps(result)
         except Exception as e:
             print(f"[checkout_cart] Exception: {e}")
             result = {"msg": f"Error placing order: {str(e)}"}
@@ -172,6 +351,7 @@ with app.app_context():
         return json.dumps(result)
 
     @mcp.tool(name="create_order", description="Create a new order (cart) and return its id and status")
+    @instrument_tool
     def create_order() -> str:
         """
         Create a new order (cart). Returns a JSON string with order id and status.
@@ -190,6 +370,19 @@ with app.app_context():
             print("[create_order] Result:", json.dumps(result, indent=2))
             return json.dumps(result)
 
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics(request):
+        from starlette.responses import Response
+        return Response(registry.render(), headers={"Content-Type": CONTENT_TYPE})
+
     # Run the server
     if __name__ == "__main__":
+        tracing.set_service("mcp-server")
+        # The catalog index backs resolve_items and, with INVENTORY_SEARCH_BACKEND=memory,
+        # every inventory search; build it before serving so the first tool call doesn't pay
+        # for it. Processes that only import this module (the agents) build nothing.
+        print("[server] Building catalog search index...")
+        print(f"[server] Indexed {len(inventory_service.get_catalog_index())} stock items")
+        print("[server] Building fuzzy matcher...")
+        print(f"[server] Fuzzy matcher covers {len(inventory_service.get_fuzzy_matcher())} names and descriptions")
         mcp.run(transport="sse")
@@ -1,9 +1,25 @@
 import asyncio
 from collections.abc import AsyncGenerator
-from openai import OpenAI # type: ignore
-from .MCP.client import MCPClient
+from contextlib import nullcontext
+from openai import AsyncOpenAI, OpenAI # type: ignore
+from .MCP.client import MCPClient, never_sent
+from .LLM.calls import create_chat_completion, create_response, iterate_stream
+from .extractor import FAST_EXTRACT_ENABLED, fast_extract
+from .extraction_cache import ExtractionCache, cache_key
+from .item_stream import ItemStreamParser, prefix_mismatches, remaining_items
+from .metrics import WorkflowMetrics
 from typing import Any, Optional
 import json
+import os
+import uuid
+
+# Bump whenever the extraction prompt or its parsing changes, so cached results are not reused
+EXTRACT_ITEMS_PROMPT_VERSION = 1
+EXTRACT_ITEMS_MAX_TOKENS = 512
+# Stream the extraction completion and start cart work as items arrive
+STREAM_EXTRACTION_ENABLED = os.environ.get("STREAM_EXTRACTION", "false").lower() in ("1", "true", "yes")
+# Streamed items are placed in batches of at least this many (or whatever is left when the stream ends)
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", "4"))
 
 
 class OrchestratorAgent:
@@ -11,6 +27,7 @@ class OrchestratorAgent:
     OrchestratorAgent class.
     Methods:
         stream_llm(): Stream LLM response.
+        extract_items(): Extract order items from an email with the LLM.
         add_messages(): Add a message to the LLM's input messages.
         decide(): Decide which tool to use to answer the question.
         stream(): Stream the process of answering a question, possibly involving tool calls.
@@ -21,9 +38,14 @@ class OrchestratorAgent:
         model_name (str): The name of the model.
         dev_prompt (str): The developer prompt.
         mcp_client (MCPClient): The MCP client.
-        llm (OpenAI): The LLM client.
+        llm (OpenAI | AsyncOpenAI): The LLM client. Synchronous clients are
+            called on a thread pool so they never block the event loop.
         messages (list[dict]): The input messages.
         tools (list[dict]): The tools.
+        bulk_cart (bool): Whether to use the bulk add_items_to_cart tool.
+        fast_extract (bool): Whether to try the rule-based extractor before the LLM.
+        extraction_cache (ExtractionCache | None): Persistent cache of LLM extractions.
+        stream_extraction (bool): Whether to stream LLM extractions and overlap them with cart work.
 
     """
 
@@ -31,10 +53,14 @@ class OrchestratorAgent:
         self,
         dev_prompt: str,
         mcp_client: MCPClient,
-        llm: OpenAI,
+        llm: OpenAI | AsyncOpenAI,
         messages: list[dict],
         tools: list[dict],
         model_name: str = "gpt-4.1-mini",
+        bulk_cart: bool = True,
+        fast_extract: bool = FAST_EXTRACT_ENABLED,
+        extraction_cache: Optional[ExtractionCache] = None,
+        stream_extraction: bool = STREAM_EXTRACTION_ENABLED,
     ):
         """
         Initialize the OrchestratorAgent.
@@ -42,11 +68,21 @@ class OrchestratorAgent:
         Args:
             dev_prompt (str): The developer prompt.
             mcp_client (MCPClient): The MCP client.
-            llm (OpenAI): The LLM client.
+            llm (OpenAI | AsyncOpenAI): The LLM client.
             messages (list[dict]): The input messages.
             max_turns (int): The maximum number of turns.
             tools (list[dict]): The tools.
             model_name (str): The name of the model.
+            bulk_cart (bool): Add all extracted items with one add_items_to_cart
+                call instead of one add_to_cart call per item.
+            fast_extract (bool): Extract structured order lines with rules
+                (see extractor.py) and only call the LLM when they don't
+                cover the email with enough confidence.
+            extraction_cache (ExtractionCache, optional): Reuse LLM extraction
+                results for emails whose normalized body was seen before with
+                the same model and prompt version.
+            stream_extraction (bool): Stream the LLM extraction and add each
+                item to the cart as soon as it has been generated.
         """
         self.model_name = model_name
         self.dev_prompt = dev_prompt
@@ -54,6 +90,10 @@ class OrchestratorAgent:
         self.llm = llm
         self.messages = messages
         self.tools = tools
+        self.bulk_cart = bulk_cart
+        self.fast_extract = fast_extract
+        self.extraction_cache = extraction_cache
+        self.stream_extraction = stream_extraction
         if self.dev_prompt:
             self.messages.append({"role": "developer", "content": self.dev_prompt})
 
@@ -107,17 +147,15 @@ class OrchestratorAgent:
                 self.add_messages(prompt)
                 
             # Create the streaming response
-            stream = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.llm.responses.create(
-                    model=self.model_name,
-                    input=self.messages,
-                    stream=True
-                )
+            stream = await create_response(
+                self.llm,
+                model=self.model_name,
+                input=self.messages,
+                stream=True
             )
             
             # Stream the response
-            for event in stream:
+            async for event in iterate_stream(self.llm, stream):
                 yield event.text if hasattr(event, 'text') else str(event)
                 
         except Exception as e:
@@ -135,11 +173,12 @@ class OrchestratorAgent:
         """
         self.messages.append({"role": "user", "content": query})
 
-    async def call_tool(self, tool_calls) -> list[dict]:
+    async def call_tool(self, tool_calls, metrics: Optional[WorkflowMetrics] = None) -> list[dict]:
         """Receives a list of tool calls and calls the tools
 
         Args:
             tool_calls: Either a list of tool call dicts or a string error message
+            metrics: If given, each tool round trip is recorded as a span
 
         Returns:
             list[dict]: The results of the tool calls or error information
@@ -167,7 +206,8 @@ class OrchestratorAgent:
                     continue
                     
                 # Call the tool through MCP client
-                result = await self.mcp_client.call_tool(name, args)
+                with metrics.span(name, kind="tool") if metrics else nullcontext():
+                    result = await self.mcp_client.call_tool(name, args)
                 results.append({
                     "name": name,
                     "arguments": args,
@@ -179,7 +219,8 @@ class OrchestratorAgent:
                 results.append({
                     "error": True,
                     "name": name if 'name' in locals() else "unknown",
-                    "message": f"Error calling tool: {str(e)}"
+                    "message": f"Error calling tool: {str(e)}",
+                    "never_sent": never_sent(e),
                 })
                 
         return results
@@ -278,7 +319,7 @@ class OrchestratorAgent:
         """
         try:
             from .PlannerAgent import PlannerAgent
-            planner = PlannerAgent(self.dev_prompt, self.mcp_client, [], self.tools, self.model_name)
+            planner = PlannerAgent(self.dev_prompt, self.mcp_client, [], self.tools, self.model_name, llm=self.llm)
             # Add a system message to reinforce workflow
             workflow_msg = (
                 "SYSTEM: Workflow for order requests: "
@@ -288,7 +329,7 @@ class OrchestratorAgent:
                 "Do NOT call find_inventory for every item up front."
             )
             planner.messages.append({"role": "system", "content": workflow_msg})
-            result = planner.run(question)
+            result = await planner.arun(question)
             # Directly yield the tool_calls list (may be OpenAI objects)
             yield result.get('tool_calls', [])
         except Exception as e:
@@ -316,24 +357,167 @@ class OrchestratorAgent:
             return f"❌ {name} failed: {result_text}"
         return f"✅ {name} succeeded: {result_text}"
 
-    async def stream(self, question: str) -> AsyncGenerator[dict, None]:
-        """Deterministic order workflow: extract items, create order, add items, summarize."""
-        # 1. Extract items from the email using the LLM with response_format structured output
-        print("\n[orchestrator] Extracting order items from email...")
-        extract_items_prompt = (
+    async def _add_lines(
+        self, lines: list[dict], order_id, metrics: Optional[WorkflowMetrics] = None
+    ) -> tuple[list[Optional[bool]], list]:
+        """Add (stock_item_id, quantity) lines to the cart.
+
+        Uses one add_items_to_cart call when bulk_cart is enabled. If that call
+        fails without a readable reply it may still have been applied, so it is
+        repeated with the same batch_id, which the server answers with the first
+        call's results instead of adding the lines twice. Lines are added with one
+        add_to_cart call each only when the bulk call is known not to have added
+        anything.
+
+        Returns:
+            tuple[list[Optional[bool]], list]: Per-line success flags, None where
+                the outcome is unknown, and the raw tool results.
+        """
+        cart = [{"id": order_id}]
+        raw_results = []
+        if self.bulk_cart:
+            arguments = {"items": lines, "cart": cart, "batch_id": uuid.uuid4().hex}
+            for attempt in range(2):
+                result = await self.call_tool([{"name": "add_items_to_cart", "arguments": arguments}], metrics=metrics)
+                raw_results.append(result)
+                try:
+                    reply = json.loads(result[0].get('result') or '')
+                except Exception:
+                    reply = None
+                if isinstance(reply, dict) or (attempt == 0 and result[0].get('never_sent')):
+                    break
+                print("[orchestrator] Bulk add_items_to_cart failed without a reply, repeating its batch")
+                if metrics:
+                    metrics.fallback("add_items_to_cart_repeat")
+            else:
+                print("[orchestrator] Outcome of bulk add_items_to_cart unknown, not retrying its lines")
+                return [None] * len(lines), raw_results
+            line_results = reply.get('results', []) if isinstance(reply, dict) else []
+            if len(line_results) == len(lines):
+                return [bool(line_result.get('ok')) for line_result in line_results], raw_results
+            print("[orchestrator] Bulk add_items_to_cart failed, falling back to per-item add_to_cart")
+            if metrics:
+                metrics.fallback("per_item_add_to_cart")
+        flags = []
+        for line in lines:
+            result = await self.call_tool([{"name": "add_to_cart", "arguments": dict(line, cart=cart)}], metrics=metrics)
+            raw_results.append(result)
+            try:
+                msg = json.loads(result[0].get('result', '{}')).get('msg', '')
+            except Exception:
+                msg = ''
+            flags.append('added to cart' in msg)
+        return flags, raw_results
+
+    async def _resolve_names(
+        self, names: list[str], metrics: Optional[WorkflowMetrics] = None,
+        unit_prices: Optional[list] = None,
+    ) -> list[list[dict]] | None:
+        """Rank stock item candidates for every name with one resolve_items call.
+
+        unit_prices, one per name (None where unknown), favour candidates priced
+        like the order quoted.
+
+        Returns:
+            list[list[dict]] | None: Candidates per name, or None if the tool failed.
+        """
+        arguments = {"names": names}
+        if unit_prices and any(unit_prices):
+            arguments["unit_prices"] = unit_prices
+        result = await self.call_tool([{"name": "resolve_items", "arguments": arguments}], metrics=metrics)
+        try:
+            resolved = json.loads(result[0].get('result', '{}')).get('results', [])
+        except Exception:
+            return None
+        if len(resolved) != len(names):
+            return None
+        return [entry.get('candidates', []) for entry in resolved]
+
+    async def _find_inventory_fallback(
+        self, pending_items: list[dict], order_id, items_added: list, items_not_found: list,
+        metrics: Optional[WorkflowMetrics] = None,
+    ) -> AsyncGenerator[dict, None]:
+        """Legacy per-item fallback: find_inventory with the first 2 words, then 1 word."""
+        for item in pending_items:
+            quantity = item.get("quantity", 1)
+            name = item.get("name", "")
+            words = name.split()
+            tried_keywords = set()
+            for n_words in [2, 1]:
+                if len(words) >= n_words:
+                    keyword = " ".join(words[:n_words])
+                    if keyword in tried_keywords:
+                        continue
+                    tried_keywords.add(keyword)
+                    find_result = await self.call_tool([{"name": "find_inventory", "arguments": {"keyword": keyword, "min_price": 0, "max_price": 1e9}}], metrics=metrics)
+                    try:
+                        inventory = json.loads(find_result[0].get('result', '[]'))
+                        if isinstance(inventory, list) and inventory:
+                            best_match = inventory[0]
+                            best_id = best_match.get("id")
+                            add_fuzzy_args = {"stock_item_id": best_id, "quantity": quantity, "cart": [{"id": order_id}]}
+                            add_fuzzy = await self.call_tool([{"name": "add_to_cart", "arguments": add_fuzzy_args}], metrics=metrics)
+                            fuzzy_msg = json.loads(add_fuzzy[0].get('result', '{}')).get('msg', '')
+                            if 'added to cart' in fuzzy_msg:
+                                items_added.append(item)
+                                yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Fuzzy add to cart: {json.dumps(add_fuzzy_args)}\nResult: {add_fuzzy}"}
+                                break
+                    except Exception:
+                        pass
+            else:
+                items_not_found.append(item)
+                yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Item not found after all attempts: {name}"}
+
+    def _extract_items_prompt(self, question: str) -> str:
+        return (
             "Extract a list of order items from the following email. "
             "Return a JSON object with a single key 'items', whose value is an array of objects, each with: 'name' (str, required), 'quantity' (int, required), and optionally 'id' (int or str) and 'details' (str). "
             "No explanation, only the JSON object.\nEMAIL:\n" + question
         )
+
+    async def _cache_lookup(
+        self, question: str, metrics: Optional[WorkflowMetrics] = None
+    ) -> tuple[Optional[str], Optional[list[dict]]]:
+        """Return the extraction cache key of an email and its cached items, if any.
+
+        The cache is SQLite, so reads and writes run in a worker thread rather
+        than blocking the other emails sharing the event loop.
+        """
+        if self.extraction_cache is None:
+            return None, None
+        key = cache_key(question, self.model_name, EXTRACT_ITEMS_PROMPT_VERSION)
+        try:
+            cached = await asyncio.to_thread(self.extraction_cache.get, key)
+        except Exception as e:
+            print(f"[orchestrator] Error reading extraction cache: {e}")
+            cached = None
+        if metrics:
+            metrics.count("extraction_cache.hit" if cached is not None else "extraction_cache.miss")
+        if cached is not None:
+            print(f"[orchestrator] Extraction cache hit: {len(cached)} item(s)")
+        return key, cached
+
+    async def _cache_store(self, key: Optional[str], items: list[dict]) -> None:
+        if key is None:
+            return
+        try:
+            await asyncio.to_thread(self.extraction_cache.put, key, items, self.model_name)
+        except Exception as e:
+            print(f"[orchestrator] Error writing extraction cache: {e}")
+
+    async def _llm_extract(self, question: str, metrics: Optional[WorkflowMetrics] = None) -> Optional[list[dict]]:
+        """One non-streaming LLM extraction; None if the call or parsing failed."""
         # Use OpenAI's response_format structured output
-        items = []
+        items = None
         try:
-            response = self.llm.chat.completions.create(
-                model=self.model_name,
-                messages=[{"role": "user", "content": extract_items_prompt}],
-                response_format={"type": "json_object"},
-                max_tokens=512,
-            )
+            with metrics.span("extract_items", kind="llm", model=self.model_name) if metrics else nullcontext():
+                response = await create_chat_completion(
+                    self.llm,
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": self._extract_items_prompt(question)}],
+                    response_format={"type": "json_object"},
+                    max_tokens=EXTRACT_ITEMS_MAX_TOKENS,
+                )
             content = response.choices[0].message.content
             print(f"[orchestrator] Raw LLM response for item extraction: {content}")
             try:
@@ -348,80 +532,241 @@ class OrchestratorAgent:
                 print(f"[orchestrator] Exception parsing LLM response: {parse_exc}")
         except Exception as e:
             print(f"[orchestrator] Error extracting items: {e}")
-        print(f"[orchestrator] Final extracted items: {items}")
-        if not items:
-            yield {"is_task_complete": True, "require_user_input": False, "content": "Could not extract items from email."}
-            return
-        yield {"is_task_complete": False, "require_user_input": False, "content": f"Extracted items: {json.dumps(items, indent=2)}"}
-        # 2. Create the order
-        print("[orchestrator] Creating order...")
+        return items
+
+    async def extract_items(self, question: str, metrics: Optional[WorkflowMetrics] = None) -> list[dict]:
+        """Extract order items from an email using the LLM with response_format structured output.
+
+        Results parsed from the LLM, including an empty list for a non-order,
+        are stored in the extraction cache when there is one; failed calls are not.
+
+        Args:
+            question (str): The email content.
+            metrics (WorkflowMetrics, optional): Records the LLM call as a span
+                and counts extraction_cache.hit / extraction_cache.miss.
+
+        Returns:
+            list[dict]: The extracted items, empty if extraction failed.
+        """
+        key, cached = await self._cache_lookup(question, metrics)
+        if cached is not None:
+            return cached
+        items = await self._llm_extract(question, metrics)
+        if items is None:
+            return []
+        await self._cache_store(key, items)
+        return items
+
+    async def _stream_extract(self, question: str, queue: asyncio.Queue, metrics: WorkflowMetrics) -> list[dict]:
+        """Extract order items with a streamed completion, queueing each one as soon as it is complete.
+
+        A None on the queue marks the end. If the stream fails or stops before
+        the items array closes (dropped connection, max_tokens), the email is
+        extracted again without streaming and only the retry's items past the
+        ones already queued follow (remaining_items), so every item reaches
+        the queue exactly once even when the retry words one differently.
+        Retries whose leading items disagree with the queued ones are counted
+        as extract_items_retry.mismatch.
+
+        Returns:
+            list[dict]: Every item queued.
+        """
+        sent: list[dict] = []
+        try:
+            with metrics.span("extract"):
+                key, cached = await self._cache_lookup(question, metrics)
+                if cached is not None:
+                    for item in cached:
+                        sent.append(item)
+                        queue.put_nowait(item)
+                    return sent
+                parser = ItemStreamParser()
+                try:
+                    with metrics.span("extract_items_stream", kind="llm", model=self.model_name) as record:
+                        stream = await create_chat_completion(
+                            self.llm,
+                            model=self.model_name,
+                            messages=[{"role": "user", "content": self._extract_items_prompt(question)}],
+                            response_format={"type": "json_object"},
+                            max_tokens=EXTRACT_ITEMS_MAX_TOKENS,
+                            stream=True,
+                        )
+                        async for event in iterate_stream(self.llm, stream):
+                            delta = event.choices[0].delta.content if event.choices else None
+                            for item in parser.feed(delta or ""):
+                                sent.append(item)
+                                queue.put_nowait(item)
+                        record["items"] = len(sent)
+                except Exception as e:
+                    print(f"[orchestrator] Extraction stream failed after {len(sent)} item(s): {e}")
+                print(f"[orchestrator] Raw streamed LLM response for item extraction: {parser.text}")
+                if parser.complete:
+                    await self._cache_store(key, sent)
+                    return sent
+                print(f"[orchestrator] Extraction stream ended before the items array closed, re-extracting without streaming")
+                metrics.fallback("extract_items_retry")
+                items = await self._llm_extract(question, metrics)
+                if items is None:
+                    return sent
+                await self._cache_store(key, items)
+                mismatched = prefix_mismatches(sent, items)
+                if mismatched:
+                    print(f"[orchestrator] Re-extraction disagrees with {mismatched} of {len(sent)} streamed item(s); keeping the streamed ones")
+                    metrics.count("extract_items_retry.mismatch", mismatched)
+                for item in remaining_items(sent, items):
+                    sent.append(item)
+                    queue.put_nowait(item)
+                return sent
+        finally:
+            queue.put_nowait(None)
+
+    def _fast_path_items(self, question: str, metrics: Optional[WorkflowMetrics] = None) -> Optional[list[dict]]:
+        """Items from the rule-based extractor, or None if the email needs the LLM.
+
+        Counts fast_path.hit or fast_path.miss per email and the lines the
+        rules looked at, so reports can show the hit rate.
+        """
+        result = fast_extract(question)
+        if metrics:
+            metrics.count("fast_path.lines", len(result["lines"]))
+            metrics.count("fast_path.hit" if result["accepted"] else "fast_path.miss")
+        if result["accepted"]:
+            print(f"[orchestrator] Fast path extracted {len(result['items'])} item(s), min confidence {result['confidence']}")
+            return result["items"]
+        print(f"[orchestrator] Fast path declined ({result['reason']}), extracting with the LLM")
+        return None
+
+    async def _extract(self, question: str, metrics: Optional[WorkflowMetrics] = None) -> list[dict]:
+        """Extract order items with the rule-based fast path, falling back to the LLM."""
+        if self.fast_extract:
+            items = self._fast_path_items(question, metrics)
+            if items is not None:
+                return items
+        return await self.extract_items(question, metrics=metrics)
+
+    async def stream(self, question: str) -> AsyncGenerator[dict, None]:
+        """
+        Run the order workflow, yielding progress chunks.
+
+        Chunks produced once the order exists carry its order_id and are also
+        published to the order's SocketIO room, so dashboards can follow along
+        without polling.
+        """
+        from ..storefront.events import publisher as order_events
+        async for chunk in self._run_workflow(question):
+            if chunk.get("order_id") is not None:
+                order_events.progress(chunk["order_id"], chunk)
+            yield chunk
+
+    async def _create_order(self, metrics: Optional[WorkflowMetrics] = None):
+        """Create an empty order and return its id, or None if that failed."""
         order_id = None
-        create_order_result = await self.call_tool([{"name": "create_order", "arguments": {}}])
+        with metrics.span("create_order") if metrics else nullcontext():
+            create_order_result = await self.call_tool([{"name": "create_order", "arguments": {}}], metrics=metrics)
         if create_order_result and isinstance(create_order_result, list):
             try:
                 parsed = json.loads(create_order_result[0].get('result', '{}'))
                 order_id = parsed.get('order_id')
             except Exception:
                 pass
-        if not order_id:
-            yield {"is_task_complete": True, "require_user_input": False, "content": "Failed to create order."}
-            return
-        yield {"is_task_complete": False, "require_user_input": False, "content": f"Order created: {order_id}"}
-        # 3. Add each item to the cart
-        add_results = []
-        items_added = []
-        items_not_found = []
+        return order_id
+
+    async def _place_items(
+        self, items: list[dict], order_id, items_added: list, items_not_found: list,
+        metrics: Optional[WorkflowMetrics] = None, unmatched: Optional[list] = None,
+    ) -> AsyncGenerator[dict, None]:
+        """Add items to the order's cart, resolving the names that don't match exactly.
+
+        Appends each item to items_added or items_not_found and yields progress chunks.
+        With unmatched given, items whose names don't match exactly are appended
+        to it instead, so several batches can share one _place_unmatched call.
+        """
+        lines = []
         for item in items:
-            # Try full name/id first
-            stock_item_id = item.get("id") or item.get("name")
+            line = {"stock_item_id": item.get("id") or item.get("name"), "quantity": item.get("quantity", 1)}
+            if item.get("unit_price"):
+                # A quoted price helps the server choose between close name matches
+                line["unit_price"] = item["unit_price"]
+            lines.append(line)
+        added_count = len(items_added)
+        with metrics.span("add_to_cart", lines=len(lines)) if metrics else nullcontext():
+            added_flags, add_results = await self._add_lines(lines, order_id, metrics=metrics)
+        pending_items = []
+        for item, added in zip(items, added_flags):
+            if added:
+                items_added.append(item)
+            elif added is None:
+                # May already be in the cart; adding it again could double it
+                items_not_found.append(item)
+            else:
+                pending_items.append(item)
+        yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Added to cart: {len(items_added) - added_count} of {len(items)} item(s)\nResult: {add_results}"}
+        if unmatched is not None:
+            unmatched.extend(pending_items)
+            return
+        async for chunk in self._place_unmatched(pending_items, order_id, items_added, items_not_found, metrics):
+            yield chunk
+
+    async def _place_unmatched(
+        self, pending_items: list[dict], order_id, items_added: list, items_not_found: list,
+        metrics: Optional[WorkflowMetrics] = None,
+    ) -> AsyncGenerator[dict, None]:
+        """Fallback for items whose names didn't match: resolve them all server-side in one call."""
+        if not pending_items:
+            return
+        if metrics:
+            metrics.fallback("resolve_items")
+        with metrics.span("resolve_items", names=len(pending_items)) if metrics else nullcontext():
+            candidates = await self._resolve_names(
+                [item.get("name", "") for item in pending_items], metrics=metrics,
+                unit_prices=[item.get("unit_price") for item in pending_items],
+            )
+        if candidates is None:
+            print("[orchestrator] resolve_items failed, falling back to find_inventory per item")
+            if metrics:
+                metrics.fallback("find_inventory")
+            # The span covers the consumer's handling of each chunk too, which is negligible here
+            with metrics.span("find_inventory_fallback", items=len(pending_items)) if metrics else nullcontext():
+                async for chunk in self._find_inventory_fallback(pending_items, order_id, items_added, items_not_found, metrics=metrics):
+                    yield chunk
+            return
+        picks = []
+        for item, item_candidates in zip(pending_items, candidates):
             quantity = item.get("quantity", 1)
-            add_args = {"stock_item_id": stock_item_id, "quantity": quantity, "cart": [{"id": order_id}]}
-            result = await self.call_tool([{"name": "add_to_cart", "arguments": add_args}])
-            add_results.append(result)
-            try:
-                msg = json.loads(result[0].get('result', '{}')).get('msg', '')
-                if 'added to cart' in msg:
-                    items_added.append(item)
-                    yield {"is_task_complete": False, "require_user_input": False, "content": f"Added to cart: {json.dumps(add_args)}\nResult: {result}"}
-                    continue
-            except Exception:
-                pass
-            # Fallback: try find_inventory with first 2 words, then 1 word
-            name = item.get("name", "")
-            words = name.split()
-            tried_keywords = set()
-            for n_words in [2, 1]:
-                if len(words) >= n_words:
-                    keyword = " ".join(words[:n_words])
-                    if keyword in tried_keywords:
-                        continue
-                    tried_keywords.add(keyword)
-                    find_result = await self.call_tool([{"name": "find_inventory", "arguments": {"keyword": keyword, "min_price": 0, "max_price": 1e9}}])
-                    try:
-                        inventory = json.loads(find_result[0].get('result', '[]'))
-                        if isinstance(inventory, list) and inventory:
-                            best_match = inventory[0]
-                            best_id = best_match.get("id")
-                            add_fuzzy_args = {"stock_item_id": best_id, "quantity": quantity, "cart": [{"id": order_id}]}
-                            add_fuzzy = await self.call_tool([{"name": "add_to_cart", "arguments": add_fuzzy_args}])
-                            fuzzy_msg = json.loads(add_fuzzy[0].get('result', '{}')).get('msg', '')
-                            if 'added to cart' in fuzzy_msg:
-                                items_added.append(item)
-                                yield {"is_task_complete": False, "require_user_input": False, "content": f"Fuzzy add to cart: {json.dumps(add_fuzzy_args)}\nResult: {add_fuzzy}"}
-                                break
-                    except Exception:
-                        pass
+            # Prefer the best-ranked candidate that can cover the quantity
+            best = next(
+                (c for c in item_candidates if c.get("quantity", 0) >= quantity),
+                item_candidates[0] if item_candidates else None,
+            )
+            if best:
+                picks.append((item, {"stock_item_id": best["id"], "quantity": quantity}, best))
             else:
                 items_not_found.append(item)
-                yield {"is_task_complete": False, "require_user_input": False, "content": f"Item not found after all attempts: {name}"}
+                yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Item not found after all attempts: {item.get('name', '')}"}
+        if picks:
+            with metrics.span("fuzzy_add_to_cart", lines=len(picks)) if metrics else nullcontext():
+                fuzzy_flags, _ = await self._add_lines([line for _, line, _ in picks], order_id, metrics=metrics)
+            for (item, line, best), added in zip(picks, fuzzy_flags):
+                if added:
+                    items_added.append(item)
+                    yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Fuzzy add to cart: {item.get('name', '')} -> {best.get('name')} (id={best.get('id')}, score={best.get('score')}, qty={line['quantity']})"}
+                else:
+                    items_not_found.append(item)
+                    yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Item not found after all attempts: {item.get('name', '')}"}
+
+    def _finish(self, order_id, items_added: list, items_not_found: list, metrics: WorkflowMetrics) -> str:
+        """Mark the order ready and return the workflow summary."""
+        metrics.count("items_added", len(items_added))
+        metrics.count("items_not_found", len(items_not_found))
         # 4. Mark order as 'ready'
         print(f"[orchestrator] Marking order {order_id} as 'ready'...")
-        from ..storefront.services.order import OrderService
-        from .MCP.server import app
-        with app.app_context():
-            status_updated = OrderService.update_order_status(order_id, 'ready')
+        with metrics.span("mark_ready"):
+            from ..storefront.services.order import OrderService
+            from .MCP.server import app
+            with app.app_context():
+                status_updated = OrderService.update_order_status(order_id, 'ready')
         print(f"[orchestrator] Order status updated: {status_updated}")
-        # 5. Yield a summary
+        # 5. Summarize
         summary = f"Order {order_id} created.\n"
         summary += f"Items added: {len(items_added)}\n"
         for item in items_added:
@@ -432,4 +777,128 @@ class OrchestratorAgent:
                 summary += f"  - {item.get('name')} (qty: {item.get('quantity', 1)})\n"
         summary += f"Order status: {'ready' if status_updated else 'draft'}\nOrder workflow complete."
         print(f"[orchestrator] Summary:\n{summary}")
-        yield {"is_task_complete": True, "require_user_input": False, "content": summary}
+        return summary
+
+    async def _run_workflow(self, question: str) -> AsyncGenerator[dict, None]:
+        """Deterministic order workflow: extract items, create order, add items, summarize.
+
+        Every stage, tool round trip and LLM call is timed; the final chunk
+        carries the spans and counts under "metrics". With stream_extraction,
+        emails the fast path can't handle go through _run_streaming_workflow.
+        """
+        metrics = WorkflowMetrics()
+
+        def done(content: str, order_id=None) -> dict:
+            return {"is_task_complete": True, "require_user_input": False, "order_id": order_id,
+                    "content": content, "metrics": metrics.to_dict()}
+
+        # 1. Extract items from the email
+        print("\n[orchestrator] Extracting order items from email...")
+        if self.stream_extraction:
+            with metrics.span("extract"):
+                items = self._fast_path_items(question, metrics) if self.fast_extract else None
+            if items is None:
+                async for chunk in self._run_streaming_workflow(question, metrics, done):
+                    yield chunk
+                return
+        else:
+            with metrics.span("extract"):
+                items = await self._extract(question, metrics=metrics)
+        metrics.count("items_extracted", len(items))
+        print(f"[orchestrator] Final extracted items: {items}")
+        if not items:
+            yield done("Could not extract items from email.")
+            return
+        yield {"is_task_complete": False, "require_user_input": False, "content": f"Extracted items: {json.dumps(items, indent=2)}"}
+        # 2. Create the order
+        print("[orchestrator] Creating order...")
+        order_id = await self._create_order(metrics)
+        if not order_id:
+            yield done("Failed to create order.")
+            return
+        yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Order created: {order_id}"}
+        # 3. Add the items to the cart
+        items_added = []
+        items_not_found = []
+        async for chunk in self._place_items(items, order_id, items_added, items_not_found, metrics):
+            yield chunk
+        yield done(self._finish(order_id, items_added, items_not_found, metrics), order_id)
+
+    async def _run_streaming_workflow(self, question: str, metrics: WorkflowMetrics, done) -> AsyncGenerator[dict, None]:
+        """Order workflow that overlaps LLM extraction with cart work.
+
+        Items are parsed out of the streamed completion as they complete
+        (_stream_extract). The order is created when the first one arrives,
+        and items are added in batches of STREAM_BATCH_SIZE, one batch in
+        flight at a time, so tool and database work runs while the model is
+        still generating without paying a round trip per item. Whatever is
+        left goes out as soon as the stream ends, and names that didn't match
+        exactly are resolved together at the end, a single catalog search as
+        in the unstreamed workflow.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        extraction = asyncio.create_task(self._stream_extract(question, queue, metrics))
+        items: list[dict] = []
+        items_added: list = []
+        items_not_found: list = []
+        batch: list[dict] = []
+        unmatched: list[dict] = []
+        order_id = None
+        next_item: Optional[asyncio.Task] = None
+        placing: Optional[asyncio.Task] = None
+        stream_done = False
+        try:
+            while True:
+                if order_id is None and batch:
+                    print("[orchestrator] Creating order...")
+                    order_id = await self._create_order(metrics)
+                    if not order_id:
+                        yield done("Failed to create order.")
+                        return
+                    yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Order created: {order_id}"}
+                if placing is None and batch and (stream_done or len(batch) >= STREAM_BATCH_SIZE):
+                    placing = asyncio.create_task(_collect(self._place_items(batch, order_id, items_added, items_not_found, metrics, unmatched)))
+                    batch = []
+                if stream_done and placing is None:
+                    break
+                waiting = set()
+                if not stream_done:
+                    next_item = next_item or asyncio.create_task(queue.get())
+                    waiting.add(next_item)
+                if placing is not None:
+                    waiting.add(placing)
+                finished, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if next_item in finished:
+                    arrived = [next_item.result()]
+                    next_item = None
+                    while not queue.empty():
+                        arrived.append(queue.get_nowait())
+                    for item in arrived:
+                        if item is None:
+                            stream_done = True
+                            continue
+                        items.append(item)
+                        batch.append(item)
+                        yield {"is_task_complete": False, "require_user_input": False, "order_id": order_id, "content": f"Extracted item: {json.dumps(item)}"}
+                if placing in finished:
+                    for chunk in placing.result():
+                        yield chunk
+                    placing = None
+            await extraction
+            metrics.count("items_extracted", len(items))
+            print(f"[orchestrator] Final extracted items: {items}")
+            if not items:
+                yield done("Could not extract items from email.")
+                return
+            async for chunk in self._place_unmatched(unmatched, order_id, items_added, items_not_found, metrics):
+                yield chunk
+            yield done(self._finish(order_id, items_added, items_not_found, metrics), order_id)
+        finally:
+            for task in (extraction, next_item, placing):
+                if task is not None and not task.done():
+                    task.cancel()
+
+
+async def _collect(chunks: AsyncGenerator[dict, None]) -> list[dict]:
+    """Drain an async generator of progress chunks into a list."""
+    return [chunk async for chunk in chunks]
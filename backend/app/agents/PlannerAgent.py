@@ -1,12 +1,13 @@
 import logging
 import uuid
-from openai import OpenAI # type: ignore
+from openai import AsyncOpenAI, OpenAI # type: ignore
 import json
+from .LLM.calls import create_chat_completion, create_client
 
 logger = logging.getLogger(__name__)
 
 class PlannerAgent:
-    def __init__(self, dev_prompt, mcp_client, messages, tools, model_name: str = "gpt-4.1-mini"):
+    def __init__(self, dev_prompt, mcp_client, messages, tools, model_name: str = "gpt-4.1-mini", llm: OpenAI | AsyncOpenAI | None = None):
         self.model_name = model_name
         self.dev_prompt = dev_prompt
         self.mcp_client = mcp_client
@@ -14,7 +15,7 @@ class PlannerAgent:
         self.tools = tools
         if self.dev_prompt:
             self.messages.append({"role": "developer", "content": self.dev_prompt})
-        self.llm = OpenAI()  # Instantiate internally
+        self.llm = llm or create_client(asynchronous=False)  # Share the caller's client when given
 
     def add_messages(self, query: str):
         self.messages.append({"role": "user", "content": query})
@@ -26,6 +27,20 @@ class PlannerAgent:
             messages=self.messages,
             tools=self.tools
         )
+        return self._parse_tool_calls(response)
+
+    async def arun(self, query: str):
+        """Same as run, but awaits the LLM call without blocking the event loop."""
+        self.add_messages(query)
+        response = await create_chat_completion(
+            self.llm,
+            model=self.model_name,
+            messages=self.messages,
+            tools=self.tools
+        )
+        return self._parse_tool_calls(response)
+
+    def _parse_tool_calls(self, response):
         # OpenAI returns tool_calls in response.choices[0].message.tool_calls
         try:
             tool_calls = response.choices[0].message.tool_calls
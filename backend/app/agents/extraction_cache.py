@@ -0,0 +1,194 @@
+"""
+Persistent cache of LLM item extraction results.
+
+Re-processing an email (after a crash, a retry or a ledger reset) and
+duplicate forwards of the same purchase order send the LLM the same
+extraction prompt again. ExtractionCache stores the parsed items under a
+content address: a hash of the normalized email body, the model name and the
+extraction prompt version, so a changed prompt or model never reuses old
+results.
+
+Like the email ledger it is a local SQLite database in WAL mode that several
+processes can share. Entries expire after a TTL, and pruning, which runs
+every _PRUNE_EVERY writes, evicts the least recently used ones beyond
+max_entries.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_S = 30 * 24 * 3600
+# Expired and excess entries are pruned every this many writes
+_PRUNE_EVERY = 64
+
+# Header fields and forwarding boilerplate that differ between copies of the same email
+_HEADER_LINE = re.compile(
+    r"^\**\s*(?:from|to|cc|bcc|date|sent|subject|message-id|reply-to)\s*:", re.IGNORECASE
+)
+_FORWARD_LINE = re.compile(r"^(?:-{2,}\s*forwarded message\s*-{2,}|begin forwarded message:|on .+ wrote:)$", re.IGNORECASE)
+_QUOTE_PREFIX = re.compile(r"^(?:>\s?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_email(content: str) -> str:
+    """
+    Reduce an email to the text that determines its extraction.
+
+    Drops the markdown title, header fields (From, To, Date, Subject,
+    Message-ID, ...) and forwarding markers, strips quote prefixes and
+    collapses whitespace, so a forwarded or re-sent copy of a purchase order
+    normalizes to the same text as the original.
+    """
+    lines = []
+    for raw in content.splitlines():
+        line = _QUOTE_PREFIX.sub("", raw.strip()).strip()
+        if not line or line.startswith("# ") or _HEADER_LINE.match(line) or _FORWARD_LINE.match(line):
+            continue
+        lines.append(_WHITESPACE.sub(" ", line))
+    return "\n".join(lines)
+
+
+def cache_key(content: str, model: str, prompt_version: Union[int, str]) -> str:
+    """Content address of an extraction: sha256 of the normalized body, model and prompt version."""
+    digest = hashlib.sha256()
+    for part in (normalize_email(content), model, str(prompt_version)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent, size- and TTL-bounded cache of extracted item lists.
+
+    Attributes:
+        path (Path): Location of the SQLite database file.
+        max_entries (int): Entries kept before the least recently used are evicted.
+        ttl_s (float): Seconds an entry stays valid after it was stored.
+        hits (int): Lookups answered from the cache by this instance.
+        misses (int): Lookups that were not.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_s: float = DEFAULT_TTL_S,
+        timeout: float = 30.0,
+    ):
+        """
+        Open (and create if needed) the cache.
+
+        Args:
+            path: Location of the SQLite database file.
+            max_entries: Entries kept before the least recently used are evicted.
+            ttl_s: Seconds an entry stays valid after it was stored.
+            timeout: Seconds to wait on a lock held by another process.
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                items TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_extraction_cache_accessed_at ON extraction_cache (accessed_at)"
+        )
+        self.prune()
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached items for a key, or None if absent or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT items, created_at FROM extraction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_s:
+                self._conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE extraction_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding unreadable extraction cache entry {key[:12]}")
+            self.delete(key)
+            return None
+
+    def put(self, key: str, items: List[Dict[str, Any]], model: str) -> None:
+        """Store the items for a key, replacing any earlier entry."""
+        now = time.time()
+        payload = json.dumps(items, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO extraction_cache (key, model, items, created_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET model = excluded.model, items = excluded.items, "
+                "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+                (key, model, payload, now, now),
+            )
+            self._writes += 1
+            prune = self._writes % _PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+
+    def prune(self) -> int:
+        """
+        Drop expired entries, then the least recently used beyond max_entries.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM extraction_cache WHERE created_at < ?", (time.time() - self.ttl_s,)
+            ).rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                removed += self._conn.execute(
+                    "DELETE FROM extraction_cache WHERE key IN "
+                    "(SELECT key FROM extraction_cache ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                ).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
@@ -0,0 +1,273 @@
+"""
+Rule-based extraction of order lines, ahead of the LLM.
+
+Most order emails list their items in a handful of structured formats:
+
+    1. 10x Laptop - Elite Laptop (Black) @ $1,199.99 each
+    2. 5x Laptop Stand - Adjustable aluminum stand @ $34.99 each
+    - Elite Laptop (Black) x 10
+    Qty 10: Elite Laptop (Black)
+    | Elite Laptop (Black) | 10 | $1,199.99 |
+
+fast_extract parses those with regular expressions and scores each line.
+OrchestratorAgent only uses the result when every line that looks like part
+of the order parsed with at least FAST_EXTRACT_MIN_CONFIDENCE and no line
+words a change to it ("But actually cancel the mouse.", "make that 3
+instead"); anything else (prose orders, corrections, unusual layouts,
+non-orders) still goes to the LLM.
+
+Set FAST_EXTRACT=false to always use the LLM.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+FAST_EXTRACT_ENABLED = os.environ.get("FAST_EXTRACT", "true").lower() not in ("0", "false", "no")
+FAST_EXTRACT_MIN_CONFIDENCE = float(os.environ.get("FAST_EXTRACT_MIN_CONFIDENCE", "0.8"))
+# Quantities outside this range are more likely part numbers or years
+MAX_QUANTITY = 10000
+
+_MARKER = re.compile(r"^(?:[-*+•]|\d{1,3}[.)])\s+")
+_PRICE = r"\$\s?\d[\d,]*(?:\.\d+)?"
+# "10x Laptop - Elite Laptop (Black) @ $1,199.99 each"
+_LEADING_QTY = re.compile(
+    rf"^(?P<qty>\d+)\s*[x×]\s+(?P<rest>.+?)"
+    rf"(?:\s*(?:@|at)\s*(?P<price>{_PRICE})\s*(?:each|ea\.?|/\s*ea(?:ch)?|per unit)?)?\s*$",
+    re.IGNORECASE,
+)
+# "Elite Laptop (Black) x 10", "Elite Laptop (Black) - qty 10"
+_TRAILING_QTY = re.compile(r"^(?P<name>.+?)(?:\s+[x×]|\s*[-–:,]?\s*\b(?:qty|quantity):?)\s*(?P<qty>\d+)\s*$", re.IGNORECASE)
+# "Qty 10: Elite Laptop (Black)"
+_QTY_LABEL = re.compile(r"^(?:qty|quantity)\s*:?\s*(?P<qty>\d+)\s*[:\-–]?\s*(?P<name>.+)$", re.IGNORECASE)
+# "10 Elite Laptop (Black)" (only trusted as a list item)
+_BARE_QTY = re.compile(r"^(?P<qty>\d+)\s+(?:(?:units?|pcs|pieces)\s+(?:of\s+)?)?(?P<name>[A-Za-z].+)$", re.IGNORECASE)
+# Lines that mention a quantity in prose: "Please add 3 ...", "we also need 2 of the ..."
+_PROSE_ORDER = re.compile(r"\b(?:add|need|order|send|want|like)\b[^.]*?\b\d+\b", re.IGNORECASE)
+# Wording that changes the order outside its item lines; "don't hesitate to call" is just a sign-off
+_ORDER_CHANGE = re.compile(
+    r"\b(?:cancel\w*|remov(?:e|ed|ing)|delet(?:e|ed|ing)|drop(?:ped)?|instead|chang(?:e|ed|ing)|"
+    r"replac(?:e|ed|ing)|substitut\w*|swap\w*|switch\w*|scratch|disregard|ignore|never\s?mind|no longer|"
+    r"hold off|skip|exclud\w*|except|minus|correct(?:ion|ed)|revis\w*|amend\w*|actually|"
+    r"make (?:that|it) \d+|(?:do|did|will|would)\s?n[o'’]?t\s+(?!hesitate)\w+)\b",
+    re.IGNORECASE,
+)
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-{2,}")
+_NAME_HEADERS = {"item", "items", "product", "products", "name", "description", "part"}
+_QTY_HEADERS = {"qty", "quantity", "qty.", "units", "count"}
+_PRICE_HEADERS = {"price", "unit price", "unit cost", "cost", "each"}
+
+
+def _clean_name(name: str) -> str:
+    return name.strip().strip("*_`").strip(" -–:,").strip()
+
+
+def _parse_price(text: Optional[str]) -> Optional[float]:
+    if not text:
+        return None
+    try:
+        return float(text.replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def _words(text: str) -> set:
+    return {word[:-1] if word.endswith("s") else word for word in re.findall(r"[a-z0-9]+", text.lower())}
+
+
+def _names_type(product: str, name: str) -> bool:
+    """Whether every word of the product type appears in the name (plurals aside)."""
+    return _words(product) <= _words(name)
+
+
+def _score(base: float, name: str, quantity: int) -> float:
+    """Adjust a pattern's base confidence for an implausible name or quantity."""
+    letters = sum(ch.isalpha() for ch in name)
+    if letters < 3 or len(name) > 120:
+        return 0.2
+    if not 1 <= quantity <= MAX_QUANTITY:
+        return 0.3
+    if len(name.split()) > 10:
+        base -= 0.2
+    return round(base, 2)
+
+
+def _line(source: str, pattern: str, name: str, quantity: str, base: float,
+          details: Optional[str] = None, price: Optional[str] = None) -> Dict[str, Any]:
+    name, qty = _clean_name(name), int(quantity)
+    item: Dict[str, Any] = {"name": name, "quantity": qty}
+    if details:
+        item["details"] = details
+    unit_price = _parse_price(price)
+    if unit_price is not None:
+        item["unit_price"] = unit_price
+    return {"item": item, "confidence": _score(base, name, qty), "pattern": pattern, "source": source}
+
+
+def parse_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse one non-table line into an order line.
+
+    Args:
+        line: A line of the email body.
+    Returns:
+        Optional[Dict[str, Any]]: {"item", "confidence", "pattern", "source"},
+            or None if the line doesn't look like an order line.
+    """
+    source = line.strip()
+    marker = _MARKER.match(source)
+    text = source[marker.end():] if marker else source
+    text = text.strip().rstrip("\\").strip()
+    if not text:
+        return None
+
+    match = _LEADING_QTY.match(text)
+    if match:
+        rest = match.group("rest").strip()
+        product, sep, name = rest.partition(" - ")
+        if not sep:
+            product, sep, name = rest.partition(" – ")
+        if sep and name.strip():
+            # "<product type> - <name as written>". A right side that repeats the type
+            # ("Laptop - Elite Laptop (Black)") is the catalog name; one that only
+            # describes the item ("Laptop Stand - Adjustable aluminum stand") can't
+            # be resolved without the type, so the whole line is the name
+            if not _names_type(product, name):
+                name = rest
+            base = 0.95 if match.group("price") else 0.9
+            return _line(source, "qty_x_product_name", name, match.group("qty"), base, _clean_name(product), match.group("price"))
+        return _line(source, "qty_x_name", rest, match.group("qty"), 0.9 if match.group("price") else 0.85, price=match.group("price"))
+
+    match = _QTY_LABEL.match(text)
+    if match:
+        return _line(source, "qty_label", match.group("name"), match.group("qty"), 0.9)
+
+    match = _TRAILING_QTY.match(text)
+    if match:
+        return _line(source, "name_x_qty", match.group("name"), match.group("qty"), 0.85 if marker else 0.7)
+
+    if marker:
+        match = _BARE_QTY.match(text)
+        if match:
+            return _line(source, "bare_qty", match.group("name"), match.group("qty"), 0.7)
+    return None
+
+
+def _cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _table_lines(rows: List[str]) -> List[Dict[str, Any]]:
+    """Parse the rows of one markdown table, using its header when there is one."""
+    parsed = []
+    name_col = qty_col = price_col = None
+    body = rows
+    if len(rows) > 1 and _TABLE_SEPARATOR.match(rows[1].strip()):
+        header = [cell.lower() for cell in _cells(rows[0])]
+        name_col = next((i for i, cell in enumerate(header) if cell in _NAME_HEADERS), None)
+        qty_col = next((i for i, cell in enumerate(header) if cell in _QTY_HEADERS), None)
+        price_col = next((i for i, cell in enumerate(header) if cell in _PRICE_HEADERS), None)
+        body = rows[2:]
+    for row in body:
+        cells = _cells(row)
+        if name_col is not None and qty_col is not None and max(name_col, qty_col) < len(cells):
+            qty = cells[qty_col].rstrip("xX× ")
+            if qty.isdigit():
+                price = cells[price_col] if price_col is not None and price_col < len(cells) else None
+                parsed.append(_line(row.strip(), "table", cells[name_col], qty, 0.9, price=price))
+                continue
+        else:
+            # No usable header: one integer cell is the quantity, the first wordy cell the name
+            numbers = [cell for cell in cells if cell.isdigit()]
+            names = [cell for cell in cells if sum(ch.isalpha() for ch in cell) >= 3]
+            if len(numbers) == 1 and names:
+                parsed.append(_line(row.strip(), "table_guess", names[0], numbers[0], 0.75))
+                continue
+        # A row we could not read still counts against the email's confidence
+        parsed.append({"item": None, "confidence": 0.0, "pattern": "table", "source": row.strip()})
+    return parsed
+
+
+def _words_a_change(line: Dict[str, Any]) -> bool:
+    """
+    Whether a candidate line says to change the order.
+
+    Only wording outside the item's name is considered, so a "Network
+    Switch" is not a switch, unless the name starts with it ("Remove: Pro Mouse").
+    """
+    text = line["source"]
+    item = line["item"] or {}
+    for part in (item.get("name"), item.get("details")):
+        if part:
+            match = _ORDER_CHANGE.search(part)
+            if match and not part[:match.start()].strip(" -–:*_`"):
+                return True
+            text = text.replace(part, " ")
+    return bool(_ORDER_CHANGE.search(text))
+
+
+def _looks_like_order_line(line: str) -> bool:
+    """Lines that probably carry an item, so failing to parse them must not drop it silently."""
+    text = line.strip()
+    if _MARKER.match(text) and re.search(r"\d", text):
+        return True
+    return bool(re.search(r"\b\d+\s*[x×]\s+\w|@\s*\$", text) or _PROSE_ORDER.search(text))
+
+
+def fast_extract(email: str, min_confidence: float = FAST_EXTRACT_MIN_CONFIDENCE) -> Dict[str, Any]:
+    """
+    Extract order items from an email without the LLM.
+
+    Args:
+        email: The email content (markdown).
+        min_confidence: Lowest per-line confidence the result may be used with.
+    Returns:
+        Dict[str, Any]: "items" in the shape OrchestratorAgent.extract_items
+            returns them (plus "unit_price" where the line has one), "lines" with the confidence and pattern of every
+            candidate line, "confidence" (the lowest line confidence),
+            "changes" with the lines that word a change to the order, and
+            "accepted", True when the items can be used as they are.
+            "reason" says why a result was not accepted.
+    """
+    lines: List[Dict[str, Any]] = []
+    table: List[str] = []
+    changes: List[str] = []
+
+    def flush_table() -> None:
+        if table:
+            lines.extend(_table_lines(table))
+            table.clear()
+
+    for raw in email.splitlines():
+        text = raw.strip()
+        # Headers, quoted replies and bold "**From:**" style fields are never order lines
+        if not text or text.startswith((">", "#", "**")):
+            flush_table()
+            continue
+        if text.startswith("|"):
+            table.append(text)
+            continue
+        flush_table()
+        parsed = parse_line(text)
+        if parsed is not None:
+            lines.append(parsed)
+        elif _looks_like_order_line(text):
+            lines.append({"item": None, "confidence": 0.0, "pattern": None, "source": text})
+        elif _ORDER_CHANGE.search(text):
+            changes.append(text)
+    flush_table()
+    changes += [line["source"] for line in lines if _words_a_change(line)]
+
+    items = [line["item"] for line in lines if line["item"] is not None]
+    confidence = min((line["confidence"] for line in lines), default=0.0)
+    if not items:
+        reason = "no structured order lines"
+    elif confidence < min_confidence:
+        reason = f"{sum(line['confidence'] < min_confidence for line in lines)} low-confidence line(s)"
+    elif changes:
+        reason = f"{len(changes)} line(s) that may change the order"
+    else:
+        reason = None
+    return {
+        "items": items, "lines": lines, "confidence": confidence, "changes": changes,
+        "accepted": reason is None, "reason": reason,
+    }
@@ -0,0 +1,142 @@
+"""
+Incremental parsing of a streamed item extraction.
+
+The extraction prompt asks for {"items": [{...}, {...}]}. ItemStreamParser
+reads that JSON as it streams in and hands back each item object as soon as
+its closing brace arrives, so cart work can start before the completion
+ends. Only whole objects are returned: a stream cut off mid-item never
+produces a partial item.
+
+remaining_items lines a complete extraction (e.g. a retry after a broken
+stream) up with what was already dispatched, by position, so only the
+remainder is dispatched.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ItemStreamParser:
+    """
+    Streaming parser for the items array of an extraction response.
+
+    Tracks JSON strings, escapes and nesting character by character; the text
+    seen so far is kept so the complete response can still be parsed as a
+    whole at the end.
+
+    Attributes:
+        items (list[dict]): Every item completed so far, in order.
+        complete (bool): Whether the items array has been closed.
+        errors (int): Item objects that closed but did not parse.
+    """
+
+    def __init__(self, key: str = "items"):
+        self.key = key
+        self.items: List[Dict[str, Any]] = []
+        self.complete = False
+        self.errors = 0
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        # Stack depth inside the items array, once it has opened
+        self._items_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next piece of the response.
+
+        Args:
+            chunk: Text as it arrived from the stream.
+        Returns:
+            list[dict]: Items completed by this chunk.
+        """
+        if not chunk:
+            return []
+        self._text += chunk
+        completed = []
+        text = self._text
+        for pos in range(self._pos, len(text)):
+            ch = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        # Keys of the root object; "items" must be the last string before its array
+                        try:
+                            self._last_string = json.loads(text[self._string_start:pos + 1])
+                        except json.JSONDecodeError:
+                            self._last_string = None
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch in "{[":
+                if ch == "[" and self._items_depth is None and (
+                    not self._stack or (self._stack == ["{"] and self._last_string == self.key)
+                ):
+                    self._items_depth = len(self._stack) + 1
+                elif ch == "{" and not self.complete and self._items_depth is not None and len(self._stack) == self._items_depth:
+                    self._item_start = pos
+                self._stack.append(ch)
+            elif ch in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                depth = len(self._stack)
+                if ch == "}" and self._item_start is not None and depth == self._items_depth:
+                    item = self._parse_item(text[self._item_start:pos + 1])
+                    self._item_start = None
+                    if item is not None:
+                        self.items.append(item)
+                        completed.append(item)
+                elif ch == "]" and not self.complete and self._items_depth is not None and depth == self._items_depth - 1:
+                    self.complete = True
+        self._pos = len(text)
+        return completed
+
+    def _parse_item(self, raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return None
+        if not isinstance(item, dict):
+            self.errors += 1
+            return None
+        return item
+
+
+def item_key(item: Dict[str, Any]) -> Tuple[str, Any]:
+    """Identity of an extracted line for reconciliation: normalized name and quantity."""
+    name = " ".join(str(item.get("name", "")).lower().split())
+    return name, item.get("quantity", 1)
+
+
+def remaining_items(dispatched: List[Dict[str, Any]], extracted: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Items of a complete extraction that come after the dispatched ones.
+
+    Extraction keeps the order of the email, so the first len(dispatched)
+    items of a retry are the ones already dispatched however the retry words
+    them; matching on content instead would dispatch a rephrased item twice.
+    """
+    return extracted[len(dispatched):]
+
+
+def prefix_mismatches(dispatched: List[Dict[str, Any]], extracted: List[Dict[str, Any]]) -> int:
+    """Dispatched items whose counterpart in a complete extraction differs by name or quantity, or is missing."""
+    mismatched = sum(item_key(sent) != item_key(item) for sent, item in zip(dispatched, extracted))
+    return mismatched + max(0, len(dispatched) - len(extracted))
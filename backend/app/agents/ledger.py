@@ -0,0 +1,152 @@
+"""
+Ledger of processed email files.
+
+Backed by a local SQLite database in WAL mode so that recording an email is a
+single-row upsert and "is this processed?" is a primary-key lookup. Several
+processes can share the same ledger file; SQLite serializes the writers and the
+busy timeout makes them wait instead of failing.
+"""
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+class EmailLedger:
+    """
+    Persistent record of which email files have been processed.
+
+    Attributes:
+        path (Path): Location of the SQLite database file.
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: float = 30.0):
+        """
+        Open (and create if needed) the ledger.
+
+        Args:
+            path: Location of the SQLite database file.
+            timeout: Seconds to wait on a lock held by another process.
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS processed_emails (
+                email_path TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                processed_at TEXT NOT NULL
+            )
+            """
+        )
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def mark(self, email_path: str, status: str = "completed") -> None:
+        """Record an email with the given status, replacing any earlier entry."""
+        processed_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO processed_emails (email_path, status, processed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(email_path) DO UPDATE SET status = excluded.status, "
+                "processed_at = excluded.processed_at",
+                (email_path, status, processed_at),
+            )
+
+    def get(self, email_path: str) -> Optional[Dict[str, str]]:
+        """Return the ledger entry for an email, or None if it was never processed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, processed_at FROM processed_emails WHERE email_path = ?",
+                (email_path,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "processed_at": row[1]}
+
+    def is_processed(self, email_path: str) -> bool:
+        """Check whether an email has an entry in the ledger."""
+        return self.get(email_path) is not None
+
+    def unprocessed(self, email_paths: Iterable[str]) -> List[str]:
+        """Filter a batch of paths down to the ones not yet in the ledger, preserving order."""
+        paths = list(email_paths)
+        seen = set()
+        with self._lock:
+            for start in range(0, len(paths), _LOOKUP_CHUNK):
+                chunk = paths[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT email_path FROM processed_emails WHERE email_path IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                seen.update(row[0] for row in rows)
+        return [p for p in paths if p not in seen]
+
+    def all(self) -> Dict[str, Dict[str, str]]:
+        """Return every entry, keyed by email path."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email_path, status, processed_at FROM processed_emails"
+            ).fetchall()
+        return {path: {"status": status, "processed_at": at} for path, status, at in rows}
+
+    def import_json(self, json_path: Union[str, Path]) -> int:
+        """
+        Import entries from the legacy processed_emails.json file.
+
+        Existing ledger entries win over the imported ones, so the import is safe
+        to repeat. The JSON file is renamed to ``<name>.migrated`` afterwards.
+
+        Args:
+            json_path: Path of the legacy JSON ledger.
+        Returns:
+            int: Number of entries read from the JSON file.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+        with open(json_path, "r") as f:
+            legacy = json.load(f)
+
+        rows = []
+        for email_path, entry in legacy.items():
+            if isinstance(entry, dict):
+                status = entry.get("status", "completed")
+                processed_at = entry.get("processed_at") or datetime.now(timezone.utc).isoformat()
+            else:
+                status, processed_at = str(entry), datetime.now(timezone.utc).isoformat()
+            rows.append((email_path, status, processed_at))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO processed_emails (email_path, status, processed_at) "
+                    "VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        json_path.rename(json_path.with_name(json_path.name + ".migrated"))
+        logger.info(f"Migrated {len(rows)} entries from {json_path} into {self.path}")
+        return len(rows)
@@ -0,0 +1,152 @@
+"""
+Timing spans and counters for the order workflow.
+
+OrchestratorAgent.stream records one WorkflowMetrics per email: a span per
+workflow stage, per MCP tool round trip and per LLM call, plus counters such
+as fallbacks taken. process_emails aggregates them into a per-run report.
+Inside a trace (app.monitoring.tracing) each span is also exported as a
+trace span.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.monitoring import tracing
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class WorkflowMetrics:
+    """
+    Spans and counters for one run of the order workflow.
+
+    Attributes:
+        spans (list[dict]): One record per span with name, kind ("stage",
+            "tool" or "llm"), start_s (offset from the start of the run) and
+            duration_s, plus any extra attributes.
+        counts (Counter): Named counters, e.g. llm_calls, tool_calls, fallbacks.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.counts: Counter = Counter()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "stage", **attrs) -> Iterator[Dict[str, Any]]:
+        """Time the enclosed block; yields the record so callers can add attributes."""
+        started = time.perf_counter()
+        record: Dict[str, Any] = {"name": name, "kind": kind, **attrs}
+        with tracing.span(name, kind=kind, attributes=record):
+            try:
+                yield record
+            except BaseException as e:
+                record["error"] = type(e).__name__
+                raise
+            finally:
+                record["start_s"] = round(started - self._origin, 6)
+                record["duration_s"] = round(time.perf_counter() - started, 6)
+                self.spans.append(record)
+                if kind == "tool":
+                    self.counts["tool_calls"] += 1
+                elif kind == "llm":
+                    self.counts["llm_calls"] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] += n
+
+    def fallback(self, name: str) -> None:
+        """Count a fallback path taken, in total and by name."""
+        self.counts["fallbacks"] += 1
+        self.counts[f"fallback.{name}"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Total seconds per stage, tool and LLM call, plus the counters."""
+        totals: Dict[str, Dict[str, Dict[str, float]]] = {"stage": {}, "tool": {}, "llm": {}}
+        for span in self.spans:
+            entry = totals.setdefault(span["kind"], {}).setdefault(span["name"], {"calls": 0, "total_s": 0.0})
+            entry["calls"] += 1
+            entry["total_s"] += span["duration_s"]
+        return {
+            "total_s": round(time.perf_counter() - self._origin, 6),
+            "stages": {name: round(t["total_s"], 6) for name, t in totals["stage"].items()},
+            "tools": {name: {"calls": t["calls"], "total_s": round(t["total_s"], 6)} for name, t in totals["tool"].items()},
+            "llm": {name: {"calls": t["calls"], "total_s": round(t["total_s"], 6)} for name, t in totals["llm"].items()},
+            "counts": dict(self.counts),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), "spans": list(self.spans)}
+
+
+def aggregate_metrics(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine per-email metrics (WorkflowMetrics.to_dict) into a run report.
+
+    Args:
+        runs: Metrics dicts, one per email.
+    Returns:
+        Dict[str, Any]: Per stage the mean, p50, p95 and share of workflow time;
+            per tool and LLM call the calls and seconds per email; per counter
+            the total and per-email mean; the share of emails the rule-based
+            extractor handled without the LLM and the extraction cache hit
+            rate (None if they never ran).
+    """
+    n = len(runs)
+    if not n:
+        return {"emails": 0, "stages": {}, "tools": {}, "llm": {}, "counts": {},
+                "fast_path_hit_rate": None, "extraction_cache_hit_rate": None}
+    workflow_total = sum(run.get("total_s", 0.0) for run in runs) or 1.0
+
+    stage_samples: Dict[str, List[float]] = {}
+    for run in runs:
+        for name, seconds in run.get("stages", {}).items():
+            stage_samples.setdefault(name, []).append(seconds)
+    stages = {}
+    for name, samples in stage_samples.items():
+        samples.sort()
+        total = sum(samples)
+        stages[name] = {
+            "mean_s": round(total / n, 4),
+            "p50_s": round(percentile(samples, 50), 4),
+            "p95_s": round(percentile(samples, 95), 4),
+            "share": round(total / workflow_total, 4),
+        }
+
+    def per_email(key: str) -> Dict[str, Dict[str, float]]:
+        combined: Dict[str, Dict[str, float]] = {}
+        for run in runs:
+            for name, t in run.get(key, {}).items():
+                entry = combined.setdefault(name, {"calls": 0, "total_s": 0.0})
+                entry["calls"] += t["calls"]
+                entry["total_s"] += t["total_s"]
+        return {
+            name: {"calls_per_email": round(t["calls"] / n, 3), "mean_s_per_email": round(t["total_s"] / n, 4)}
+            for name, t in combined.items()
+        }
+
+    counts: Counter = Counter()
+    for run in runs:
+        counts.update(run.get("counts", {}))
+
+    def hit_rate(prefix: str) -> Optional[float]:
+        lookups = counts[f"{prefix}.hit"] + counts[f"{prefix}.miss"]
+        return round(counts[f"{prefix}.hit"] / lookups, 3) if lookups else None
+
+    return {
+        "emails": n,
+        "workflow_mean_s": round(workflow_total / n, 4),
+        "stages": stages,
+        "tools": per_email("tools"),
+        "llm": per_email("llm"),
+        "counts": {name: {"total": total, "per_email": round(total / n, 3)} for name, total in sorted(counts.items())},
+        "fast_path_hit_rate": hit_rate("fast_path"),
+        "extraction_cache_hit_rate": hit_rate("extraction_cache"),
+    }
@@ -5,18 +5,23 @@ Agent workflow for processing test emails in .md format and placing orders.
 This script reads test email files in markdown format, parses their content,
 and uses the agent framework to process orders based on the email content.
 """
+import argparse
 import asyncio
 import json
 import logging
 import os
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 
-from openai import OpenAI
-
-from app.agents.MCP.client import MCPClient
+from app.agents.MCP.client import MCPClient, MCPClientPool
+from app.agents.LLM.calls import create_client
 from app.agents.OrchestratorAgent import OrchestratorAgent
+from app.agents.extraction_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_S, ExtractionCache
+from app.agents.ledger import EmailLedger
+from app.agents.metrics import aggregate_metrics, percentile
+from app.monitoring import tracing
 
 # Configure logging
 logging.basicConfig(
@@ -28,18 +33,36 @@ logger = logging.getLogger(__name__)
 # Default directories
 BASE_DIR = Path(__file__).parent.parent.parent.parent
 TEST_EMAILS_DIR = BASE_DIR / 'test_emails'
-PROCESSED_EMAILS_FILE = BASE_DIR / 'processed_emails.json'
+PROCESSED_EMAILS_FILE = BASE_DIR / 'processed_emails.json'  # legacy ledger, migrated on first use
+LEDGER_FILE = Path(os.environ.get('EMAIL_LEDGER_PATH', BASE_DIR / 'processed_emails.db'))
+# Cache of LLM extraction results; set EXTRACTION_CACHE_PATH to an empty string to disable
+EXTRACTION_CACHE_FILE = os.environ.get('EXTRACTION_CACHE_PATH', str(BASE_DIR / 'extraction_cache.db'))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.environ.get('EXTRACTION_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+EXTRACTION_CACHE_TTL_S = float(os.environ.get('EXTRACTION_CACHE_TTL_S', DEFAULT_TTL_S))
+
+# Batch mode defaults
+DEFAULT_CONCURRENCY = int(os.environ.get('EMAIL_CONCURRENCY', '8'))
+DEFAULT_MCP_POOL_SIZE = int(os.environ.get('MCP_POOL_SIZE', '4'))
 
 # System prompt for the agent
 SYSTEM_PROMPT = """You are an order processing assistant. Your task is to analyze emails and extract 
 order information to create purchase orders. Be precise with quantities, product names, and other details.
 When in doubt, ask for clarification."""
 
-async def initialize_agent_service() -> Tuple[OrchestratorAgent, MCPClient]:
-    """Initialize and return the OrchestratorAgent with MCP client integration."""
+async def initialize_agent_service(pool_size: int = 1) -> Tuple[OrchestratorAgent, MCPClient]:
+    """Initialize and return the OrchestratorAgent with MCP client integration.
+
+    Args:
+        pool_size: Number of MCP sessions to open. Values above 1 return an
+            MCPClientPool shared by every concurrent call on the agent.
+    """
     try:
         logger.info("Initializing MCP client...")
-        mcp_client = MCPClient()
+        if pool_size > 1:
+            logger.info(f"Using MCP session pool of size {pool_size}")
+            mcp_client = MCPClientPool(size=pool_size)
+        else:
+            mcp_client = MCPClient()
         await mcp_client.connect()
         
         logger.info("Getting tools from MCP...")
@@ -47,7 +70,7 @@ async def initialize_agent_service() -> Tuple[OrchestratorAgent, MCPClient]:
         logger.info(f"Loaded {len(tools)} tools from MCP")
         
         logger.info("Initializing OpenAI client...")
-        openai_client = OpenAI()
+        openai_client = create_client()
         
         # Initialize messages with system prompt
         messages = [{"role": "system", "content": SYSTEM_PROMPT}]
@@ -70,7 +93,8 @@ async def initialize_agent_service() -> Tuple[OrchestratorAgent, MCPClient]:
                 llm=openai_client,
                 messages=messages.copy(),
                 tools=agent_tools,
-                model_name="gpt-4.1-mini"
+                model_name="gpt-4.1-mini",
+                extraction_cache=get_extraction_cache(),
             )
             logger.info("Successfully initialized OrchestratorAgent")
             return agent, mcp_client
@@ -89,44 +113,88 @@ async def initialize_agent_service() -> Tuple[OrchestratorAgent, MCPClient]:
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise
 
-def load_processed_emails() -> Dict[str, str]:
-    """Load the set of already processed emails."""
-    if not PROCESSED_EMAILS_FILE.exists():
-        return {}
-    
+_ledger: Optional[EmailLedger] = None
+
+def get_ledger() -> EmailLedger:
+    """Open the processed-email ledger, importing the legacy JSON file on first use."""
+    global _ledger
+    if _ledger is None:
+        _ledger = EmailLedger(LEDGER_FILE)
+        if PROCESSED_EMAILS_FILE.exists():
+            try:
+                _ledger.import_json(PROCESSED_EMAILS_FILE)
+            except Exception as e:
+                logger.error(f"Error migrating {PROCESSED_EMAILS_FILE}: {str(e)}")
+    return _ledger
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Open the extraction cache, or return None if it is disabled or unusable."""
+    global _extraction_cache
+    if _extraction_cache is None and EXTRACTION_CACHE_FILE:
+        try:
+            _extraction_cache = ExtractionCache(
+                EXTRACTION_CACHE_FILE, max_entries=EXTRACTION_CACHE_MAX_ENTRIES, ttl_s=EXTRACTION_CACHE_TTL_S
+            )
+        except Exception as e:
+            logger.error(f"Error opening extraction cache {EXTRACTION_CACHE_FILE}: {str(e)}")
+    return _extraction_cache
+
+def load_processed_emails() -> Dict[str, Dict[str, str]]:
+    """Load every processed email entry keyed by path."""
     try:
-        with open(PROCESSED_EMAILS_FILE, 'r') as f:
-            return json.load(f)
+        return get_ledger().all()
     except Exception as e:
         logger.error(f"Error loading processed emails: {str(e)}")
         return {}
 
 def mark_email_processed(email_path: str, status: str = "completed") -> None:
-    """Mark an email as processed with the given status."""
-    processed = load_processed_emails()
-    processed[email_path] = {
-        "status": status,
-        "processed_at": datetime.now(timezone.utc).isoformat()
-    }
-    
+    """
+    Mark an email as processed with the given status.
+
+    This blocks on SQLite; coroutines call it through asyncio.to_thread so the
+    other batch workers keep running while the ledger waits on its lock.
+    """
     try:
-        with open(PROCESSED_EMAILS_FILE, 'w') as f:
-            json.dump(processed, f, indent=2)
+        get_ledger().mark(email_path, status)
     except Exception as e:
         logger.error(f"Error saving processed emails: {str(e)}")
 
 # Remove process_order_items and update process_email_file to use agent.stream
 
-async def process_email_file(agent: OrchestratorAgent, mcp_client: MCPClient, file_path: Path) -> bool:
+async def process_email_file(
+    agent: OrchestratorAgent,
+    mcp_client: MCPClient,
+    file_path: Path,
+    metrics_sink: Optional[List[Dict[str, Any]]] = None,
+) -> bool:
     """
     Process a single email file and place orders based on its content using the agentic workflow.
     Args:
         agent: Initialized OrchestratorAgent
         mcp_client: Initialized MCPClient
         file_path: Path to the email file to process
+        metrics_sink: If given, the workflow's timing metrics for this email are appended to it
     Returns:
         bool: True if processing was successful, False otherwise
     """
+    # One trace per email; MCP tool calls carry it to the server's spans
+    with tracing.trace("process_email", email=file_path.name) as root:
+        if root is not None:
+            logger.info(f"Trace {tracing.current_trace_id()} for {file_path.name}")
+        succeeded = await _process_email_file(agent, mcp_client, file_path, metrics_sink)
+        if root is not None:
+            root["succeeded"] = succeeded
+        return succeeded
+
+
+async def _process_email_file(
+    agent: OrchestratorAgent,
+    mcp_client: MCPClient,
+    file_path: Path,
+    metrics_sink: Optional[List[Dict[str, Any]]],
+) -> bool:
     try:
         logger.info(f"Starting to process email file: {file_path}")
         try:
@@ -135,7 +203,7 @@ async def process_email_file(agent: OrchestratorAgent, mcp_client: MCPClient, fi
             logger.info(f"Successfully read email content, length: {len(email_content)} characters")
         except Exception as e:
             logger.error(f"Failed to read email file {file_path}: {str(e)}", exc_info=True)
-            mark_email_processed(str(file_path), f"read_error: {str(e)}")
+            await asyncio.to_thread(mark_email_processed, str(file_path), f"read_error: {str(e)}")
             return False
         print(f"\n{'='*80}\nProcessing email: {file_path.name}\n{'='*80}")
         try:
@@ -148,55 +216,204 @@ async def process_email_file(agent: OrchestratorAgent, mcp_client: MCPClient, fi
                     result = chunk
                     logger.info("Agentic workflow complete.")
                     break
+            if result and result.get("metrics"):
+                metrics = result["metrics"]
+                logger.info(
+                    f"Timings for {file_path.name}: total={metrics['total_s']:.3f}s "
+                    f"stages={json.dumps(metrics['stages'])} counts={json.dumps(metrics['counts'])}"
+                )
+                if metrics_sink is not None:
+                    metrics_sink.append(metrics)
             if result and result.get("content") and "order" in result.get("content").lower():
-                mark_email_processed(str(file_path), "completed")
+                await asyncio.to_thread(mark_email_processed, str(file_path), "completed")
                 logger.info(f"Successfully processed email: {file_path.name}")
                 print(f"\n{'='*80}\nSuccessfully processed: {file_path.name}\n{'='*80}")
                 return True
             else:
                 logger.warning(f"Agentic workflow did not complete successfully for: {file_path.name}")
-                mark_email_processed(str(file_path), "agentic_incomplete")
+                await asyncio.to_thread(mark_email_processed, str(file_path), "agentic_incomplete")
                 return False
         except Exception as process_error:
             logger.error(f"Error in agentic email processing: {str(process_error)}", exc_info=True)
-            mark_email_processed(str(file_path), f"process_error: {str(process_error)}")
+            await asyncio.to_thread(mark_email_processed, str(file_path), f"process_error: {str(process_error)}")
             return False
     except Exception as e:
         logger.critical(f"Unexpected error in process_email_file: {str(e)}", exc_info=True)
-        mark_email_processed(str(file_path), f"unexpected_error: {str(e)}")
+        await asyncio.to_thread(mark_email_processed, str(file_path), f"unexpected_error: {str(e)}")
         return False
 
-async def process_emails(directory: Optional[Path] = None) -> None:
+def find_unprocessed_emails(directory: Path) -> List[Path]:
     """
-    Process .md files in the specified directory as test emails, one at a time.
-    
+    List .md files in the directory that have not been processed yet, oldest first.
+
     Args:
-        directory: Directory containing test email files. Defaults to TEST_EMAILS_DIR.
+        directory: Directory containing test email files.
+    Returns:
+        List[Path]: Unprocessed email files sorted by modification time.
     """
-    if directory is None:
-        directory = TEST_EMAILS_DIR
-    
     # Ensure the directory exists
     if not directory.exists() or not directory.is_dir():
         logger.error(f"Test emails directory not found: {directory}")
-        return
+        return []
     
     # Find all .md files in the directory
     email_files = list(directory.glob('*.md'))
     
     if not email_files:
         logger.warning(f"No .md files found in {directory}")
-        return
-    
-    # Load already processed emails
-    processed_emails = load_processed_emails()
+        return []
     
     # Filter out already processed emails and sort by modification time (oldest first)
-    unprocessed_emails = [
-        f for f in email_files 
-        if str(f) not in processed_emails
-    ]
+    try:
+        remaining = set(get_ledger().unprocessed(str(f) for f in email_files))
+    except Exception as e:
+        logger.error(f"Error reading processed emails ledger: {str(e)}")
+        return []
+    unprocessed_emails = [f for f in email_files if str(f) in remaining]
     unprocessed_emails.sort(key=lambda f: f.stat().st_mtime)
+    return unprocessed_emails
+
+def build_batch_report(
+    latencies: List[float],
+    succeeded: int,
+    elapsed: float,
+    email_metrics: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Summarize a batch run.
+    Args:
+        latencies: Per-email wall-clock latencies in seconds
+        succeeded: Number of emails processed successfully
+        elapsed: Total wall-clock time of the run in seconds
+        email_metrics: Per-email workflow metrics, aggregated under "workflow"
+    Returns:
+        Dict[str, Any]: Throughput and latency figures for the run
+    """
+    ordered = sorted(latencies)
+    report = {
+        "emails": len(ordered),
+        "succeeded": succeeded,
+        "failed": len(ordered) - succeeded,
+        "elapsed_s": round(elapsed, 3),
+        "emails_per_sec": round(len(ordered) / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_s": round(percentile(ordered, 50), 3),
+        "p95_s": round(percentile(ordered, 95), 3),
+        "p99_s": round(percentile(ordered, 99), 3),
+    }
+    if email_metrics is not None:
+        report["workflow"] = aggregate_metrics(email_metrics)
+    return report
+
+def format_workflow_report(workflow: Dict[str, Any]) -> str:
+    """Render the aggregated stage timings and counts as a small text table."""
+    lines = [f"Per-email workflow time: {workflow.get('workflow_mean_s', 0)}s mean"]
+    if workflow.get("fast_path_hit_rate") is not None:
+        lines.append(f"Fast-path extraction hit rate: {workflow['fast_path_hit_rate'] * 100:.1f}% (no LLM call)")
+    if workflow.get("extraction_cache_hit_rate") is not None:
+        lines.append(f"Extraction cache hit rate: {workflow['extraction_cache_hit_rate'] * 100:.1f}% of LLM extractions")
+    for name, stage in sorted(workflow.get("stages", {}).items(), key=lambda kv: -kv[1]["share"]):
+        lines.append(
+            f"  {name:<24} mean {stage['mean_s']:>8.3f}s  p95 {stage['p95_s']:>8.3f}s  {stage['share'] * 100:5.1f}%"
+        )
+    for name, count in workflow.get("counts", {}).items():
+        lines.append(f"  {name:<24} {count['per_email']:>8} per email ({count['total']} total)")
+    return "\n".join(lines)
+
+async def process_emails_batch(
+    directory: Optional[Path] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    pool_size: int = DEFAULT_MCP_POOL_SIZE,
+) -> Optional[Dict[str, Any]]:
+    """
+    Drain every unprocessed .md file in the directory in a single run.
+
+    A bounded pool of worker coroutines pulls emails from a queue and shares one
+    agent, one LLM client and one MCP session pool.
+
+    Args:
+        directory: Directory containing test email files. Defaults to TEST_EMAILS_DIR.
+        concurrency: Maximum number of emails in flight at once.
+        pool_size: Number of MCP sessions shared by the workers.
+    Returns:
+        Optional[Dict[str, Any]]: The run report, or None if nothing was processed.
+    """
+    if directory is None:
+        directory = TEST_EMAILS_DIR
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    unprocessed_emails = find_unprocessed_emails(directory)
+    if not unprocessed_emails:
+        logger.info("No unprocessed emails found.")
+        return None
+
+    logger.info(
+        f"Found {len(unprocessed_emails)} unprocessed email(s); "
+        f"processing with concurrency={concurrency}, mcp_pool_size={pool_size}."
+    )
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for email_file in unprocessed_emails:
+        queue.put_nowait(email_file)
+
+    latencies: List[float] = []
+    email_metrics: List[Dict[str, Any]] = []
+    succeeded = 0
+
+    try:
+        agent, mcp_client = await initialize_agent_service(pool_size=pool_size)
+
+        async def worker() -> None:
+            nonlocal succeeded
+            while True:
+                try:
+                    email_file = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                try:
+                    if await process_email_file(agent, mcp_client, email_file, email_metrics):
+                        succeeded += 1
+                finally:
+                    latencies.append(time.perf_counter() - started)
+                    queue.task_done()
+
+        run_started = time.perf_counter()
+        workers = min(concurrency, len(unprocessed_emails))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        report = build_batch_report(latencies, succeeded, time.perf_counter() - run_started, email_metrics)
+
+        logger.info(f"Batch report: {json.dumps(report)}")
+        print(
+            f"\n{'='*80}\n"
+            f"Processed {report['emails']} email(s) in {report['elapsed_s']}s "
+            f"({report['succeeded']} ok, {report['failed']} failed)\n"
+            f"Throughput: {report['emails_per_sec']} emails/sec\n"
+            f"Latency: p50={report['p50_s']}s p95={report['p95_s']}s p99={report['p99_s']}s\n"
+            f"{format_workflow_report(report['workflow'])}\n"
+            f"{'='*80}"
+        )
+        return report
+
+    except Exception as e:
+        logger.error(f"Error in batch email processing workflow: {str(e)}")
+        return None
+    finally:
+        # Clean up
+        if 'mcp_client' in locals():
+            await mcp_client.disconnect()
+
+async def process_emails(directory: Optional[Path] = None) -> None:
+    """
+    Process .md files in the specified directory as test emails, one at a time.
+    
+    Args:
+        directory: Directory containing test email files. Defaults to TEST_EMAILS_DIR.
+    """
+    if directory is None:
+        directory = TEST_EMAILS_DIR
+    
+    unprocessed_emails = find_unprocessed_emails(directory)
     
     if not unprocessed_emails:
         logger.info("No unprocessed emails found.")
@@ -227,9 +444,27 @@ async def process_emails(directory: Optional[Path] = None) -> None:
         if 'mcp_client' in locals():
             await mcp_client.disconnect()
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Process order emails with the agent workflow.")
+    parser.add_argument('--dir', type=Path, default=TEST_EMAILS_DIR,
+                        help="Directory containing .md email files")
+    parser.add_argument('--batch', action='store_true',
+                        help="Drain every unprocessed email instead of only the oldest one")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum emails in flight in batch mode")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_MCP_POOL_SIZE,
+                        help="Number of MCP sessions shared in batch mode")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    tracing.set_service("email-agent")
+
     # Create necessary directories if they don't exist
     TEST_EMAILS_DIR.mkdir(exist_ok=True, parents=True)
     
     # Run the async main function
-    asyncio.run(process_emails())
+    if args.batch:
+        asyncio.run(process_emails_batch(args.dir, args.concurrency, args.pool_size))
+    else:
+        asyncio.run(process_emails(args.dir))
@@ -1,6 +1,8 @@
 import os
 from dotenv import load_dotenv
 
+load_dotenv()
+
 def get_database_uri():
     # Load environment variables
     load_dotenv()
@@ -27,10 +29,23 @@ def get_database_uri():
     return db_url
 
 class Config:
-    SQLALCHEMY_DATABASE_URI = get_database_uri()
+    # DATABASE_URL overrides the POSTGRES_* settings, e.g. sqlite:///local.db for local runs
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or get_database_uri()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True,
         'pool_recycle': 300,
     }
+    # Inventory search backend: "trigram" (pg_trgm similarity ranking, falls back to
+    # "memory" without pg_trgm), "memory" (in-process trigram index) or "sql" (ILIKE + difflib)
+    INVENTORY_SEARCH_BACKEND = os.environ.get("INVENTORY_SEARCH_BACKEND", "trigram")
+    INVENTORY_SEARCH_LIMIT = int(os.environ.get("INVENTORY_SEARCH_LIMIT", "50"))
+    # Optional pub/sub URL (e.g. redis://localhost:6379/0) shared by every process
+    # that emits order events, so they reach SocketIO clients of the API server
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE") or None
+    # In-process metrics exposed at /metrics (Flask app and MCP server)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+    # Record every SQL statement per request / MCP tool call and flag N+1
+    # patterns; the slowest units are written to SQL_PROFILE_DIR. Not for production.
+    SQL_PROFILE = os.environ.get("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "super-secret-key")
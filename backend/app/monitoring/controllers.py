@@ -0,0 +1,8 @@
+from flask import Blueprint, Response
+from app.monitoring.registry import CONTENT_TYPE, registry
+
+monitoring = Blueprint('monitoring', __name__)
+
+@monitoring.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype=None, content_type=CONTENT_TYPE)
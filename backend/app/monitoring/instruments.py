@@ -0,0 +1,236 @@
+"""
+Metric definitions and the hooks that feed them.
+
+- Flask requests: install_flask(app) times every request by method, route
+  rule and status.
+- SQLAlchemy: instrument_engine(engine) counts and times queries through
+  cursor execute events, and counts pool checkouts and new connections and
+  times how long connections stay checked out through pool events.
+- MCP tools: @instrument_tool wraps a tool function and labels each call ok
+  or error from the payload it returns (see _payload_failed); it also profiles the
+  tool's SQL when SQL_PROFILE is on (profiler.py) and joins the caller's
+  trace when the request carries one (tracing.py).
+- LLM calls: record_llm_call is called by app.agents.LLM.calls.
+
+Set METRICS_ENABLED=false to skip installing the hooks.
+"""
+import functools
+import inspect
+import json
+import os
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import profiler, tracing
+from .registry import registry
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled by the Flask app.", ["method", "endpoint", "status"]
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Flask request latency in seconds.", ["method", "endpoint"]
+)
+TOOL_CALLS = registry.counter("mcp_tool_calls_total", "MCP tool calls by outcome.", ["tool", "outcome"])
+TOOL_LATENCY = registry.histogram("mcp_tool_duration_seconds", "MCP tool latency in seconds.", ["tool"])
+LLM_REQUESTS = registry.counter("llm_requests_total", "LLM API calls by outcome.", ["api", "model", "outcome"])
+LLM_LATENCY = registry.histogram("llm_request_duration_seconds", "LLM API call latency in seconds.", ["api", "model"])
+LLM_TOKENS = registry.counter("llm_tokens_total", "LLM tokens reported by the API.", ["model", "kind"])
+DB_QUERIES = registry.counter("db_queries_total", "SQL statements executed.", ["statement"])
+DB_ERRORS = registry.counter("db_query_errors_total", "SQL statements that raised.", ["statement"])
+DB_LATENCY = registry.histogram("db_query_duration_seconds", "SQL statement latency in seconds.", ["statement"])
+POOL_CHECKOUTS = registry.counter("db_pool_checkouts_total", "Connections checked out of the pool.")
+POOL_CONNECTS = registry.counter("db_pool_connects_total", "New database connections opened by the pool.")
+POOL_HELD = registry.histogram(
+    "db_pool_connection_held_seconds",
+    "Time a pooled database connection stays checked out.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+_STATEMENT_KINDS = {"select", "insert", "update", "delete", "with", "begin", "commit", "rollback", "create", "drop", "alter"}
+
+# Engines whose pools are reported by db_pool_connections
+_engines: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    kind = head[0].lower() if head else ""
+    return kind if kind in _STATEMENT_KINDS else "other"
+
+
+def _pool_connections() -> Dict[Tuple[str, ...], float]:
+    values: Dict[Tuple[str, ...], float] = {}
+    for engine in list(_engines):
+        pool = engine.pool
+        url = engine.url.render_as_string(hide_password=True)
+        if hasattr(pool, "checkedout"):
+            values[(url, "checked_out")] = pool.checkedout()
+        if hasattr(pool, "checkedin"):
+            values[(url, "idle")] = pool.checkedin()
+    return values
+
+
+registry.gauge_callback(
+    "db_pool_connections", "Pooled database connections by state.", ["engine", "state"], _pool_connections
+)
+
+
+def install_flask(app) -> None:
+    """Time every request handled by the app."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+            HTTP_REQUESTS.labels(request.method, endpoint, response.status_code).inc()
+            HTTP_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - started)
+        return response
+
+
+def instrument_engine(engine) -> None:
+    """Count and time the engine's queries and pooled connections. Safe to call more than once."""
+    from sqlalchemy import event
+
+    if engine in _engines:
+        return
+    _engines.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["_metrics_query_started"].pop()
+        kind = _statement_kind(statement)
+        DB_QUERIES.labels(kind).inc()
+        DB_LATENCY.labels(kind).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("_metrics_query_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+        DB_ERRORS.labels(_statement_kind(context.statement or "")).inc()
+
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc()
+        connection_record.info["_metrics_checked_out"] = time.perf_counter()
+
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("_metrics_checked_out", None)
+        if started is not None:
+            POOL_HELD.observe(time.perf_counter() - started)
+
+    def _connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc()
+
+    event.listen(engine, "checkout", _checkout)
+    event.listen(engine, "checkin", _checkin)
+    event.listen(engine, "connect", _connect)
+
+
+def _request_meta() -> Any:
+    """``_meta`` of the MCP request being handled, if any."""
+    try:
+        from mcp.server.lowlevel.server import request_ctx
+        return request_ctx.get().meta
+    except (ImportError, LookupError):
+        return None
+
+
+def _payload_failed(result: Any) -> bool:
+    """Whether a tool's JSON reply reports a failure.
+
+    Tools report failures in their payload rather than by raising: an "error"
+    key, "success": false, or a "msg" starting with "Error" / "Unknown error".
+    Lists fail if any entry does (find_inventory returns [{"error": ...}]).
+    """
+    if isinstance(result, (str, bytes)):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return False
+    if isinstance(result, list):
+        return any(_payload_failed(entry) for entry in result if isinstance(entry, dict))
+    if not isinstance(result, dict):
+        return False
+    msg = result.get("msg")
+    return (
+        bool(result.get("error"))
+        or result.get("success") is False
+        or (isinstance(msg, str) and msg.startswith(("Error", "Unknown error")))
+    )
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """Record latency and outcome of an MCP tool, keeping its signature for schema generation."""
+    if not (METRICS_ENABLED or profiler.PROFILE_ENABLED or tracing.TRACING_ENABLED):
+        return fn
+    name = fn.__name__
+    unit = f"tool:{name}"
+
+    def record(started: float, outcome: str) -> None:
+        if METRICS_ENABLED:
+            TOOL_CALLS.labels(name, outcome).inc()
+            TOOL_LATENCY.labels(name).observe(time.perf_counter() - started)
+
+    @contextmanager
+    def observed():
+        started = time.perf_counter()
+        token = profiler.start(unit) if profiler.PROFILE_ENABLED else None
+        reply = {}
+        try:
+            with tracing.continue_trace(_request_meta()), tracing.span(unit, kind="server"):
+                yield reply
+        except BaseException:
+            record(started, "error")
+            raise
+        finally:
+            if token is not None:
+                profiler.finish(token)
+        record(started, "error" if _payload_failed(reply.get("result")) else "ok")
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with observed() as reply:
+                reply["result"] = await fn(*args, **kwargs)
+                return reply["result"]
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with observed() as reply:
+            reply["result"] = fn(*args, **kwargs)
+            return reply["result"]
+    return wrapper
+
+
+def record_llm_call(api: str, model: Optional[str], seconds: float, response: Any = None, error: bool = False) -> None:
+    """Record one LLM API call and the token usage it reported, if any."""
+    if not METRICS_ENABLED:
+        return
+    model = model or "unknown"
+    LLM_REQUESTS.labels(api, model, "error" if error else "ok").inc()
+    LLM_LATENCY.labels(api, model).observe(seconds)
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    # chat.completions reports prompt/completion tokens, responses reports input/output tokens
+    prompt = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", None) or 0
+    completion = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", None) or 0
+    if prompt:
+        LLM_TOKENS.labels(model, "prompt").inc(prompt)
+    if completion:
+        LLM_TOKENS.labels(model, "completion").inc(completion)
@@ -0,0 +1,273 @@
+"""
+Opt-in SQL profiler and N+1 detector.
+
+With SQL_PROFILE=true every statement executed during an HTTP request or an
+MCP tool call is recorded against that unit of work. When the unit ends:
+
+- statements executed at least SQL_PROFILE_N1_THRESHOLD times with the same
+  SQL text are reported as suspected N+1 (a lazy load or a get() in a loop);
+  executions that also repeat the same parameters are reported as duplicates.
+- the unit is kept if it is among the SQL_PROFILE_TOP slowest seen so far,
+  with the query plan of its slowest SELECTs, and the ranking is rewritten to
+  SQL_PROFILE_DIR/sql_profile_<pid>.json (one file per process, since the API
+  and the MCP server profile separately).
+
+Not meant for production: every statement is timed and kept in memory until
+the unit ends, and slow units pay for EXPLAIN.
+"""
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+PROFILE_ENABLED = os.environ.get("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.environ.get("SQL_PROFILE_DIR", "sql_profiles")
+PROFILE_TOP = int(os.environ.get("SQL_PROFILE_TOP", "20"))
+N1_THRESHOLD = int(os.environ.get("SQL_PROFILE_N1_THRESHOLD", "3"))
+# Distinct statements per kept unit that get an EXPLAIN
+PLANS_PER_UNIT = 3
+
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN ", "mysql": "EXPLAIN "}
+
+# Engines already hooked by profile_engine
+_engines: "weakref.WeakSet" = weakref.WeakSet()
+
+_current: contextvars.ContextVar[Optional["QueryProfile"]] = contextvars.ContextVar("sql_profile", default=None)
+
+
+class QueryProfile:
+    """
+    Statements executed by one HTTP request or tool call, grouped by SQL text.
+
+    Attributes:
+        name (str): Unit of work, e.g. "GET /api/orders/<int:order_id>" or "tool:checkout_cart".
+        statements (dict): SQL text -> count, total_s, max_s, the parameters of
+            the slowest execution, and how often each parameter set repeated.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration_s = 0.0
+        self.statements: Dict[str, Dict[str, Any]] = {}
+        self.engine = None
+
+    def record(self, engine, statement: str, parameters: Any, seconds: float) -> None:
+        self.engine = self.engine or engine
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = {"count": 0, "total_s": 0.0, "max_s": 0.0, "params": None, "param_sets": {}}
+        entry["count"] += 1
+        entry["total_s"] += seconds
+        if seconds >= entry["max_s"]:
+            entry["max_s"] = seconds
+            entry["params"] = parameters
+        key = repr(parameters)
+        entry["param_sets"][key] = entry["param_sets"].get(key, 0) + 1
+
+    @property
+    def query_count(self) -> int:
+        return sum(entry["count"] for entry in self.statements.values())
+
+    def suspects(self) -> List[Dict[str, Any]]:
+        """Statements repeated often enough to look like N+1, most repeated first."""
+        found = []
+        for sql, entry in self.statements.items():
+            duplicates = sum(n - 1 for n in entry["param_sets"].values() if n > 1)
+            if entry["count"] >= N1_THRESHOLD or duplicates:
+                found.append({
+                    "sql": sql,
+                    "count": entry["count"],
+                    "distinct_params": len(entry["param_sets"]),
+                    "duplicates": duplicates,
+                    "total_s": round(entry["total_s"], 6),
+                })
+        return sorted(found, key=lambda s: s["count"], reverse=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        statements = sorted(self.statements.items(), key=lambda kv: kv[1]["total_s"], reverse=True)
+        return {
+            "name": self.name,
+            "duration_s": round(self.duration_s, 6),
+            "query_count": self.query_count,
+            "sql_s": round(sum(entry["total_s"] for _, entry in statements), 6),
+            "suspected_n_plus_one": self.suspects(),
+            "statements": [
+                {
+                    "sql": sql,
+                    "count": entry["count"],
+                    "total_s": round(entry["total_s"], 6),
+                    "max_s": round(entry["max_s"], 6),
+                    "plan": entry.get("plan"),
+                }
+                for sql, entry in statements
+            ],
+        }
+
+
+def _explain(engine, statement: str, parameters: Any) -> Optional[List[str]]:
+    prefix = _EXPLAIN_PREFIX.get(engine.dialect.name)
+    head = statement.lstrip().split(None, 1)
+    if prefix is None or not head or head[0].lower() not in ("select", "with"):
+        return None
+    token = _current.set(None)
+    try:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(prefix + statement, parameters or ()).fetchall()
+        return [" | ".join(str(col) for col in row) for row in rows]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        _current.reset(token)
+
+
+class ProfileStore:
+    """Keeps the slowest units seen by this process and writes them to disk."""
+
+    def __init__(self, top: int = PROFILE_TOP, directory: str = PROFILE_DIR):
+        self.top = top
+        self.path = os.path.join(directory, f"sql_profile_{os.getpid()}.json")
+        self._lock = threading.Lock()
+        # Min-heap on duration so the fastest kept unit is evicted first
+        self._slowest: List[tuple] = []
+        self._seq = itertools.count()
+        self.units = 0
+        self.n_plus_one: Dict[str, int] = {}
+
+    def _qualifies(self, duration: float) -> bool:
+        with self._lock:
+            return len(self._slowest) < self.top or duration > self._slowest[0][0]
+
+    def add(self, profile: QueryProfile) -> None:
+        suspects = profile.suspects()
+        with self._lock:
+            self.units += 1
+            for suspect in suspects:
+                key = f"{profile.name} :: {suspect['sql']}"
+                self.n_plus_one[key] = self.n_plus_one.get(key, 0) + 1
+        for suspect in suspects:
+            print(
+                f"[profiler] Suspected N+1 in {profile.name}: {suspect['count']} executions "
+                f"({suspect['duplicates']} duplicates) of {suspect['sql'][:120]}"
+            )
+        if not profile.statements or not self._qualifies(profile.duration_s):
+            return
+
+        # Plans only for units that make the ranking, outside the lock
+        if profile.engine is not None:
+            slowest = sorted(profile.statements.items(), key=lambda kv: kv[1]["max_s"], reverse=True)
+            for sql, entry in slowest[:PLANS_PER_UNIT]:
+                entry["plan"] = _explain(profile.engine, sql, entry["params"])
+        record = profile.to_dict()
+        record["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            item = (profile.duration_s, next(self._seq), record)
+            if len(self._slowest) < self.top:
+                heapq.heappush(self._slowest, item)
+            else:
+                heapq.heappushpop(self._slowest, item)
+            self._write()
+
+    def _write(self) -> None:
+        report = {
+            "pid": os.getpid(),
+            "units_profiled": self.units,
+            "n_plus_one": [
+                {"where": key, "units": n}
+                for key, n in sorted(self.n_plus_one.items(), key=lambda kv: kv[1], reverse=True)
+            ],
+            "slowest": [item[2] for item in sorted(self._slowest, reverse=True)],
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        os.replace(tmp, self.path)
+
+
+store = ProfileStore()
+
+
+def start(name: str) -> contextvars.Token:
+    """Begin profiling a unit of work in the current context."""
+    return _current.set(QueryProfile(name))
+
+
+def finish(token: contextvars.Token) -> Optional[QueryProfile]:
+    """End the unit started with token and hand it to the store."""
+    profile = _current.get()
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Finished from another context (e.g. a streamed response); just clear it
+        _current.set(None)
+    if profile is None:
+        return None
+    profile.duration_s = time.perf_counter() - profile.started
+    try:
+        store.add(profile)
+    except Exception as e:
+        print(f"[profiler] Error saving profile for {profile.name}: {e}")
+    return profile
+
+
+@contextmanager
+def profile(name: str) -> Iterator[None]:
+    """Profile the statements executed inside the block."""
+    token = start(name)
+    try:
+        yield
+    finally:
+        finish(token)
+
+
+def profile_engine(engine) -> None:
+    """Attribute the engine's statements to the current unit of work."""
+    from sqlalchemy import event
+
+    if engine in _engines:
+        return
+    _engines.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("_profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        current = _current.get()
+        stack = conn.info.get("_profile_started")
+        if current is None or not stack:
+            return
+        current.record(engine, statement, parameters, time.perf_counter() - stack.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("_profile_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+def install_flask(app) -> None:
+    """Profile every request handled by the app."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        g._sql_profile_token = start(request.method + " " + (request.url_rule.rule if request.url_rule else request.path))
+
+    # Teardown rather than after_request so streamed responses are covered to the end
+    @app.teardown_request
+    def _finish_profile(exc=None):
+        token = g.pop("_sql_profile_token", None)
+        if token is not None:
+            finish(token)
@@ -0,0 +1,354 @@
+"""
+Cross-process tracing for the email workflow.
+
+process_email_file starts one trace per email. Its id and the current span
+id travel with every MCP tool call in the request's ``_meta`` (see
+MCPClient.call_tool), so the MCP server's tool and database spans join the
+same trace. Each process appends finished spans to TRACE_FILE (JSONL, one
+span per line); start times are wall-clock so both processes line up.
+Finished spans are queued and a background thread appends them in batches,
+so recording a span never does file I/O on the caller's thread; spans
+beyond TRACE_QUEUE_SIZE waiting to be written are dropped.
+
+Tracing is off unless TRACE_FILE is set, e.g. TRACE_FILE=traces.jsonl for
+both the agent and the MCP server. Reconstruct one email as a waterfall with:
+
+    python -m app.monitoring.tracing <trace_id> [--file traces.jsonl]
+"""
+import argparse
+import atexit
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACE_FILE = os.environ.get("TRACE_FILE", "")
+TRACING_ENABLED = bool(TRACE_FILE)
+TRACE_QUEUE_SIZE = int(os.environ.get("TRACE_QUEUE_SIZE", "100000"))
+# Most spans appended per write
+_WRITE_BATCH = 1000
+# Keys used in MCP request _meta
+META_TRACE_ID = "trace_id"
+META_PARENT_ID = "parent_span_id"
+
+# Keys of a span record that are not free-form attributes
+_RESERVED = {"name", "kind", "start_s", "duration_s"}
+
+_service = os.environ.get("TRACE_SERVICE", "api")
+# (trace_id, span_id) of the innermost open span
+_current: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar("trace_context", default=None)
+# Finished spans (JSON lines) waiting for the writer thread
+_pending: "queue.Queue[str]" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+_dropped = 0
+# Engines already hooked by trace_engine
+_engines: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def set_service(name: str) -> None:
+    """Name this process in the spans it writes (e.g. "email-agent", "mcp-server")."""
+    global _service
+    _service = name
+
+
+def _new_id(nbytes: int) -> str:
+    return uuid.uuid4().hex[: nbytes * 2]
+
+
+def current_trace_id() -> Optional[str]:
+    context = _current.get()
+    return context[0] if context else None
+
+
+def propagation_meta() -> Optional[Dict[str, str]]:
+    """The ``_meta`` fields that continue the current trace in another process."""
+    context = _current.get()
+    if context is None:
+        return None
+    return {META_TRACE_ID: context[0], META_PARENT_ID: context[1]}
+
+
+def _export(record: Dict[str, Any]) -> None:
+    """Queue a finished span for the writer thread."""
+    global _dropped
+    if _writer is None:
+        _start_writer()
+    try:
+        _pending.put_nowait(json.dumps(record, default=str) + "\n")
+    except queue.Full:
+        _dropped += 1
+
+
+def _start_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="trace-writer", daemon=True)
+            _writer.start()
+            atexit.register(flush)
+
+
+def _write_loop() -> None:
+    while True:
+        lines = [_pending.get()]
+        _write(lines)
+
+
+def _write(lines: List[str]) -> None:
+    """Append lines plus whatever else is queued, a batch per write."""
+    while True:
+        while len(lines) < _WRITE_BATCH:
+            try:
+                lines.append(_pending.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            # One O_APPEND write per batch, so the two processes never interleave within a span
+            fd = os.open(TRACE_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, "".join(lines).encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"[tracing] Error writing {len(lines)} span(s): {e}")
+        try:
+            lines = [_pending.get_nowait()]
+        except queue.Empty:
+            return
+
+
+def flush() -> None:
+    """Write every queued span now (also runs at exit); reports spans dropped on a full queue."""
+    global _dropped
+    if not TRACING_ENABLED:
+        return
+    lines = []
+    while True:
+        try:
+            lines.append(_pending.get_nowait())
+        except queue.Empty:
+            break
+    if lines:
+        _write(lines)
+    if _dropped:
+        print(f"[tracing] Dropped {_dropped} span(s): more than TRACE_QUEUE_SIZE={TRACE_QUEUE_SIZE} waiting to be written")
+        _dropped = 0
+
+
+def _reset(token: contextvars.Token) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Closed from another context, e.g. an abandoned async generator being finalized
+        pass
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None, **attrs) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Record the enclosed block as a child of the current span.
+
+    A no-op outside a trace. Attributes may be added to the yielded dict (or
+    to ``attributes``, which is read when the span ends).
+
+    Args:
+        name: Span name, e.g. a workflow stage or tool name.
+        kind: "internal", "client", "server", "llm", "tool", "db", ...
+        attributes: Dict shared with the caller, e.g. a WorkflowMetrics span record.
+    """
+    context = _current.get()
+    if not TRACING_ENABLED or context is None:
+        yield attributes
+        return
+    trace_id, parent_id = context
+    span_id = _new_id(8)
+    attributes = attributes if attributes is not None else {}
+    attributes.update(attrs)
+    token = _current.set((trace_id, span_id))
+    start_wall, started = time.time(), time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        _reset(token)
+        record = {
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "kind": kind,
+            "service": _service,
+            "pid": os.getpid(),
+            "start": round(start_wall, 6),
+            "duration_s": round(duration, 6),
+            "attrs": {k: v for k, v in attributes.items() if k not in _RESERVED},
+        }
+        if error:
+            record["error"] = error
+        _export(record)
+
+
+@contextmanager
+def trace(name: str, trace_id: Optional[str] = None, **attrs) -> Iterator[Optional[Dict[str, Any]]]:
+    """Start a new trace whose root span covers the block."""
+    if not TRACING_ENABLED:
+        yield None
+        return
+    token = _current.set((trace_id or _new_id(16), None))
+    try:
+        with span(name, kind="root", **attrs) as record:
+            yield record
+    finally:
+        _reset(token)
+
+
+@contextmanager
+def continue_trace(meta: Any) -> Iterator[None]:
+    """Adopt the trace carried in an incoming request's ``_meta``, if any."""
+    trace_id = _meta_value(meta, META_TRACE_ID)
+    if not TRACING_ENABLED or not trace_id:
+        yield
+        return
+    token = _current.set((trace_id, _meta_value(meta, META_PARENT_ID)))
+    try:
+        yield
+    finally:
+        _reset(token)
+
+
+def _meta_value(meta: Any, key: str) -> Optional[str]:
+    if meta is None:
+        return None
+    if isinstance(meta, dict):
+        return meta.get(key)
+    # mcp RequestParams.Meta keeps unknown fields as extras
+    value = getattr(meta, key, None)
+    if value is None and getattr(meta, "model_extra", None):
+        value = meta.model_extra.get(key)
+    return value
+
+
+def trace_engine(engine) -> None:
+    """Record each SQL statement executed inside a trace as a "db" span."""
+    from sqlalchemy import event
+
+    if engine in _engines:
+        return
+    _engines.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("_trace_spans", []).append(_open_db_span(statement))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_trace_spans")
+        if stack:
+            _close_db_span(stack.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("_trace_spans") if context.connection is not None else None
+        if stack:
+            _close_db_span(stack.pop(), error=type(context.original_exception).__name__)
+
+
+def _open_db_span(statement: str) -> Dict[str, Any]:
+    trace_id, parent_id = _current.get()
+    return {
+        "trace_id": trace_id,
+        "span_id": _new_id(8),
+        "parent_id": parent_id,
+        "statement": statement,
+        "start": time.time(),
+        "started": time.perf_counter(),
+    }
+
+
+def _close_db_span(opened: Dict[str, Any], error: Optional[str] = None) -> None:
+    statement = opened["statement"]
+    record = {
+        "trace_id": opened["trace_id"],
+        "span_id": opened["span_id"],
+        "parent_id": opened["parent_id"],
+        "name": statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL",
+        "kind": "db",
+        "service": _service,
+        "pid": os.getpid(),
+        "start": round(opened["start"], 6),
+        "duration_s": round(time.perf_counter() - opened["started"], 6),
+        "attrs": {"statement": statement[:500]},
+    }
+    if error:
+        record["error"] = error
+    _export(record)
+
+
+def load_trace(trace_id: str, path: str = TRACE_FILE or "traces.jsonl") -> List[Dict[str, Any]]:
+    """Every span of one trace from a JSONL trace file, ordered by start time."""
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if trace_id not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("trace_id") == trace_id:
+                spans.append(record)
+    return sorted(spans, key=lambda s: s["start"])
+
+
+def format_waterfall(spans: List[Dict[str, Any]], width: int = 50) -> str:
+    """Render spans as an indented tree with a timeline bar per span."""
+    if not spans:
+        return "No spans found."
+    origin = min(s["start"] for s in spans)
+    total = max(s["start"] + s["duration_s"] for s in spans) - origin or 1e-9
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    ids = {s["span_id"] for s in spans}
+    for s in spans:
+        # Orphans (parent in a file we don't have) hang off the top level
+        parent = s["parent_id"] if s["parent_id"] in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = [f"trace {spans[0]['trace_id']}  {total * 1000:.1f} ms  {len(spans)} spans"]
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for s in children.get(parent, []):
+            offset = s["start"] - origin
+            begin = int(offset / total * width)
+            length = max(1, int(s["duration_s"] / total * width))
+            bar = " " * begin + "#" * min(length, width - begin)
+            label = f"{'  ' * depth}{s['name']} [{s['service']}/{s['kind']}]"
+            flag = f" !{s['error']}" if s.get("error") else ""
+            lines.append(f"{label[:48]:<48} {offset * 1000:9.1f} {s['duration_s'] * 1000:9.1f} ms |{bar:<{width}}|{flag}")
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print one trace as a waterfall.")
+    parser.add_argument("trace_id")
+    parser.add_argument("--file", default=TRACE_FILE or "traces.jsonl")
+    args = parser.parse_args()
+    print(format_waterfall(load_trace(args.trace_id, args.file)))
+
+
+if __name__ == "__main__":
+    main()
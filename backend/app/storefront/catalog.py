@@ -0,0 +1,160 @@
+"""
+Catalog templates and synthetic catalog generation.
+
+The product categories, brands and colors the seed script builds the demo
+catalog from, plus a generator that expands the same templates into any
+number of distinct variant SKUs (brand x product x series x color) for load
+and search benchmarks. Both are deterministic for a given seed.
+"""
+import random
+from decimal import Decimal
+from typing import Dict, Iterator, List, Tuple
+
+# Category -> (name, description, cost, list price, quantity)
+CATEGORIES: Dict[str, List[Tuple[str, str, float, float, int]]] = {
+    'Electronics': [
+        ('Laptop', 'High-performance business laptop', 800.00, 1299.99, 25),
+        ('Smartphone', 'Latest model smartphone', 700.00, 999.99, 30),
+        ('Tablet', '10-inch touchscreen tablet', 250.00, 399.99, 40),
+        ('Monitor', '27-inch 4K monitor', 350.00, 599.99, 20),
+        ('Keyboard', 'Mechanical gaming keyboard', 60.00, 129.99, 50),
+        ('Mouse', 'Wireless ergonomic mouse', 25.00, 49.99, 75),
+        ('Headphones', 'Wireless noise-cancelling', 120.00, 249.99, 60),
+        ('Smartwatch', 'Fitness tracking smartwatch', 150.00, 299.99, 45),
+        ('Router', 'Wi-Fi 6 router', 120.00, 229.99, 30),
+        ('External SSD', '1TB portable SSD', 80.00, 149.99, 50),
+    ],
+    'Office Supplies': [
+        ('Desk Chair', 'Ergonomic office chair', 120.00, 249.99, 15),
+        ('Standing Desk', 'Electric height-adjustable desk', 350.00, 599.99, 10),
+        ('File Cabinet', '2-drawer letter size', 90.00, 179.99, 20),
+        ('Desk Lamp', 'LED adjustable desk lamp', 25.00, 49.99, 40),
+        ('Whiteboard', '4x6 feet magnetic whiteboard', 70.00, 129.99, 15),
+        ('Stapler', 'Heavy-duty stapler', 8.00, 19.99, 100),
+        ('Paper Shredder', '12-sheet cross-cut', 60.00, 119.99, 25),
+        ('Desk Organizer', 'Multi-compartment organizer', 15.00, 29.99, 60),
+        ('Printer Paper', 'Letter size, 10-ream case', 30.00, 59.99, 30),
+        ('Ink Cartridge', 'Compatible black ink', 15.00, 34.99, 80),
+    ],
+    'Networking': [
+        ('Network Switch', '24-port gigabit switch', 200.00, 399.99, 12),
+        ('Wireless AP', 'Ceiling mount access point', 150.00, 299.99, 18),
+        ('Patch Panel', '48-port cat6 patch panel', 80.00, 149.99, 25),
+        ('Network Rack', '12U wall-mount rack', 150.00, 279.99, 8),
+        ('Ethernet Cable', 'Cat6, 25ft', 5.00, 12.99, 200),
+        ('Fiber Optic Cable', 'Single-mode, 10m', 25.00, 49.99, 40),
+        ('Patch Cable', 'Cat6, 3ft, 5-pack', 12.00, 24.99, 60),
+        ('Network Tool Kit', 'Basic networking tools', 50.00, 99.99, 15),
+        ('Cable Tester', 'Network cable tester', 30.00, 59.99, 25),
+        ('Rack Shelf', '1U universal shelf', 25.00, 49.99, 30),
+    ],
+    'Security': [
+        ('Surveillance Camera', '4K IP camera', 120.00, 229.99, 20),
+        ('NVR System', '8-channel NVR with 4TB', 400.00, 749.99, 8),
+        ('Biometric Scanner', 'Fingerprint access control', 200.00, 399.99, 12),
+        ('Security DVR', '16-channel 1080p DVR', 250.00, 449.99, 10),
+        ('Motion Sensor', 'Wireless motion detector', 30.00, 59.99, 40),
+        ('Door Access Kit', 'Keycard entry system', 150.00, 279.99, 15),
+        ('Security Signage', '4-pack warning signs', 15.00, 29.99, 30),
+        ('Security Camera Mount', 'Outdoor junction box', 20.00, 39.99, 35),
+        ('CCTV Power Supply', '8-port power box', 35.00, 69.99, 25),
+        ('BNC Connector', 'Pack of 10', 8.00, 19.99, 50),
+    ],
+    'Audio/Video': [
+        ('Conference Phone', 'Full-duplex speakerphone', 250.00, 449.99, 15),
+        ('PTZ Camera', 'Conference camera', 300.00, 549.99, 10),
+        ('Audio Mixer', '8-channel audio mixer', 200.00, 379.99, 8),
+        ('Wireless Mic', 'UHF wireless microphone', 150.00, 279.99, 12),
+        ('Ceiling Speaker', '70V ceiling speaker', 80.00, 149.99, 25),
+        ('HDMI Switcher', '4x1 HDMI switcher', 40.00, 79.99, 30),
+        ('Projector Screen', '120" motorized screen', 200.00, 379.99, 8),
+        ('Audio Cable', 'XLR cable, 25ft', 15.00, 29.99, 50),
+        ('Speaker Stand', 'Adjustable speaker stand', 35.00, 69.99, 20),
+        ('Tabletop Mic Stand', 'Adjustable boom arm', 20.00, 39.99, 35),
+    ],
+}
+
+ADDITIONAL_ITEMS: List[Tuple[str, str, float, float, int]] = [
+    ('USB Hub', '4-port USB 3.0 hub', 8.00, 19.99, 100),
+    ('Laptop Stand', 'Adjustable aluminum stand', 15.00, 34.99, 60),
+    ('Webcam Cover', 'Sliding privacy cover', 2.00, 7.99, 200),
+    ('Cable Ties', '100-pack assorted colors', 3.00, 9.99, 150),
+    ('Screen Cleaner Kit', 'Includes microfiber cloth', 5.00, 14.99, 120),
+    ('Laptop Lock', 'Kensington-style lock', 10.00, 24.99, 80),
+    ('Monitor Stand', 'Ergonomic riser stand', 25.00, 49.99, 40),
+    ('USB-C Adapter', 'Multi-port adapter', 20.00, 44.99, 75),
+    ('Wireless Charger', 'Qi-certified charger', 25.00, 54.99, 60),
+    ('Laptop Sleeve', 'Neoprene 15" sleeve', 10.00, 24.99, 90),
+]
+
+BRANDS = ['Pro', 'Elite', 'Business', 'Enterprise', 'Premium', 'Advanced', 'Ultra', 'Max', 'Plus', 'Turbo']
+COLORS = ['Black', 'White', 'Silver', 'Gray', 'Blue', 'Red']
+# Model lines that multiply the variants of each brand/product/color
+SERIES = ['', 'Mini', 'Lite', 'Air', 'X', 'S', 'Neo', 'Go', 'Edge', 'One']
+
+
+def _stock_row(name: str, description: str, cost: float, price: float, qty: int, rng: random.Random,
+               price_high: float = 1.2, qty_low: float = 0.8, qty_high: float = 1.2) -> dict:
+    """A stock_items row with some random variation on the template figures."""
+    return {
+        "name": name,
+        "description": description,
+        "cost": round(Decimal(cost * rng.uniform(0.9, 1.1)), 2),
+        "list_price": round(Decimal(price * rng.uniform(0.9, price_high)), 2),
+        "quantity": max(1, int(qty * rng.uniform(qty_low, qty_high))),
+    }
+
+
+def template_catalog(seed: int = 42) -> List[dict]:
+    """
+    The demo catalog: two brands x two colors of every category product, plus
+    two colors of each additional item (about 220 SKUs).
+    """
+    rng = random.Random(seed)
+    rows = []
+    for products in CATEGORIES.values():
+        for name, desc, cost, price, qty in products:
+            for brand in rng.sample(BRANDS, 2):
+                for color in rng.sample(COLORS, 2):
+                    rows.append(_stock_row(
+                        f"{brand} {name} ({color})", f"{desc} - {color} {brand} edition",
+                        cost, price, qty, rng, qty_high=1.5,
+                    ))
+    for name, desc, cost, price, qty in ADDITIONAL_ITEMS:
+        for color in rng.sample(COLORS, 2):
+            rows.append(_stock_row(
+                f"{rng.choice(BRANDS)} {name} ({color})", f"{desc} - {color} color", cost, price, qty, rng,
+            ))
+    return rows
+
+
+def variant_catalog(skus: int, seed: int = 42) -> Iterator[dict]:
+    """
+    Yield skus distinct variant SKUs expanded from the templates.
+
+    Names follow the demo catalog ("Elite Laptop Air (Black)"); past the
+    brand x product x series x color combinations (36,000) a generation
+    number keeps them unique ("Elite Laptop Air G2 (Black)"). Rows are
+    generated lazily so a million SKUs never sit in memory at once.
+
+    Args:
+        skus: Number of rows to yield.
+        seed: Random seed for the order of combinations and the prices.
+    """
+    rng = random.Random(seed)
+    products = [p for ps in CATEGORIES.values() for p in ps] + ADDITIONAL_ITEMS
+    combos = len(products) * len(BRANDS) * len(SERIES) * len(COLORS)
+    # A fixed permutation so the first N SKUs are spread across every product
+    order = list(range(combos))
+    rng.shuffle(order)
+    for i in range(skus):
+        generation, slot = divmod(i, combos)
+        index = order[slot]
+        index, color_i = divmod(index, len(COLORS))
+        index, series_i = divmod(index, len(SERIES))
+        product_i, brand_i = divmod(index, len(BRANDS))
+        name, desc, cost, price, qty = products[product_i]
+        brand, series, color = BRANDS[brand_i], SERIES[series_i], COLORS[color_i]
+        model = " ".join(part for part in (brand, name, series, f"G{generation + 1}" if generation else "") if part)
+        yield _stock_row(f"{model} ({color})", f"{desc} - {color} {brand} {series or 'standard'} edition",
+                         cost, price, qty, rng)
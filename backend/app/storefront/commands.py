@@ -0,0 +1,19 @@
+import click
+from flask.cli import with_appcontext
+
+from app.storefront.services.order import OrderService
+
+
+@click.command("reconcile-totals")
+@click.option("--dry-run", is_flag=True, help="Report mismatched totals without fixing them.")
+@with_appcontext
+def reconcile_totals_command(dry_run):
+    """Check order totals against their lines and repair any drift.
+
+    Cart writes adjust totals by delta, so run this periodically (e.g. from cron).
+    """
+    mismatched = OrderService.reconcile_order_totals(fix=not dry_run)
+    for row in mismatched:
+        click.echo(f"Order {row['order_id']}: stored {row['stored']:.2f}, expected {row['expected']:.2f}")
+    action = "found" if dry_run else "fixed"
+    click.echo(f"{len(mismatched)} mismatched order total(s) {action}")
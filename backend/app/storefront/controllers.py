@@ -1,23 +1,138 @@
-from flask import Blueprint, jsonify, request
+import csv
+import hashlib
+import io
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from app.storefront.services.order import OrderService
 
 orders = Blueprint('orders', __name__)
 
+MAX_PAGE_SIZE = 500
+# Bytes of export output gathered before each write to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_CSV_COLUMNS = [
+    "order_id", "po_number", "status", "user_id", "total_amount", "created_at", "updated_at",
+    "line_id", "stock_item_id", "name", "quantity", "unit_price",
+]
+
+
+def _etag(versions) -> str:
+    """Validator for a set of orders, derived from their ids and versions (OrderService.version_key)."""
+    raw = "|".join(f"{v.id}:{v.updated_at}:{v.items_updated_at}" for v in versions)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _last_modified(version):
+    """Latest change to an order or to the stock items its summary shows."""
+    return max(filter(None, (version.updated_at, version.items_updated_at)), default=None)
+
+
+def _not_modified(etag, last_modified=None) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def _with_validators(response, etag, last_modified=None):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Let clients keep the body but revalidate on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 @orders.route('/api/orders', methods=['GET'])
 def get_orders():
     status = request.args.get('status')
     user_id = request.args.get('user_id', type=int)
-    orders = OrderService.list_orders(user_id=user_id, status=status)
-    result = []
-    for order in orders:
-        summary = OrderService.get_order_summary(order.id)
-        result.append(summary)
-    return jsonify(result)
+    limit = max(1, min(request.args.get('limit', 100, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    try:
+        versions = OrderService.list_order_versions(
+            user_id=user_id, status=status, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Unchanged pages cost only the versions query
+    etag = _etag(versions)
+    if _not_modified(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(OrderService.summaries_for_versions(versions))
+    # The body stays a plain list; the next page is advertised in a header
+    next_cursor = OrderService.next_cursor(versions, limit)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return _with_validators(response, etag)
 
 @orders.route('/api/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
-    try:
-        summary = OrderService.get_order_summary(order_id)
-        return jsonify(summary)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 404 
+    version = OrderService.get_order_version(order_id)
+    if version is None:
+        return jsonify({'error': 'Order not found'}), 404
+
+    etag = _etag([version])
+    last_modified = _last_modified(version)
+    if _not_modified(etag, last_modified):
+        return _with_validators(Response(status=304), etag, last_modified)
+    summaries = OrderService.summaries_for_versions([version])
+    if not summaries:
+        return jsonify({'error': 'Order not found'}), 404
+    return _with_validators(jsonify(summaries[0]), etag, last_modified)
+
+
+def _chunked(pieces, size=EXPORT_CHUNK_SIZE):
+    """Join small strings into chunks of roughly size bytes."""
+    buffer, buffered = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _ndjson_lines(user_id, status):
+    for order in OrderService.iter_export_orders(user_id=user_id, status=status):
+        yield json.dumps(order) + "\n"
+
+
+def _csv_lines(user_id, status):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    for row in OrderService.iter_export_lines(user_id=user_id, status=status):
+        writer.writerow([
+            "" if value is None else value.isoformat() if hasattr(value, "isoformat") else value
+            for value in row
+        ])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue()
+
+
+@orders.route('/api/orders/export', methods=['GET'])
+def export_orders():
+    """Stream every matching order as NDJSON (one order per line) or CSV (one row per order line)."""
+    export_format = request.args.get('format', 'ndjson')
+    status = request.args.get('status')
+    user_id = request.args.get('user_id', type=int)
+    if export_format == 'ndjson':
+        lines, mimetype = _ndjson_lines(user_id, status), 'application/x-ndjson'
+    elif export_format == 'csv':
+        lines, mimetype = _csv_lines(user_id, status), 'text/csv'
+    else:
+        return jsonify({'error': f"Unsupported format: {export_format}"}), 400
+
+    # No Content-Length, so the body goes out with chunked transfer encoding
+    response = Response(stream_with_context(_chunked(lines)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=orders.{export_format}'
+    return response
@@ -0,0 +1,137 @@
+"""
+SocketIO push events for orders.
+
+Clients join a room per order (``order:<id>``) or the ``orders`` room for
+every order, and receive:
+
+- ``order_updated``: an order changed; payload has the order_id and a count
+  per action (e.g. ``{"item_added": 5}``). Changes are coalesced over a short
+  window so a burst of cart adds becomes one event. Clients refetch the
+  order (cheap with its ETag) instead of polling.
+- ``order_progress``: an OrchestratorAgent progress chunk for the order,
+  sent as soon as it is produced.
+
+Orders are written by the MCP server and the email agent, which run in their
+own processes. Set SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) so
+their events reach clients connected to the API server; without it, only
+events raised in the API process itself are delivered.
+"""
+import atexit
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from flask_socketio import SocketIO, join_room, leave_room
+
+from app.extensions import socketio
+
+ORDERS_ROOM = "orders"
+ORDER_EVENT_COALESCE_SECONDS = float(os.environ.get("ORDER_EVENT_COALESCE_MS", "200")) / 1000.0
+
+
+def order_room(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+_external_emitter: Optional[SocketIO] = None
+
+
+def _get_emitter() -> Optional[SocketIO]:
+    """The app's SocketIO if initialized here, else a write-only one on the message queue."""
+    global _external_emitter
+    if socketio.server is not None:
+        return socketio
+    url = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+    if not url:
+        # No server in this process and no queue to reach one; nothing to deliver to
+        return None
+    if _external_emitter is None:
+        _external_emitter = SocketIO(message_queue=url)
+    return _external_emitter
+
+
+def _emit(event: str, payload: Dict[str, Any], order_id: int) -> None:
+    emitter = _get_emitter()
+    if emitter is None:
+        return
+    try:
+        # One emit to both rooms so clients in both get the event once
+        emitter.emit(event, payload, to=[order_room(order_id), ORDERS_ROOM])
+    except Exception as e:
+        print(f"[events] Error emitting {event} for order {order_id}: {e}")
+
+
+class OrderEventPublisher:
+    """
+    Coalesces order change notifications and emits them as SocketIO events.
+
+    The first change after a quiet period starts a timer; every change to the
+    same order until it fires is folded into one ``order_updated`` event.
+
+    Attributes:
+        window (float): Coalescing window in seconds; 0 emits immediately.
+    """
+
+    def __init__(self, window: float = ORDER_EVENT_COALESCE_SECONDS):
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Counter] = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def order_changed(self, order_id: int, action: str) -> None:
+        """Record a change to an order, to be published after the window."""
+        with self._lock:
+            self._pending.setdefault(order_id, Counter())[action] += 1
+            if self.window > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Emit every pending change now."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        for order_id, actions in pending.items():
+            _emit("order_updated", {"order_id": order_id, "actions": dict(actions)}, order_id)
+
+    def progress(self, order_id: int, chunk: Dict[str, Any]) -> None:
+        """Emit an agent progress chunk for an order right away."""
+        _emit(
+            "order_progress",
+            {
+                "order_id": order_id,
+                "content": chunk.get("content", ""),
+                "is_task_complete": chunk.get("is_task_complete", False),
+            },
+            order_id,
+        )
+
+
+publisher = OrderEventPublisher()
+# Don't drop changes still waiting in the window when the process exits
+atexit.register(publisher.flush)
+
+
+def register_socket_handlers(socketio) -> None:
+    """Let clients subscribe to one order or to all of them."""
+
+    @socketio.on("join_order")
+    def join_order(data):
+        join_room(order_room(int(data["order_id"])))
+
+    @socketio.on("leave_order")
+    def leave_order(data):
+        leave_room(order_room(int(data["order_id"])))
+
+    @socketio.on("join_orders")
+    def join_orders(data=None):
+        join_room(ORDERS_ROOM)
+
+    @socketio.on("leave_orders")
+    def leave_orders(data=None):
+        leave_room(ORDERS_ROOM)
@@ -5,6 +5,18 @@ from app.database import db
 
 class StockItem(db.Model):
     __tablename__ = "stock_items"
+    # Trigram indexes back similarity search on Postgres (pg_trgm); other
+    # databases ignore the postgresql_* options and build plain indexes
+    __table_args__ = (
+        db.Index(
+            "ix_stock_items_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "ix_stock_items_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
@@ -20,8 +32,14 @@ class StockItem(db.Model):
 
 class Order(db.Model):
     __tablename__ = "orders"
+    # Back keyset pagination newest-first: (created_at, id) < cursor, optionally by status
+    __table_args__ = (
+        db.Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        db.Index("ix_orders_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
     po_number = db.Column(
         db.String(100),
         unique=True,
@@ -32,7 +50,8 @@ class Order(db.Model):
         db.String(50), default="draft"
     )  # draft, submitted, processing, shipped, completed, cancelled
     total_amount = db.Column(db.Numeric(10, 2), default=0.00)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # NOT NULL: keyset pagination compares (created_at, id)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
@@ -44,6 +63,10 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = "order_items"
+    # One line per stock item per order; lets cart adds upsert in one statement
+    __table_args__ = (
+        db.UniqueConstraint("order_id", "stock_item_id", name="uq_order_items_order_stock"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
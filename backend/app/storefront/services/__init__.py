@@ -1,4 +1,4 @@
 from .inventory import InventoryService
-from .order import OrderService
+from .order import InsufficientStockError, OrderService
 
-__all__ = ['InventoryService', 'OrderService']
+__all__ = ['InventoryService', 'OrderService', 'InsufficientStockError']
@@ -0,0 +1,159 @@
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .search_index import tokenize
+
+# Upper bound on the (queries x rows) score matrix materialized at once
+_MAX_SCORE_CELLS = 8_000_000
+
+
+def char_ngrams(text: str, n: int = 3) -> List[str]:
+    """Character n-grams of the normalized string, padded with spaces at both ends."""
+    normalized = " ".join(tokenize(text))
+    if not normalized:
+        return []
+    padded = f" {normalized} "
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+class FuzzyMatcher:
+    """Vectorized fuzzy matcher over catalog texts.
+
+    Every text becomes an L2-normalized TF-IDF vector of character n-grams,
+    stored column-wise (n-gram -> rows) in flat NumPy arrays. A query is scored
+    against every row at once by gathering the postings of its n-grams and
+    summing them with ``np.bincount``, which is a sparse matrix-vector product
+    giving the cosine similarity for each row. Batches of queries are scored
+    together in one call.
+
+    Several rows may share an id (e.g. an item's name and its description);
+    results report each id once with its best score.
+    """
+
+    def __init__(self, ids: Sequence[int], texts: Sequence[str], n: int = 3):
+        if len(ids) != len(texts):
+            raise ValueError("ids and texts must have the same length")
+        self.n = n
+        self.row_ids = np.asarray(ids, dtype=np.int64)
+        self.n_rows = len(texts)
+
+        vocab: Dict[str, int] = {}
+        rows, cols, counts = [], [], []
+        for row, text in enumerate(texts):
+            for gram, count in Counter(char_ngrams(text, n)).items():
+                rows.append(row)
+                cols.append(vocab.setdefault(gram, len(vocab)))
+                counts.append(count)
+        self._vocab = vocab
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        tf = np.asarray(counts, dtype=np.float64)
+
+        df = np.bincount(cols, minlength=len(vocab))
+        self._idf = np.log((1.0 + self.n_rows) / (1.0 + df)) + 1.0
+        # idf of an n-gram absent from the catalog, still counted in a query's norm
+        self._unknown_idf = float(np.log(1.0 + self.n_rows) + 1.0)
+
+        weights = (1.0 + np.log(tf)) * self._idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=self.n_rows))
+        norms[norms == 0] = 1.0
+        weights /= norms[rows]
+
+        order = np.argsort(cols, kind="stable")
+        self._rows = rows[order]
+        self._weights = weights[order].astype(np.float32)
+        self._indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=self._indptr[1:])
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def _vector(self, text: str) -> Dict[str, float]:
+        """Normalized weights of the text's n-grams; those not in the vocabulary get the unknown idf."""
+        weights = {}
+        for gram, count in Counter(char_ngrams(text, self.n)).items():
+            col = self._vocab.get(gram)
+            idf = self._idf[col] if col is not None else self._unknown_idf
+            weights[gram] = (1.0 + np.log(count)) * idf
+        norm = float(np.sqrt(sum(w * w for w in weights.values())))
+        return {gram: w / norm for gram, w in weights.items()} if norm else {}
+
+    def _query_vector(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Known n-gram columns of the query and their normalized weights."""
+        known = [(self._vocab[gram], w) for gram, w in self._vector(query).items() if gram in self._vocab]
+        if not known:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        cols, weights = zip(*known)
+        return np.asarray(cols, dtype=np.int64), np.asarray(weights, dtype=np.float32)
+
+    def score_texts(self, queries: Sequence[str], texts: Sequence[str]) -> np.ndarray:
+        """
+        Cosine similarity of each query against texts outside the matrix, shape (len(queries), len(texts)).
+
+        Uses this matcher's idf, so the scores compare with those of match();
+        n-grams the matrix has never seen match each other at the idf of an
+        unknown n-gram. Meant for the few rows changed since it was built.
+        """
+        text_vectors = [self._vector(text) for text in texts]
+        result = np.zeros((len(queries), len(texts)), dtype=np.float64)
+        for q, query in enumerate(queries):
+            query_vector = self._vector(query)
+            for t, vector in enumerate(text_vectors):
+                result[q, t] = sum(w * vector[gram] for gram, w in query_vector.items() if gram in vector)
+        return result
+
+    def scores(self, queries: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of each query against every row, shape (len(queries), n_rows)."""
+        n_queries = len(queries)
+        index_parts, weight_parts = [], []
+        for q, query in enumerate(queries):
+            cols, query_weights = self._query_vector(query)
+            for col, query_weight in zip(cols, query_weights):
+                start, end = self._indptr[col], self._indptr[col + 1]
+                index_parts.append(self._rows[start:end] + q * self.n_rows)
+                weight_parts.append(self._weights[start:end] * query_weight)
+        if not index_parts:
+            return np.zeros((n_queries, self.n_rows), dtype=np.float64)
+        flat = np.bincount(
+            np.concatenate(index_parts),
+            weights=np.concatenate(weight_parts),
+            minlength=n_queries * self.n_rows,
+        )
+        return flat.reshape(n_queries, self.n_rows)
+
+    def match(
+        self, queries: Sequence[str], k: int = 5, min_score: float = 0.0
+    ) -> List[List[Tuple[int, float]]]:
+        """Top-k (id, score) pairs for each query, best first."""
+        if not queries:
+            return []
+        if self.n_rows == 0:
+            return [[] for _ in queries]
+        results: List[List[Tuple[int, float]]] = []
+        chunk = max(1, _MAX_SCORE_CELLS // self.n_rows)
+        # Rows sharing an id can crowd the top-k, so look a little deeper
+        depth = min(self.n_rows, k * 4)
+        for start in range(0, len(queries), chunk):
+            block = self.scores(queries[start:start + chunk])
+            for row_scores in block:
+                top = np.argpartition(-row_scores, depth - 1)[:depth] if depth < self.n_rows else np.arange(self.n_rows)
+                top = top[np.argsort(-row_scores[top], kind="stable")]
+                matches, seen = [], set()
+                for row in top:
+                    score = float(row_scores[row])
+                    if score <= 0.0 or score < min_score:
+                        break
+                    item_id = int(self.row_ids[row])
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                    matches.append((item_id, score))
+                    if len(matches) == k:
+                        break
+                results.append(matches)
+        return results
+
+    def match_one(self, query: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        return self.match([query], k=k, min_score=min_score)[0]
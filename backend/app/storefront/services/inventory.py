@@ -1,14 +1,207 @@
-from typing import List, Optional
+import csv
+import io
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 from flask import current_app
-from sqlalchemy import or_
+from sqlalchemy import case, func, insert, or_, text, update
 from app.database import db
 from ..models import StockItem
+from .search_index import CatalogIndex
+from .fuzzy_matcher import FuzzyMatcher
+
+# Minimum cosine similarity for a fuzzy fallback match
+FUZZY_MIN_SCORE = 0.2
+# Rows per multi-row INSERT / COPY in bulk_create_stock_items
+BULK_BATCH_SIZE = 10000
+# Items whose text changed since the fuzzy matcher was built that are rescored
+# on the side; one more triggers a rebuild
+FUZZY_REBUILD_AFTER = 256
+# A unit price quoted in an order picks among close fuzzy matches priced within
+# this fraction of it, so "Laptop Stand @ $34.99" doesn't resolve to a $500 desk
+PRICE_HINT_TOLERANCE = 0.25
+# Fuzzy matches considered for a name that comes with a quoted price
+PRICE_HINT_CANDIDATES = 3
+# Candidate ids per IN (...) query when the memory backend loads matching rows
+_ID_CHUNK = 900
+_BULK_COLUMNS = ("name", "description", "cost", "list_price", "quantity", "created_at", "updated_at")
+
+_catalog_index: Optional[CatalogIndex] = None
+_fuzzy_matcher: Optional[FuzzyMatcher] = None
+# Items created, renamed or deleted since _fuzzy_matcher was built
+_fuzzy_stale: Set[int] = set()
+_pg_trgm_available: Optional[bool] = None
 
 class InventoryService:
     """Service for handling inventory-related operations."""
+
+    @staticmethod
+    def get_catalog_index(refresh: bool = False) -> CatalogIndex:
+        """Get the in-memory catalog index, loading it from the database on first use."""
+        global _catalog_index
+        if _catalog_index is None or refresh:
+            with current_app.app_context():
+                _catalog_index = CatalogIndex.from_stock_items(StockItem.query.all())
+        return _catalog_index
+
+    @staticmethod
+    def get_fuzzy_matcher(refresh: bool = False) -> FuzzyMatcher:
+        """Get the vectorized fuzzy matcher over item names and descriptions.
+
+        Built on first use and rebuilt once more than FUZZY_REBUILD_AFTER
+        items changed text since; fuzzy_match rescores the changed ones until then.
+        """
+        global _fuzzy_matcher
+        if _fuzzy_matcher is None or refresh or len(_fuzzy_stale) > FUZZY_REBUILD_AFTER:
+            with current_app.app_context():
+                # Changes committed while the rows are read are marked again
+                _fuzzy_stale.clear()
+                rows = db.session.query(StockItem.id, StockItem.name, StockItem.description).all()
+                ids = [row.id for row in rows] * 2
+                texts = [row.name for row in rows] + [row.description or "" for row in rows]
+                _fuzzy_matcher = FuzzyMatcher(ids, texts)
+        return _fuzzy_matcher
+
+    @staticmethod
+    def fuzzy_match(
+        queries: List[str],
+        k: int = 5,
+        min_score: float = FUZZY_MIN_SCORE
+    ) -> List[List[StockItem]]:
+        """Closest stock items for each query, best first, scored in one vectorized call."""
+        with current_app.app_context():
+            matcher = InventoryService.get_fuzzy_matcher()
+            stale = set(_fuzzy_stale)
+            matches = matcher.match(queries, k=k + len(stale), min_score=min_score)
+            if stale:
+                matches = InventoryService._rescore_stale(matcher, queries, matches, stale, k, min_score)
+            ids = {item_id for ranked in matches for item_id, _ in ranked}
+            rows = {
+                item.id: item
+                for item in StockItem.query.filter(StockItem.id.in_(ids)).all()
+            } if ids else {}
+            return [[rows[item_id] for item_id, _ in ranked if item_id in rows] for ranked in matches]
+
+    @staticmethod
+    def prefer_quoted_price(candidates: List[Any], unit_price: Optional[float], price=lambda c: c.list_price) -> List[Any]:
+        """Candidates priced within PRICE_HINT_TOLERANCE of unit_price first, otherwise in their given order."""
+        if not unit_price:
+            return list(candidates)
+        return sorted(
+            candidates,
+            key=lambda candidate: abs(float(price(candidate) or 0) - unit_price) > PRICE_HINT_TOLERANCE * unit_price,
+        )
+
+    @staticmethod
+    def _rescore_stale(
+        matcher: FuzzyMatcher,
+        queries: List[str],
+        matches: List[List[tuple]],
+        stale: Set[int],
+        k: int,
+        min_score: float
+    ) -> List[List[tuple]]:
+        """Replace the matcher's scores for items changed since it was built with scores of their current text."""
+        rows = db.session.query(StockItem.id, StockItem.name, StockItem.description).filter(
+            StockItem.id.in_(stale)
+        ).all()
+        ids = [row.id for row in rows] * 2
+        scores = matcher.score_texts(queries, [row.name for row in rows] + [row.description or "" for row in rows])
+        merged = []
+        for ranked, row_scores in zip(matches, scores):
+            best = {item_id: score for item_id, score in ranked if item_id not in stale}
+            for item_id, score in zip(ids, row_scores):
+                if score > 0.0 and score >= min_score and score > best.get(item_id, 0.0):
+                    best[item_id] = float(score)
+            merged.append(sorted(best.items(), key=lambda pair: pair[1], reverse=True)[:k])
+        return merged
+
+    @staticmethod
+    def _index_upsert(item: StockItem, text_changed: bool = True) -> None:
+        """Keep the catalog index current after a write, if it has been built.
+
+        Items whose name or description changed are marked for the fuzzy matcher,
+        which rescores them until enough changes pile up for a rebuild.
+        """
+        if _catalog_index is not None:
+            _catalog_index.upsert(item)
+        if text_changed and _fuzzy_matcher is not None:
+            _fuzzy_stale.add(item.id)
+
+    @staticmethod
+    def _index_adjust_quantities(changes: Dict[int, int]) -> None:
+        """Mirror committed stock changes into the catalog index, if it has been built."""
+        if _catalog_index is not None:
+            for item_id, delta in changes.items():
+                _catalog_index.adjust_quantity(item_id, delta)
+
+    @staticmethod
+    def _index_remove(item_id: int) -> None:
+        if _catalog_index is not None:
+            _catalog_index.remove(item_id)
+        if _fuzzy_matcher is not None:
+            _fuzzy_stale.add(item_id)
     
+    @staticmethod
+    def _index_reset() -> None:
+        """Drop the catalog index and fuzzy matcher so they are rebuilt on next use."""
+        global _catalog_index, _fuzzy_matcher
+        _catalog_index = None
+        _fuzzy_matcher = None
+
+    @staticmethod
+    def bulk_create_stock_items(rows: Iterable[dict], batch_size: int = BULK_BATCH_SIZE) -> int:
+        """Insert many stock items in one transaction.
+
+        On PostgreSQL each batch is streamed with COPY; elsewhere it is one
+        multi-row INSERT. Rows are read lazily, batch by batch.
+
+        Args:
+            rows: Dicts with name, description, cost, list_price and quantity.
+            batch_size: Rows per COPY or INSERT statement.
+        Returns:
+            int: Number of rows inserted.
+        """
+        try:
+            with current_app.app_context():
+                use_copy = db.engine.dialect.name == "postgresql"
+                now = datetime.utcnow()
+                rows = iter(rows)
+                inserted = 0
+                while True:
+                    batch = [{**row, "created_at": now, "updated_at": now} for row in islice(rows, batch_size)]
+                    if not batch:
+                        break
+                    if use_copy:
+                        InventoryService._copy_stock_items(batch)
+                    else:
+                        db.session.execute(insert(StockItem), batch)
+                    inserted += len(batch)
+                db.session.commit()
+                InventoryService._index_reset()
+                return inserted
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise Exception(f"Failed to bulk create stock items: {str(e)}")
+
+    @staticmethod
+    def _copy_stock_items(batch: List[dict]) -> None:
+        """COPY a batch into stock_items on the session's connection (psycopg2)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([row[column] for column in _BULK_COLUMNS])
+        buffer.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {StockItem.__tablename__} ({', '.join(_BULK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
     @staticmethod
     def create_stock_item(
         name: str, 
@@ -29,6 +222,7 @@ class InventoryService:
                 )
                 db.session.add(item)
                 db.session.commit()
+                InventoryService._index_upsert(item)
                 return item
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -58,6 +252,9 @@ class InventoryService:
                 
                 item.updated_at = datetime.utcnow()
                 db.session.commit()
+                InventoryService._index_upsert(
+                    item, text_changed="name" in updates or "description" in updates
+                )
                 return item
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -74,6 +271,7 @@ class InventoryService:
                 
                 db.session.delete(item)
                 db.session.commit()
+                InventoryService._index_remove(item_id)
                 return True
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -84,10 +282,32 @@ class InventoryService:
         search: Optional[str] = None,
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
-        in_stock: bool = False
+        in_stock: bool = False,
+        backend: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[StockItem]:
-        """List stock items with optional filtering and fuzzy search."""
+        """List stock items with optional filtering and fuzzy search.
+
+        backend selects the search path ("trigram", "memory" or "sql") and
+        defaults to the INVENTORY_SEARCH_BACKEND setting. Searches on the trigram
+        and memory paths return the best limit rows (INVENTORY_SEARCH_LIMIT by
+        default); without a search term every row passing the filters is
+        returned, whatever the backend.
+        """
         with current_app.app_context():
+            backend = backend or current_app.config.get("INVENTORY_SEARCH_BACKEND", "trigram")
+            if not search:
+                # Nothing to rank: a plain filtered listing
+                backend = "sql"
+            if limit is None:
+                limit = current_app.config.get("INVENTORY_SEARCH_LIMIT", 50)
+            if backend == "trigram":
+                if InventoryService._trigram_search_available():
+                    return InventoryService._list_by_similarity(search, min_price, max_price, in_stock, limit)
+                # No pg_trgm (e.g. SQLite): use the in-process index instead
+                backend = "memory"
+            if backend == "memory":
+                return InventoryService._list_from_index(search, min_price, max_price, in_stock, limit)
             query = StockItem.query
             if search:
                 query = query.filter(
@@ -105,23 +325,188 @@ class InventoryService:
             results = query.order_by(StockItem.name).all()
             # Fuzzy match fallback if no results
             if search and not results:
-                from difflib import get_close_matches
-                all_items = StockItem.query.all()
-                names = [item.name for item in all_items]
-                descs = [item.description or '' for item in all_items]
-                close_names = get_close_matches(search, names, n=5, cutoff=0.5)
-                close_descs = get_close_matches(search, descs, n=5, cutoff=0.5)
-                matched = [item for item in all_items if item.name in close_names or (item.description and item.description in close_descs)]
-                # Apply price/in_stock filters to fuzzy matches
-                if min_price is not None:
-                    matched = [item for item in matched if float(item.list_price) >= min_price]
-                if max_price is not None:
-                    matched = [item for item in matched if float(item.list_price) <= max_price]
-                if in_stock:
-                    matched = [item for item in matched if item.quantity > 0]
-                return matched
+                return InventoryService._fuzzy_fallback(search, min_price, max_price, in_stock)
             return results
+
+    @staticmethod
+    def _fuzzy_fallback(
+        search: str,
+        min_price: Optional[float],
+        max_price: Optional[float],
+        in_stock: bool,
+        limit: int = 5
+    ) -> List[StockItem]:
+        """Closest items by name or description, with the price/in_stock filters applied."""
+        matched = InventoryService.fuzzy_match([search], k=limit)[0]
+        if min_price is not None:
+            matched = [item for item in matched if float(item.list_price) >= min_price]
+        if max_price is not None:
+            matched = [item for item in matched if float(item.list_price) <= max_price]
+        if in_stock:
+            matched = [item for item in matched if item.quantity > 0]
+        return matched
     
+    @staticmethod
+    def _trigram_search_available() -> bool:
+        """Check once whether the database is Postgres with the pg_trgm extension installed."""
+        global _pg_trgm_available
+        if _pg_trgm_available is None:
+            if db.engine.dialect.name != "postgresql":
+                _pg_trgm_available = False
+            else:
+                try:
+                    _pg_trgm_available = db.session.execute(
+                        text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                    ).scalar() is not None
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    _pg_trgm_available = False
+        return _pg_trgm_available
+
+    @staticmethod
+    def _list_by_similarity(
+        search: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        in_stock: bool,
+        limit: int
+    ) -> List[StockItem]:
+        """Search with pg_trgm: substring or trigram-similar rows, best similarity first."""
+        query = StockItem.query
+        order_by = [StockItem.name]
+        if search:
+            pattern = f"%{search}%"
+            description = func.coalesce(StockItem.description, "")
+            # ILIKE and % (similarity above pg_trgm.similarity_threshold) both use the GIN indexes
+            query = query.filter(
+                or_(
+                    StockItem.name.ilike(pattern),
+                    StockItem.description.ilike(pattern),
+                    StockItem.name.op("%")(search),
+                    StockItem.description.op("%")(search),
+                )
+            )
+            similarity = func.greatest(
+                func.similarity(StockItem.name, search),
+                func.similarity(description, search),
+            )
+            order_by = [similarity.desc(), StockItem.name]
+        if min_price is not None:
+            query = query.filter(StockItem.list_price >= min_price)
+        if max_price is not None:
+            query = query.filter(StockItem.list_price <= max_price)
+        if in_stock:
+            query = query.filter(StockItem.quantity > 0)
+        return query.order_by(*order_by).limit(limit).all()
+
+    @staticmethod
+    def _list_from_index(
+        search: str,
+        min_price: Optional[float],
+        max_price: Optional[float],
+        in_stock: bool,
+        limit: int
+    ) -> List[StockItem]:
+        """Find the matching ids with the catalog index, then load and filter the rows in SQL.
+
+        The index is per process, so its quantities and prices can be stale:
+        the price and stock filters run in the database, on chunks of
+        candidates in name order until limit rows pass.
+        """
+        entries = InventoryService.get_catalog_index().filter(search=search, fuzzy=False)
+        if not entries:
+            return InventoryService._fuzzy_fallback(search, min_price, max_price, in_stock)
+        results: List[StockItem] = []
+        for start in range(0, len(entries), _ID_CHUNK):
+            chunk = [e.id for e in entries[start:start + _ID_CHUNK]]
+            query = StockItem.query.filter(StockItem.id.in_(chunk))
+            if min_price is not None:
+                query = query.filter(StockItem.list_price >= min_price)
+            if max_price is not None:
+                query = query.filter(StockItem.list_price <= max_price)
+            if in_stock:
+                query = query.filter(StockItem.quantity > 0)
+            rows = {item.id: item for item in query.all()}
+            results.extend(rows[item_id] for item_id in chunk if item_id in rows)
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    @staticmethod
+    def resolve_items(
+        names: List[str],
+        k: int = 3,
+        min_score: float = 0.3,
+        unit_prices: Optional[List[Optional[float]]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Rank the top-k stock item candidates for each name in one pass over the catalog index.
+
+        The index only chooses the candidates: it is per process and misses
+        stock changes made by other processes, so quantity and list_price come
+        from the database, in one query for every candidate. Candidates deleted
+        since the index was built are dropped. With unit_prices, each name's
+        candidates priced close to its quoted price move first.
+        """
+        index = InventoryService.get_catalog_index()
+        ranked = index.search_many(names, k=k, min_score=min_score)
+        ids = {entry.id for candidates in ranked for entry, _ in candidates}
+        with current_app.app_context():
+            current = {
+                row.id: row
+                for row in db.session.query(StockItem.id, StockItem.quantity, StockItem.list_price)
+                .filter(StockItem.id.in_(ids)).all()
+            } if ids else {}
+        prices = unit_prices or [None] * len(names)
+        return [
+            InventoryService.prefer_quoted_price(
+                [
+                    dict(
+                        entry.to_dict(), score=round(score, 4),
+                        quantity=current[entry.id].quantity,
+                        list_price=float(current[entry.id].list_price or 0),
+                    )
+                    for entry, score in candidates if entry.id in current
+                ],
+                unit_price,
+                price=lambda candidate: candidate["list_price"],
+            )
+            for candidates, unit_price in zip(ranked, prices)
+        ]
+
+    @staticmethod
+    def apply_stock_changes(changes: Dict[int, int]) -> List[int]:
+        """Apply quantity changes to many stock items with one guarded UPDATE.
+
+        changes maps stock item id to a quantity delta. Rows whose quantity
+        would go negative (and ids that don't exist) are left untouched. Does
+        not commit: the caller owns the transaction and should roll back if
+        anything failed.
+
+        Returns the ids whose change could not be applied.
+        """
+        if not changes:
+            return []
+        delta = case(changes, value=StockItem.id)
+        stmt = (
+            update(StockItem)
+            .where(StockItem.id.in_(list(changes)), StockItem.quantity + delta >= 0)
+            .values(quantity=StockItem.quantity + delta, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if db.session.get_bind().dialect.update_returning:
+            updated = set(db.session.execute(stmt.returning(StockItem.id)).scalars())
+        else:
+            # Without RETURNING, lock the rows first so the guard can be checked here
+            current = dict(
+                db.session.query(StockItem.id, StockItem.quantity)
+                .filter(StockItem.id.in_(list(changes)))
+                .with_for_update()
+                .all()
+            )
+            updated = {i for i, d in changes.items() if i in current and current[i] + d >= 0}
+            db.session.execute(stmt)
+        return [item_id for item_id in changes if item_id not in updated]
+
     @staticmethod
     def update_inventory(item_id: int, quantity_change: int) -> Optional[StockItem]:
         """Update the inventory quantity of a stock item."""
@@ -138,6 +523,7 @@ class InventoryService:
                 item.quantity = new_quantity
                 item.updated_at = datetime.utcnow()
                 db.session.commit()
+                InventoryService._index_upsert(item, text_changed=False)
                 return item
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -1,11 +1,35 @@
-from typing import List, Optional, Dict, Any
+import base64
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from datetime import datetime
+from sqlalchemy import func, select, tuple_, update
 from sqlalchemy.exc import SQLAlchemyError
 from decimal import Decimal
 from flask import current_app
 from app.database import db
 from ..models import Order, OrderItem, StockItem
 from .inventory import InventoryService
+from .summary_cache import SummaryCache
+from ..events import publisher as order_events
+
+# Serialized order summaries, validated on every read against the order's version:
+# its updated_at and the latest updated_at of the stock items on its lines
+_summary_cache = SummaryCache()
+
+
+class InsufficientStockError(ValueError):
+    """Raised when an order can't be placed because some lines exceed available stock.
+
+    Attributes:
+        shortages: One dict per short line with stock_item_id, name, requested and available.
+    """
+
+    def __init__(self, shortages: List[Dict[str, Any]]):
+        self.shortages = shortages
+        details = ", ".join(
+            f"{s['name']} (requested {s['requested']}, available {s['available']})"
+            for s in shortages
+        )
+        super().__init__(f"Insufficient stock for item(s): {details}")
 
 
 class OrderService:
@@ -24,6 +48,7 @@ class OrderService:
                 db.session.add(order)
                 db.session.commit()
                 db.session.refresh(order)  # Ensure order is attached to session
+                OrderService._order_changed(order.id, "created")
                 return order
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -46,7 +71,11 @@ class OrderService:
 
     @staticmethod
     def add_item_to_cart(order_id: int, stock_item_id: int, quantity: int = 1) -> Order:
-        """Add an item to the cart (draft order)."""
+        """Add an item to the cart (draft order).
+
+        The line is upserted with a single statement and the order total is
+        adjusted by the line's delta instead of being re-summed.
+        """
         try:
             with current_app.app_context():
                 # Get the order and stock item
@@ -64,29 +93,10 @@ class OrderService:
                 if stock_item.quantity < quantity:
                     raise ValueError("Insufficient stock")
 
-                # Check if item already in order
-                order_item = next(
-                    (item for item in order.items if item.stock_item_id == stock_item_id),
-                    None,
-                )
-
-                if order_item:
-                    # Update existing item
-                    order_item.quantity += quantity
-                else:
-                    # Add new item
-                    order_item = OrderItem(
-                        order_id=order_id,
-                        stock_item_id=stock_item_id,
-                        quantity=quantity,
-                        unit_cost=stock_item.cost,
-                        unit_price=stock_item.list_price,
-                    )
-                    db.session.add(order_item)
-
-                # Update order total
-                OrderService._update_order_totals(order)
+                unit_price = OrderService._upsert_order_line(order_id, stock_item, quantity)
+                OrderService._apply_total_delta(order_id, unit_price * quantity)
                 db.session.commit()
+                OrderService._order_changed(order_id, "item_added")
 
                 return order
 
@@ -94,6 +104,83 @@ class OrderService:
             db.session.rollback()
             raise Exception(f"Failed to add item to cart: {str(e)}")
 
+    @staticmethod
+    def add_items_to_cart(order_id: int, lines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add several items to the cart (draft order) in a single transaction.
+
+        Each line is a dict with 'stock_item_id' and 'quantity' (coerced with
+        int(), so "2" is accepted). Lines that fail validation are reported and
+        skipped; the rest are upserted and the order total is adjusted once by
+        their combined delta before a single commit.
+
+        Returns a result dict per line, in input order, with an 'ok' flag and 'msg'.
+        """
+        try:
+            with current_app.app_context():
+                order = Order.query.get(order_id)
+                if not order:
+                    raise ValueError("Order not found")
+
+                if order.status != "draft":
+                    raise ValueError("Can only add items to a draft order")
+
+                stock_ids = {line.get("stock_item_id") for line in lines if line.get("stock_item_id")}
+                stock_items = {}
+                in_cart = {}
+                if stock_ids:
+                    stock_items = {
+                        item.id: item
+                        for item in StockItem.query.filter(StockItem.id.in_(stock_ids)).all()
+                    }
+                    in_cart = dict(
+                        db.session.query(OrderItem.stock_item_id, OrderItem.quantity)
+                        .filter(OrderItem.order_id == order_id, OrderItem.stock_item_id.in_(stock_ids))
+                        .all()
+                    )
+
+                results = []
+                delta = Decimal("0.00")
+                for line in lines:
+                    stock_item_id = line.get("stock_item_id")
+                    stock_item = stock_items.get(stock_item_id)
+                    if not stock_item:
+                        results.append({"ok": False, "stock_item_id": stock_item_id, "msg": "Stock item not found"})
+                        continue
+                    try:
+                        quantity = int(line.get("quantity", 1))
+                    except (TypeError, ValueError):
+                        quantity = 0
+                    if quantity <= 0:
+                        results.append({"ok": False, "stock_item_id": stock_item_id, "msg": "Quantity must be a positive integer"})
+                        continue
+
+                    already = in_cart.get(stock_item_id, 0)
+                    if stock_item.quantity < already + quantity:
+                        results.append({"ok": False, "stock_item_id": stock_item_id, "msg": "Insufficient stock"})
+                        continue
+
+                    unit_price = OrderService._upsert_order_line(order_id, stock_item, quantity)
+                    delta += unit_price * quantity
+                    in_cart[stock_item_id] = already + quantity
+                    results.append({
+                        "ok": True,
+                        "stock_item_id": stock_item_id,
+                        "name": stock_item.name,
+                        "quantity": quantity,
+                        "msg": f"Item {stock_item_id} added to cart",
+                    })
+
+                if any(result["ok"] for result in results):
+                    OrderService._apply_total_delta(order_id, delta)
+                    db.session.commit()
+                    OrderService._order_changed(order_id, "items_added")
+
+                return results
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise Exception(f"Failed to add items to cart: {str(e)}")
+
     @staticmethod
     def update_cart_item_quantity(
         order_id: int, item_id: int, new_quantity: int
@@ -108,9 +195,7 @@ class OrderService:
                 if order.status != "draft":
                     raise ValueError("Can only update items in a draft order")
 
-                order_item = next(
-                    (item for item in order.items if item.id == item_id), None
-                )
+                order_item = OrderItem.query.filter_by(id=item_id, order_id=order_id).first()
 
                 if not order_item:
                     raise ValueError("Item not found in order")
@@ -118,13 +203,15 @@ class OrderService:
                 if new_quantity <= 0:
                     return OrderService.remove_item_from_cart(order_id, item_id)
 
-                stock_item = order_item.stock_item
-                if stock_item.quantity < new_quantity:
+                available = db.session.query(StockItem.quantity).filter_by(id=order_item.stock_item_id).scalar()
+                if available < new_quantity:
                     raise ValueError("Insufficient stock")
 
+                delta = (new_quantity - order_item.quantity) * order_item.unit_price
                 order_item.quantity = new_quantity
-                OrderService._update_order_totals(order)
+                OrderService._apply_total_delta(order_id, delta)
                 db.session.commit()
+                OrderService._order_changed(order_id, "item_updated")
 
                 return order
 
@@ -144,16 +231,16 @@ class OrderService:
                 if order.status != "draft":
                     raise ValueError("Can only remove items from a draft order")
 
-                order_item = next(
-                    (item for item in order.items if item.id == item_id), None
-                )
+                order_item = OrderItem.query.filter_by(id=item_id, order_id=order_id).first()
 
                 if not order_item:
                     raise ValueError("Item not found in order")
 
+                delta = -(order_item.quantity * order_item.unit_price)
                 db.session.delete(order_item)
-                OrderService._update_order_totals(order)
+                OrderService._apply_total_delta(order_id, delta)
                 db.session.commit()
+                OrderService._order_changed(order_id, "item_removed")
 
                 return order
 
@@ -163,7 +250,12 @@ class OrderService:
 
     @staticmethod
     def place_order(order_id: int) -> Order:
-        """Place an order (convert from draft to placed)."""
+        """Place an order (convert from draft to placed).
+
+        Stock for every line is decremented by one guarded UPDATE in the same
+        transaction as the status change, so either the whole order is placed
+        or nothing changes. Short lines are reported with InsufficientStockError.
+        """
         try:
             with current_app.app_context():
                 order = Order.query.get(order_id)
@@ -173,23 +265,36 @@ class OrderService:
                 if order.status != "draft":
                     raise ValueError("Only draft orders can be placed")
 
-                # Check stock availability
-                for item in order.items:
-                    stock_item = item.stock_item
-                    if stock_item.quantity < item.quantity:
-                        raise ValueError(f"Insufficient stock for item: {stock_item.name}")
-
-                # Update inventory
-                for item in order.items:
-                    InventoryService.update_inventory(
-                        item.stock_item_id,
-                        -item.quantity,  # Deduct from inventory
-                    )
+                requested = OrderService._order_quantities(order_id)
+                short_ids = InventoryService.apply_stock_changes(
+                    {stock_item_id: -quantity for stock_item_id, quantity in requested.items()}
+                )
+                if short_ids:
+                    db.session.rollback()
+                    available = {
+                        row.id: row
+                        for row in db.session.query(StockItem.id, StockItem.name, StockItem.quantity)
+                        .filter(StockItem.id.in_(short_ids))
+                        .all()
+                    }
+                    raise InsufficientStockError([
+                        {
+                            "stock_item_id": stock_item_id,
+                            "name": available[stock_item_id].name if stock_item_id in available else f"#{stock_item_id}",
+                            "requested": requested[stock_item_id],
+                            "available": available[stock_item_id].quantity if stock_item_id in available else 0,
+                        }
+                        for stock_item_id in short_ids
+                    ])
 
                 # Update order status
                 order.status = "submitted"
                 order.submitted_at = datetime.utcnow()
                 db.session.commit()
+                OrderService._order_changed(order_id, "placed")
+                InventoryService._index_adjust_quantities(
+                    {stock_item_id: -quantity for stock_item_id, quantity in requested.items()}
+                )
 
                 return order
 
@@ -209,21 +314,21 @@ class OrderService:
                 if order.status not in ["submitted", "processing"]:
                     raise ValueError("Only submitted or processing orders can be cancelled")
 
-                # Return items to inventory
-                for item in order.items:
-                    try:
-                        InventoryService.update_inventory(
-                            item.stock_item_id,
-                            item.quantity,  # Add back to inventory
-                        )
-                    except Exception as e:
-                        # Log the error but continue with other items
-                        print(f"Error returning item {item.id} to inventory: {str(e)}")
+                # Return items to inventory in one statement
+                returned = OrderService._order_quantities(order_id)
+                missing = InventoryService.apply_stock_changes(returned)
+                for stock_item_id in missing:
+                    # Log the error but continue with other items
+                    print(f"Error returning stock item {stock_item_id} to inventory: item no longer exists")
 
                 # Update order status
                 order.status = "cancelled"
                 order.cancelled_at = datetime.utcnow()
                 db.session.commit()
+                OrderService._order_changed(order_id, "cancelled")
+                InventoryService._index_adjust_quantities(
+                    {i: q for i, q in returned.items() if i not in missing}
+                )
 
                 return order
 
@@ -231,24 +336,127 @@ class OrderService:
             db.session.rollback()
             raise Exception(f"Failed to cancel order: {str(e)}")
 
+    @staticmethod
+    def _order_quantities(order_id: int) -> Dict[int, int]:
+        """Total quantity per stock item for an order's lines."""
+        return {
+            stock_item_id: int(quantity)
+            for stock_item_id, quantity in db.session.query(
+                OrderItem.stock_item_id, func.sum(OrderItem.quantity)
+            )
+            .filter(OrderItem.order_id == order_id)
+            .group_by(OrderItem.stock_item_id)
+            .all()
+        }
+
     @staticmethod
     def list_orders(
         user_id: Optional[int] = None,
         status: Optional[str] = None,
         limit: int = 100,
-        offset: int = 0,
+        cursor: Optional[str] = None,
     ) -> List[Order]:
-        """List orders with optional filtering."""
+        """List orders newest first with optional filtering.
+
+        Pages with a keyset cursor on (created_at, id) instead of OFFSET, so
+        every page is an index range scan however deep it is.
+
+        Args:
+            user_id: Only orders belonging to this user.
+            status: Only orders with this status.
+            limit: Maximum number of orders to return.
+            cursor: Value from encode_cursor for the last order of the previous page.
+
+        Returns:
+            List[Order]: Up to limit orders older than the cursor.
+        """
+        with current_app.app_context():
+            return OrderService._orders_query(user_id, status, cursor).limit(limit).all()
+
+    @staticmethod
+    def list_order_versions(
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> List[Any]:
+        """(id, created_at, updated_at, items_updated_at) rows of the orders list_orders would return.
+
+        This is the cheap query behind conditional GETs and the summary cache:
+        it reads only what's needed to tell whether a page has changed.
+        """
         with current_app.app_context():
-            query = Order.query
+            return (
+                OrderService._orders_query(user_id, status, cursor)
+                .with_entities(*OrderService._version_columns())
+                .limit(limit)
+                .all()
+            )
+
+    @staticmethod
+    def get_order_version(order_id: int) -> Optional[Any]:
+        """(id, created_at, updated_at, items_updated_at) row of one order, or None if it doesn't exist."""
+        with current_app.app_context():
+            return (
+                db.session.query(*OrderService._version_columns())
+                .filter(Order.id == order_id)
+                .first()
+            )
+
+    @staticmethod
+    def _version_columns() -> Tuple[Any, ...]:
+        """Columns that change whenever an order's summary does.
+
+        Summaries show the names of the stock items on their lines, and renaming
+        a stock item doesn't touch the orders holding it, so the latest
+        updated_at of those stock items is part of the version. Line prices are
+        copied onto the order, so catalog price changes don't affect it.
+        """
+        items_updated_at = (
+            select(func.max(StockItem.updated_at))
+            .join(OrderItem, OrderItem.stock_item_id == StockItem.id)
+            .where(OrderItem.order_id == Order.id)
+            .correlate(Order)
+            .scalar_subquery()
+            .label("items_updated_at")
+        )
+        return Order.id, Order.created_at, Order.updated_at, items_updated_at
 
-            if user_id is not None:
-                query = query.filter_by(user_id=user_id)
+    @staticmethod
+    def version_key(version: Any) -> Tuple[Any, Any]:
+        """What a cached summary is validated against: the order's and its stock items' updated_at."""
+        return version.updated_at, version.items_updated_at
+
+    @staticmethod
+    def _orders_query(user_id: Optional[int], status: Optional[str], cursor: Optional[str]):
+        query = Order.query
+
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
 
-            if status is not None:
-                query = query.filter_by(status=status)
+        if status is not None:
+            query = query.filter_by(status=status)
+
+        if cursor:
+            created_at, order_id = OrderService.decode_cursor(cursor)
+            query = query.filter(tuple_(Order.created_at, Order.id) < (created_at, order_id))
+
+        return query.order_by(Order.created_at.desc(), Order.id.desc())
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, order_id: int) -> str:
+        """Opaque pagination cursor pointing just past the given order."""
+        raw = f"{created_at.isoformat()}|{order_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
 
-            return query.order_by(Order.created_at.desc()).offset(offset).limit(limit).all()
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Inverse of encode_cursor. Raises ValueError for malformed cursors."""
+        try:
+            created_at, order_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+            return datetime.fromisoformat(created_at), int(order_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
 
     @staticmethod
     def update_order_status(order_id: int, status: str) -> bool:
@@ -261,6 +469,7 @@ class OrderService:
                 order.status = status
                 order.updated_at = datetime.utcnow()
                 db.session.commit()
+                OrderService._order_changed(order_id, "status_changed")
                 return True
         except Exception as e:
             db.session.rollback()
@@ -268,40 +477,317 @@ class OrderService:
             return False
 
     @staticmethod
-    def _update_order_totals(order: Order) -> None:
-        """Update the order totals based on its items."""
-        with current_app.app_context():
-            order.total_amount = sum(
-                item.quantity * item.unit_price for item in order.items
+    def _upsert_order_line(order_id: int, stock_item: StockItem, quantity: int) -> Decimal:
+        """Insert an order line or add to its quantity with a single statement.
+
+        Relies on the unique (order_id, stock_item_id) constraint. Returns the
+        line's unit price, which is the one captured when the line was first added.
+        """
+        table = OrderItem.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            insert = None
+
+        if insert is None:
+            # No ON CONFLICT support: fall back to select-then-write
+            order_item = OrderItem.query.filter_by(order_id=order_id, stock_item_id=stock_item.id).first()
+            if order_item:
+                order_item.quantity += quantity
+            else:
+                order_item = OrderItem(
+                    order_id=order_id,
+                    stock_item_id=stock_item.id,
+                    quantity=quantity,
+                    unit_cost=stock_item.cost,
+                    unit_price=stock_item.list_price,
+                )
+                db.session.add(order_item)
+            return Decimal(order_item.unit_price)
+
+        stmt = insert(table).values(
+            order_id=order_id,
+            stock_item_id=stock_item.id,
+            quantity=quantity,
+            unit_cost=stock_item.cost,
+            unit_price=stock_item.list_price,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.order_id, table.c.stock_item_id],
+            set_={"quantity": table.c.quantity + stmt.excluded.quantity},
+        ).returning(table.c.unit_price)
+        return Decimal(db.session.execute(stmt).scalar_one())
+
+    @staticmethod
+    def _apply_total_delta(order_id: int, delta) -> None:
+        """Adjust the stored order total by delta in the database."""
+        db.session.execute(
+            update(Order)
+            .where(Order.id == order_id)
+            .values(
+                total_amount=func.coalesce(Order.total_amount, 0) + delta,
+                updated_at=datetime.utcnow(),
             )
-            order.updated_at = datetime.utcnow()
+        )
+
+    @staticmethod
+    def reconcile_order_totals(fix: bool = True) -> List[Dict[str, Any]]:
+        """Compare stored order totals with the sum of their lines.
+
+        Totals are maintained by deltas, so this is the periodic check that
+        catches drift. With fix set, mismatched totals are rewritten.
+
+        Returns one dict per mismatched order with the stored and expected totals.
+        """
+        try:
+            with current_app.app_context():
+                line_totals = (
+                    db.session.query(
+                        OrderItem.order_id.label("order_id"),
+                        func.sum(OrderItem.quantity * OrderItem.unit_price).label("total"),
+                    )
+                    .group_by(OrderItem.order_id)
+                    .subquery()
+                )
+                expected = func.coalesce(line_totals.c.total, 0)
+                mismatched = (
+                    db.session.query(Order.id, Order.total_amount, expected)
+                    .outerjoin(line_totals, line_totals.c.order_id == Order.id)
+                    .filter(func.coalesce(Order.total_amount, 0) != expected)
+                    .all()
+                )
+                report = [
+                    {"order_id": order_id, "stored": float(stored or 0), "expected": float(total)}
+                    for order_id, stored, total in mismatched
+                ]
+                if fix and mismatched:
+                    for order_id, _, total in mismatched:
+                        db.session.execute(
+                            update(Order)
+                            .where(Order.id == order_id)
+                            .values(total_amount=total, updated_at=datetime.utcnow())
+                        )
+                    db.session.commit()
+                    for order_id, _, _ in mismatched:
+                        OrderService._order_changed(order_id, "total_reconciled")
+                return report
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise Exception(f"Failed to reconcile order totals: {str(e)}")
 
     @staticmethod
     def get_order_summary(order_id: int) -> Dict[str, Any]:
         """Get a summary of the order with item details."""
         with current_app.app_context():
-            order = Order.query.get(order_id)
-            if not order:
+            version = OrderService.get_order_version(order_id)
+            summaries = OrderService.summaries_for_versions([version]) if version else []
+            if not summaries:
                 raise ValueError("Order not found")
 
-            items = []
-            for item in order.items:
-                items.append(
+            return summaries[0]
+
+    @staticmethod
+    def list_order_summaries(
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List order summaries with optional filtering.
+
+        Reads the page's order versions, serves unchanged orders from the
+        summary cache and rebuilds the rest in two queries regardless of page
+        size: one for the orders and one for all of their lines joined with
+        the stock item names.
+
+        Returns:
+            Tuple of the page's summaries and the cursor for the next page
+            (None when this page is the last one).
+        """
+        with current_app.app_context():
+            versions = OrderService.list_order_versions(user_id=user_id, status=status, limit=limit, cursor=cursor)
+            return OrderService.summaries_for_versions(versions), OrderService.next_cursor(versions, limit)
+
+    @staticmethod
+    def next_cursor(page: List[Any], limit: int) -> Optional[str]:
+        """Cursor following a page of orders or version rows, or None if the page wasn't full."""
+        if len(page) < limit or not page:
+            return None
+        return OrderService.encode_cursor(page[-1].created_at, page[-1].id)
+
+    @staticmethod
+    def summaries_for_versions(versions: List[Any]) -> List[Dict[str, Any]]:
+        """Summaries for version rows (see list_order_versions), in the same order.
+
+        Cached summaries are reused when their version matches; the rest are
+        rebuilt in one batch and cached. Orders deleted since the versions
+        were read are left out. The returned dicts are shared with the cache
+        and must not be modified.
+        """
+        with current_app.app_context():
+            summaries: Dict[int, Dict[str, Any]] = {}
+            misses = []
+            for version in versions:
+                cached = _summary_cache.get(version.id, OrderService.version_key(version))
+                if cached is None:
+                    misses.append(version.id)
+                else:
+                    summaries[version.id] = cached
+
+            if misses:
+                versions_by_id = {version.id: version for version in versions}
+                orders = Order.query.filter(Order.id.in_(misses)).all()
+                for order, summary in zip(orders, OrderService._build_summaries(orders)):
+                    # Keyed by the stock items' version read before the build,
+                    # so a rename in between only causes one more miss
+                    key = (order.updated_at, versions_by_id[order.id].items_updated_at)
+                    _summary_cache.put(order.id, key, summary)
+                    summaries[order.id] = summary
+
+            return [summaries[v.id] for v in versions if v.id in summaries]
+
+    @staticmethod
+    def invalidate_summaries(order_id: Optional[int] = None) -> None:
+        """Drop cached summaries for one order, or all of them."""
+        _summary_cache.invalidate(order_id)
+
+    @staticmethod
+    def _order_changed(order_id: int, action: str) -> None:
+        """Hook run after a committed write to an order: drop its cached summary and notify subscribers."""
+        _summary_cache.invalidate(order_id)
+        order_events.order_changed(order_id, action)
+
+    @staticmethod
+    def iter_export_lines(
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Any]:
+        """Stream every order with its lines as flat rows, one per line.
+
+        Orders, lines and stock item names come from one joined query
+        executed with a server-side cursor (stream_results) and fetched
+        batch_size rows at a time, so memory stays flat however many orders
+        there are. Orders without lines yield one row with empty line columns.
+        Rows are ordered by order id, then line id.
+
+        Must be consumed inside an app context (e.g. stream_with_context);
+        the generator doesn't push its own so it can be suspended between rows.
+        """
+        stmt = (
+            select(
+                Order.id.label("order_id"),
+                Order.po_number,
+                Order.status,
+                Order.user_id,
+                Order.total_amount,
+                Order.created_at,
+                Order.updated_at,
+                OrderItem.id.label("line_id"),
+                OrderItem.stock_item_id,
+                StockItem.name,
+                OrderItem.quantity,
+                OrderItem.unit_price,
+            )
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(StockItem, StockItem.id == OrderItem.stock_item_id)
+            .order_by(Order.id, OrderItem.id)
+        )
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        if status is not None:
+            stmt = stmt.where(Order.status == status)
+
+        result = db.session.execute(
+            stmt.execution_options(stream_results=True, yield_per=batch_size)
+        )
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    @staticmethod
+    def iter_export_orders(
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream every order as a summary dict with its items.
+
+        Groups the rows of iter_export_lines by order, so only one order is
+        held in memory at a time. Same context requirements as iter_export_lines.
+        """
+        current = None
+        for row in OrderService.iter_export_lines(user_id=user_id, status=status, batch_size=batch_size):
+            if current is None or current["id"] != row.order_id:
+                if current is not None:
+                    yield current
+                current = {
+                    "id": row.order_id,
+                    "po_number": row.po_number,
+                    "status": row.status,
+                    "user_id": row.user_id,
+                    "total_amount": float(row.total_amount or 0),
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                    "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+                    "items": [],
+                }
+            if row.line_id is not None:
+                current["items"].append(
+                    {
+                        "id": row.line_id,
+                        "stock_item_id": row.stock_item_id,
+                        "name": row.name,
+                        "quantity": row.quantity,
+                        "unit_price": float(row.unit_price),
+                        "total_price": float(row.quantity * row.unit_price),
+                    }
+                )
+        if current is not None:
+            yield current
+
+    @staticmethod
+    def _build_summaries(orders: List[Order]) -> List[Dict[str, Any]]:
+        """Serialize orders with their lines, loading every line in one joined query."""
+        items_by_order: Dict[int, List[Dict[str, Any]]] = {order.id: [] for order in orders}
+        if items_by_order:
+            rows = (
+                db.session.query(
+                    OrderItem.order_id,
+                    OrderItem.id,
+                    OrderItem.stock_item_id,
+                    StockItem.name,
+                    OrderItem.quantity,
+                    OrderItem.unit_price,
+                )
+                .join(StockItem, StockItem.id == OrderItem.stock_item_id)
+                .filter(OrderItem.order_id.in_(list(items_by_order)))
+                .order_by(OrderItem.order_id, OrderItem.id)
+                .all()
+            )
+            for row in rows:
+                items_by_order[row.order_id].append(
                     {
-                        "id": item.id,
-                        "stock_item_id": item.stock_item_id,
-                        "name": item.stock_item.name,
-                        "quantity": item.quantity,
-                        "unit_price": float(item.unit_price),
-                        "total_price": float(item.quantity * item.unit_price),
+                        "id": row.id,
+                        "stock_item_id": row.stock_item_id,
+                        "name": row.name,
+                        "quantity": row.quantity,
+                        "unit_price": float(row.unit_price),
+                        "total_price": float(row.quantity * row.unit_price),
                     }
                 )
 
-            return {
+        return [
+            {
                 "id": order.id,
                 "status": order.status,
                 "total_amount": float(order.total_amount),
                 "created_at": order.created_at.isoformat(),
                 "updated_at": order.updated_at.isoformat(),
-                "items": items,
+                "items": items_by_order[order.id],
             }
+            for order in orders
+        ]
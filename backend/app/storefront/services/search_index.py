@@ -0,0 +1,260 @@
+import re
+import threading
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens of a string."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Character trigrams of the normalized string, padded so short words still match."""
+    normalized = " ".join(tokenize(text))
+    if not normalized:
+        return set()
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def raw_trigrams(text: Optional[str]) -> Set[str]:
+    """Unpadded trigrams of the lowercased string, as used for substring lookups."""
+    lowered = (text or "").lower()
+    return {lowered[i:i + 3] for i in range(len(lowered) - 2)}
+
+
+class CatalogEntry:
+    """Snapshot of the StockItem columns needed for search and ranking."""
+
+    __slots__ = (
+        "id", "name", "description", "list_price", "quantity",
+        "name_lower", "description_lower", "name_tokens", "name_trigrams",
+    )
+
+    def __init__(self, id: int, name: str, description: Optional[str], list_price: float, quantity: int):
+        self.id = id
+        self.name = name
+        self.description = description or ""
+        self.list_price = float(list_price)
+        self.quantity = int(quantity)
+        self.name_lower = name.lower()
+        self.description_lower = self.description.lower()
+        self.name_tokens = set(tokenize(name))
+        self.name_trigrams = trigrams(name)
+
+    @classmethod
+    def from_stock_item(cls, item) -> "CatalogEntry":
+        return cls(item.id, item.name, item.description, item.list_price, item.quantity)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "list_price": self.list_price,
+            "quantity": self.quantity,
+        }
+
+    def matches_filters(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+    ) -> bool:
+        if min_price is not None and self.list_price < min_price:
+            return False
+        if max_price is not None and self.list_price > max_price:
+            return False
+        if in_stock and self.quantity <= 0:
+            return False
+        return True
+
+
+class CatalogIndex:
+    """In-memory catalog with token and character-trigram inverted indexes.
+
+    Two kinds of lookup are supported:
+    - substring search over name and description, equivalent to
+      ``ILIKE '%term%'``, answered by intersecting trigram postings and
+      verifying the survivors, with a difflib-style fuzzy fallback that only
+      compares against entries sharing trigrams with the term;
+    - ranked matching of free-text item names, combining character-trigram
+      overlap (robust to typos and word order) with the fraction of query
+      tokens found in the entry name (rewards exact words like brand and color).
+
+    The index is per process; callers keep it current through upsert/remove.
+    """
+
+    def __init__(self, entries: Iterable[CatalogEntry] = ()):
+        self._lock = threading.RLock()
+        self._entries: Dict[int, CatalogEntry] = {}
+        # Raw trigrams of name and description -> ids, for substring search
+        self._text_postings: Dict[str, Set[int]] = {}
+        # Normalized name trigrams and name tokens -> ids, for ranked matching
+        self._name_postings: Dict[str, Set[int]] = {}
+        self._token_postings: Dict[str, Set[int]] = {}
+        for entry in entries:
+            self._add(entry)
+
+    @classmethod
+    def from_stock_items(cls, items) -> "CatalogIndex":
+        return cls(CatalogEntry.from_stock_item(item) for item in items)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, item_id: int) -> Optional[CatalogEntry]:
+        return self._entries.get(item_id)
+
+    def _postings_for(self, entry: CatalogEntry):
+        yield self._text_postings, raw_trigrams(entry.name) | raw_trigrams(entry.description)
+        yield self._name_postings, entry.name_trigrams
+        yield self._token_postings, entry.name_tokens
+
+    def _add(self, entry: CatalogEntry) -> None:
+        self._entries[entry.id] = entry
+        for postings, keys in self._postings_for(entry):
+            for key in keys:
+                postings.setdefault(key, set()).add(entry.id)
+
+    def _discard(self, item_id: int) -> None:
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        for postings, keys in self._postings_for(entry):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(item_id)
+                    if not ids:
+                        del postings[key]
+
+    def upsert(self, item) -> None:
+        """Add or replace the entry for a StockItem."""
+        entry = CatalogEntry.from_stock_item(item)
+        with self._lock:
+            self._discard(entry.id)
+            self._add(entry)
+
+    def remove(self, item_id: int) -> None:
+        with self._lock:
+            self._discard(item_id)
+
+    def adjust_quantity(self, item_id: int, delta: int) -> None:
+        """Apply a committed stock change without re-indexing the entry."""
+        with self._lock:
+            entry = self._entries.get(item_id)
+            if entry is not None:
+                entry.quantity += delta
+
+    def filter(
+        self,
+        search: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+        fuzzy: bool = True,
+        fuzzy_limit: int = 5,
+        fuzzy_cutoff: float = 0.5,
+    ) -> List[CatalogEntry]:
+        """Entries whose name or description contains the search term, sorted by name.
+
+        If nothing contains the term and fuzzy is set, falls back to the entries
+        whose name or description is most similar to it (like
+        ``difflib.get_close_matches``). Price and stock filters apply in both cases.
+        """
+        with self._lock:
+            if not search:
+                matched = [e for e in self._entries.values() if e.matches_filters(min_price, max_price, in_stock)]
+                return sorted(matched, key=lambda e: e.name)
+
+            term = search.lower()
+            grams = raw_trigrams(term)
+            if grams:
+                postings = sorted((self._text_postings.get(g, set()) for g in grams), key=len)
+                candidate_ids = set(postings[0]).intersection(*postings[1:])
+                candidates = [self._entries[i] for i in candidate_ids]
+            else:
+                # Terms under three characters cannot use the trigram index
+                candidates = list(self._entries.values())
+            matched = [
+                e for e in candidates
+                if (term in e.name_lower or term in e.description_lower)
+                and e.matches_filters(min_price, max_price, in_stock)
+            ]
+            if matched or not fuzzy:
+                return sorted(matched, key=lambda e: e.name)
+
+            return [
+                e for e in self._close_matches(term, grams, fuzzy_limit, fuzzy_cutoff)
+                if e.matches_filters(min_price, max_price, in_stock)
+            ]
+
+    def _close_matches(self, term: str, grams: Set[str], n: int, cutoff: float) -> List[CatalogEntry]:
+        """Entries whose name or description is among the n closest to the term."""
+        shared = Counter()
+        for g in grams:
+            shared.update(self._text_postings.get(g, ()))
+        # Only entries sharing several trigrams can reach the similarity cutoff
+        shortlist = [self._entries[i] for i, _ in shared.most_common(max(50, n * 10))]
+        matcher = SequenceMatcher()
+        matcher.set_seq2(term)
+        scored_names, scored_descs = [], []
+        for entry in shortlist:
+            for text, scored in ((entry.name_lower, scored_names), (entry.description_lower, scored_descs)):
+                if not text:
+                    continue
+                matcher.set_seq1(text)
+                if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                    ratio = matcher.ratio()
+                    if ratio >= cutoff:
+                        scored.append((ratio, entry))
+        close = {}
+        for scored in (scored_names, scored_descs):
+            scored.sort(key=lambda r: r[0], reverse=True)
+            for _, entry in scored[:n]:
+                close[entry.id] = entry
+        return list(close.values())
+
+    @staticmethod
+    def score(query_tokens: Set[str], query_trigrams: Set[str], entry: CatalogEntry) -> float:
+        """Similarity in [0, 1] between a query and an entry name."""
+        if not query_trigrams or not entry.name_trigrams:
+            return 0.0
+        shared = len(query_trigrams & entry.name_trigrams)
+        dice = 2.0 * shared / (len(query_trigrams) + len(entry.name_trigrams))
+        recall = len(query_tokens & entry.name_tokens) / len(query_tokens) if query_tokens else 0.0
+        return 0.5 * dice + 0.5 * recall
+
+    def search_many(
+        self, queries: List[str], k: int = 3, min_score: float = 0.0
+    ) -> List[List[Tuple[CatalogEntry, float]]]:
+        """Rank the top-k entries for each query.
+
+        Only entries sharing a name trigram or token with a query are scored.
+        """
+        results = []
+        with self._lock:
+            for query in queries:
+                query_tokens, query_trigrams = set(tokenize(query)), trigrams(query)
+                candidate_ids: Set[int] = set()
+                for g in query_trigrams:
+                    candidate_ids.update(self._name_postings.get(g, ()))
+                for t in query_tokens:
+                    candidate_ids.update(self._token_postings.get(t, ()))
+                ranked = []
+                for item_id in candidate_ids:
+                    entry = self._entries[item_id]
+                    score = self.score(query_tokens, query_trigrams, entry)
+                    if score > 0.0 and score >= min_score:
+                        ranked.append((score, -entry.id, entry))
+                ranked.sort(key=lambda r: (r[0], r[1]), reverse=True)
+                results.append([(entry, score) for score, _, entry in ranked[:k]])
+        return results
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.0) -> List[Tuple[CatalogEntry, float]]:
+        return self.search_many([query], k=k, min_score=min_score)[0]
@@ -0,0 +1,49 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+ORDER_SUMMARY_CACHE_SIZE = int(os.environ.get("ORDER_SUMMARY_CACHE_SIZE", "10000"))
+
+
+class SummaryCache:
+    """Bounded LRU of serialized order summaries, keyed by order id.
+
+    Each entry remembers the order's version when it was built (see
+    OrderService.version_key). A lookup only hits if the caller's version
+    matches, so entries can't go stale even when another process (e.g. the
+    MCP server) writes the order; invalidate() just frees them early after
+    local writes. Writes that change a summary without bumping an updated_at
+    the version covers, such as raw SQL renaming a stock item, aren't seen.
+    """
+
+    def __init__(self, max_entries: int = ORDER_SUMMARY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[Any, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, order_id: int, version: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(order_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(order_id)
+            return entry[1]
+
+    def put(self, order_id: int, version: Any, summary: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[order_id] = (version, summary)
+            self._entries.move_to_end(order_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, order_id: Optional[int] = None) -> None:
+        """Drop one order's entry, or every entry when order_id is None."""
+        with self._lock:
+            if order_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(order_id, None)
@@ -0,0 +1 @@
+# Benchmarks for the agent pipeline and storefront services
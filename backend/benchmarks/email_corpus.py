@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic corpus of order emails from the live catalog.
+
+Each email picks its lines from the stock items in the database and varies
+the line count, quantities, line phrasing (numbered "5x ... @ $...", bullets,
+prose, tables), misspellings of product names, and surrounding noise (thread
+quotes, shipping notes, signatures). A share of the emails are not orders at
+all. Every email carries a Message-ID of the form <bench-NNNNNN@...>.
+
+manifest.json, written next to the emails, records per file whether it is an
+order and the expected lines (catalog id and name, quantity, and the name as
+written), so a benchmark can check results or answer extraction requests.
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.email_corpus --emails 2000 --out bench_emails
+    DATABASE_URL=postgresql://... PYTHONPATH=. python -m benchmarks.email_corpus --seed 7
+"""
+import argparse
+import json
+import random
+import re
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+MANIFEST = "manifest.json"
+MESSAGE_ID_RE = re.compile(r"<bench-(\d{6})@")
+
+FIRST_NAMES = ["Emily", "David", "Priya", "Marcus", "Sofia", "Liam", "Aisha", "Noah", "Mei", "Carlos", "Hannah", "Omar"]
+LAST_NAMES = ["Chen", "Miller", "Patel", "Johnson", "Garcia", "Nguyen", "Okafor", "Schmidt", "Rossi", "Kim", "Lopez", "Brown"]
+COMPANIES = [
+    "Creative Agency", "TechStart Inc", "Global Consulting", "Net Solutions", "Safe Homes", "Retail Store Co",
+    "Education Center", "Legal Consulting", "Blue Harbor Labs", "Summit Health", "Northwind Traders", "Apex Logistics",
+]
+CITIES = ["Seattle, WA 98101", "Portland, OR 97201", "Austin, TX 73301", "Denver, CO 80202", "Boston, MA 02108"]
+SUBJECTS = ["New Equipment Order", "Purchase Order", "Order Request", "Re: Quote follow-up - placing order", "Restock request"]
+GREETINGS = ["Hi there,", "Hello,", "Good morning,", "Hi team,", "Dear Sales Team,"]
+INTROS = [
+    "We'd like to place an order for the following items:",
+    "Please process the order below:",
+    "Following up on our call, here is what we need:",
+    "We're expanding the office and need the following:",
+    "Could you put together an order for:",
+]
+NOISE = [
+    "Please ship everything together if possible; our loading dock closes at 4pm.",
+    "Let me know if any of these are backordered and what the lead time would be.",
+    "P.S. The invoice should go to accounts@{domain}, not to me directly.",
+    "We'd appreciate a quote with any bulk discounts before you ship.",
+    "Our previous order arrived with a damaged box, so please pack carefully.",
+]
+NON_ORDER = [
+    ("Meeting next week", "Are you free Tuesday afternoon to go over next quarter's budget? Happy to come to your office."),
+    ("Invoice question", "We received invoice #{n} twice. Could you confirm which one we should pay?"),
+    ("Newsletter", "This month: new warehouse hours, a holiday schedule, and tips for managing office supplies."),
+    ("Out of office", "I'm out of the office until Monday with limited access to email."),
+    ("Return request", "One of the monitors from last month's delivery has a dead pixel. How do we start a return?"),
+]
+
+
+def load_catalog() -> List[Dict[str, Any]]:
+    """Every stock item in the configured database."""
+    from app import create_app
+    from app.database import db
+    from app.storefront.models import StockItem
+
+    app = create_app()
+    with app.app_context():
+        rows = db.session.query(StockItem.id, StockItem.name, StockItem.list_price).order_by(StockItem.id).all()
+    return [{"id": row.id, "name": row.name, "price": float(row.list_price or 0)} for row in rows]
+
+
+def split_name(name: str) -> Tuple[str, str, Optional[str]]:
+    """"Pro Laptop (Black)" -> ("Pro Laptop", "Laptop", "Black")."""
+    match = re.match(r"^(.*?)\s*\(([^)]*)\)\s*$", name)
+    base, color = (match.group(1), match.group(2)) if match else (name, None)
+    words = base.split()
+    product = " ".join(words[1:]) if len(words) > 1 else base
+    return base, product, color
+
+
+def misspell(text: str, rng: random.Random) -> str:
+    """Introduce one typo (swap, drop or double a letter) in a word of text."""
+    words = text.split(" ")
+    candidates = [i for i, w in enumerate(words) if len(w) > 3 and w.isalpha()]
+    if not candidates:
+        return text
+    i = rng.choice(candidates)
+    w = words[i]
+    pos = rng.randrange(1, len(w) - 1)
+    kind = rng.random()
+    if kind < 0.4:
+        w = w[:pos] + w[pos + 1] + w[pos] + w[pos + 2:]
+    elif kind < 0.7:
+        w = w[:pos] + w[pos + 1:]
+    else:
+        w = w[:pos] + w[pos] + w[pos:]
+    words[i] = w
+    return " ".join(words)
+
+
+def line_count(rng: random.Random) -> int:
+    bucket = rng.random()
+    if bucket < 0.4:
+        return rng.randint(1, 3)
+    if bucket < 0.8:
+        return rng.randint(4, 8)
+    if bucket < 0.95:
+        return rng.randint(9, 20)
+    return rng.randint(21, 40)
+
+
+def quantity(rng: random.Random) -> int:
+    return rng.choice([1, 1, 1, 2, 2, 3, 4, 5, 5, 10, 10, 12, 20, 25, 50, 100])
+
+
+def render_lines(lines: List[Dict[str, Any]], rng: random.Random) -> str:
+    """Render the order lines in one of several styles."""
+    style = rng.choice(["numbered", "numbered", "bullets", "prose", "table", "qty"])
+    out = []
+    if style == "table":
+        out += ["| Item | Qty | Unit price |", "|------|-----|------------|"]
+    for n, line in enumerate(lines, 1):
+        written, qty, price = line["written_as"], line["quantity"], line["price"]
+        base, product, color = split_name(written)
+        if style == "numbered":
+            out.append(f"{n}. {qty}x {product} - {written} @ ${price:,.2f} each")
+        elif style == "bullets":
+            out.append(f"- {written} x {qty}")
+        elif style == "prose":
+            if color and rng.random() < 0.5:
+                out.append(f"We also need {qty} of the {base} in {color.lower()}.")
+            else:
+                out.append(f"Please add {qty} {written}.")
+        elif style == "table":
+            out.append(f"| {written} | {qty} | ${price:,.2f} |")
+        else:
+            out.append(f"Qty {qty}: {written}")
+    return "\n".join(out)
+
+
+def render_email(n: int, rng: random.Random, lines: Optional[List[Dict[str, Any]]], day: date) -> str:
+    first, last, company = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(COMPANIES)
+    domain = re.sub(r"[^a-z]", "", company.lower()) + rng.choice([".com", ".io", ".org"])
+    sender = f"{first.lower()}.{last.lower()}@{domain}"
+    if lines is None:
+        subject, body = rng.choice(NON_ORDER)
+        body = body.format(n=rng.randint(10000, 99999))
+    else:
+        subject = rng.choice(SUBJECTS)
+        parts = [rng.choice(INTROS), "", render_lines(lines, rng)]
+        if rng.random() < 0.6:
+            parts += ["", rng.choice(NOISE).format(domain=domain)]
+        if rng.random() < 0.3:
+            parts += ["", "Please ship to:", company, f"Attn: {first} {last}", f"{rng.randint(100, 9999)} Main Street", rng.choice(CITIES)]
+        body = "\n".join(parts)
+    email = [
+        f"# {subject}",
+        "",
+        f"**From:** {sender}  ",
+        f"**To:** orders@yourcompany.com  ",
+        f"**Date:** {day.isoformat()}  ",
+        f"**Subject:** {subject}  ",
+        f"**Message-ID:** <bench-{n:06d}@{domain}>",
+        "",
+        rng.choice(GREETINGS),
+        "",
+        body,
+        "",
+        "Thanks,  ",
+        f"{first} {last}  ",
+        company,
+    ]
+    if rng.random() < 0.15:
+        email += ["", f"> On {(day - timedelta(days=3)).isoformat()}, orders@yourcompany.com wrote:", "> Thanks for your interest! Let us know what you need."]
+    return "\n".join(email) + "\n"
+
+
+def generate(
+    out_dir: Path,
+    emails: int,
+    catalog: List[Dict[str, Any]],
+    seed: int = 7,
+    typo_rate: float = 0.15,
+    noise_rate: float = 0.1,
+) -> Dict[str, Any]:
+    """
+    Write the corpus and its manifest.
+
+    Args:
+        out_dir: Directory for the .md files and manifest.json.
+        emails: Number of emails to write.
+        catalog: Stock items ({"id", "name", "price"}) to draw lines from.
+        seed: Random seed; the same seed and catalog give the same corpus.
+        typo_rate: Chance that a line's product name is misspelled.
+        noise_rate: Share of emails that are not orders.
+    Returns:
+        Dict[str, Any]: The manifest, keyed by file name.
+    """
+    if not catalog:
+        raise ValueError("The catalog is empty; seed the database first (python app/storefront/seed.py)")
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest: Dict[str, Any] = {}
+    start = date(2025, 7, 1)
+    for n in range(1, emails + 1):
+        lines = None
+        if rng.random() >= noise_rate:
+            picks = rng.sample(catalog, min(line_count(rng), len(catalog)))
+            lines = [
+                {
+                    "stock_item_id": item["id"],
+                    "name": item["name"],
+                    "quantity": quantity(rng),
+                    "price": item["price"],
+                    "written_as": misspell(item["name"], rng) if rng.random() < typo_rate else item["name"],
+                }
+                for item in picks
+            ]
+        name = f"bench_{n:06d}.md"
+        (out_dir / name).write_text(render_email(n, rng, lines, start + timedelta(days=n % 90)), encoding="utf-8")
+        manifest[name] = {
+            "message_id": n,
+            "order": lines is not None,
+            "items": [{k: v for k, v in line.items() if k != "price"} for line in lines or []],
+        }
+    (out_dir / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    return manifest
+
+
+def load_manifest(corpus_dir: Path) -> Dict[str, Any]:
+    return json.loads((corpus_dir / MANIFEST).read_text(encoding="utf-8"))
+
+
+def corpus_stats(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    orders = [entry for entry in manifest.values() if entry["order"]]
+    lines = [item for entry in orders for item in entry["items"]]
+    return {
+        "emails": len(manifest),
+        "orders": len(orders),
+        "non_orders": len(manifest) - len(orders),
+        "lines": len(lines),
+        "lines_per_order": round(len(lines) / len(orders), 2) if orders else 0.0,
+        "misspelled_lines": sum(1 for item in lines if item["written_as"] != item["name"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic order emails from the catalog.")
+    parser.add_argument("--emails", type=int, default=1000)
+    parser.add_argument("--out", type=Path, default=Path("bench_emails"))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--typo-rate", type=float, default=0.15)
+    parser.add_argument("--noise-rate", type=float, default=0.1)
+    args = parser.parse_args()
+    manifest = generate(args.out, args.emails, load_catalog(), args.seed, args.typo_rate, args.noise_rate)
+    print(f"Wrote {len(manifest)} emails to {args.out}: {json.dumps(corpus_stats(manifest))}")
+
+
+if __name__ == "__main__":
+    main()
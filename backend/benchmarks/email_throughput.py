@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput of the email workflow on a synthetic corpus.
+
+Pushes a generated corpus (benchmarks.email_corpus) through
+process_emails_batch with everything local:
+
+- LLM: an in-process FakeLLMServer that answers each extraction request with
+  the lines the corpus manifest recorded for that email (matched on its
+  Message-ID), after a configurable latency. Agents reach it through
+  LLM_BASE_URL.
+- MCP: the real MCP server, started as a subprocess on the same database.
+- Database: DATABASE_URL (a local SQLite file by default), seeded with the
+  catalog if it is empty.
+
+Reports emails/sec, LLM and tool calls per email, the fast-path extraction
+hit rate, p50/p95/p99 latency and the per-stage breakdown, and saves
+everything as JSON under bench_results/ so runs can be compared (--compare an
+earlier file; --no-fast-path sends every email to the LLM). The extraction
+cache starts empty unless --extraction-cache names a file to reuse.
+--stream-extraction streams LLM extractions and overlaps them with cart work;
+give the stand-in a generation speed (--llm-tokens-per-s) to see the effect.
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.email_throughput --emails 2000 --concurrency 16
+    PYTHONPATH=. python -m benchmarks.email_throughput --compare bench_results/<earlier>.json
+    DATABASE_URL=postgresql://... PYTHONPATH=. python -m benchmarks.email_throughput
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_throughput.db")
+
+from app.agents.LLM.fake_server import FakeLLMServer, chat_completion_body  # noqa: E402
+from benchmarks.email_corpus import (  # noqa: E402
+    MESSAGE_ID_RE, corpus_stats, generate, load_catalog, load_manifest,
+)
+
+MCP_HOST, MCP_PORT = "127.0.0.1", 8050
+RESULTS_DIR = Path("bench_results")
+
+
+class CorpusLLMServer(FakeLLMServer):
+    """Stand-in LLM that extracts exactly the lines the manifest recorded for each email."""
+
+    def __init__(self, manifest: Dict[str, Any], **kwargs):
+        super().__init__(**kwargs)
+        self.by_message_id = {entry["message_id"]: entry for entry in manifest.values()}
+
+    def handle(self, path: str, payload: dict) -> Optional[dict]:
+        if path.endswith("/chat/completions"):
+            prompt = " ".join(str(m.get("content", "")) for m in payload.get("messages", []))
+            match = MESSAGE_ID_RE.search(prompt)
+            entry = self.by_message_id.get(int(match.group(1))) if match else None
+            if entry is not None:
+                items = [{"name": item["written_as"], "quantity": item["quantity"]} for item in entry["items"]]
+                return chat_completion_body(payload.get("model", "fake-model"), json.dumps({"items": items}))
+        return super().handle(path, payload)
+
+
+def ensure_catalog() -> int:
+    """Create the tables and seed the catalog if the database has none."""
+    from app import create_app
+    from app.database import db
+    from app.storefront.models import StockItem
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        count = db.session.query(StockItem).count()
+    if count == 0:
+        from app.storefront.seed import seed
+        count = seed()
+    return count
+
+
+def port_open(host: str, port: int) -> bool:
+    with socket.socket() as sock:
+        sock.settimeout(0.5)
+        return sock.connect_ex((host, port)) == 0
+
+
+@contextlib.contextmanager
+def mcp_server(log_path: Path, timeout: float = 60.0):
+    """Run the MCP server as a subprocess for the duration of the block."""
+    if port_open(MCP_HOST, MCP_PORT):
+        raise RuntimeError(f"Port {MCP_PORT} is already in use; stop the running MCP server first")
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "app.agents.MCP.server"],
+            stdout=log, stderr=subprocess.STDOUT,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))},
+        )
+        try:
+            deadline = time.monotonic() + timeout
+            while not port_open(MCP_HOST, MCP_PORT):
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"MCP server did not start; see {log_path}")
+                time.sleep(0.2)
+            yield proc
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def summarize(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Headline figures of a process_emails_batch report."""
+    counts = report.get("workflow", {}).get("counts", {})
+    per_email = lambda name: counts.get(name, {}).get("per_email", 0.0)  # noqa: E731
+    return {
+        "emails": report["emails"],
+        "succeeded": report["succeeded"],
+        "emails_per_sec": report["emails_per_sec"],
+        "llm_calls_per_email": per_email("llm_calls"),
+        "tool_calls_per_email": per_email("tool_calls"),
+        "fallbacks_per_email": per_email("fallbacks"),
+        "fast_path_hit_rate": report.get("workflow", {}).get("fast_path_hit_rate"),
+        "extraction_cache_hit_rate": report.get("workflow", {}).get("extraction_cache_hit_rate"),
+        "p50_s": report["p50_s"],
+        "p95_s": report["p95_s"],
+        "p99_s": report["p99_s"],
+    }
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> str:
+    lines = [f"{'metric':<22} {'previous':>10} {'current':>10} {'change':>8}"]
+    for key, value in current.items():
+        before = previous.get(key)
+        if not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+            continue
+        change = f"{(value - before) / before * 100:+.1f}%" if before else "n/a"
+        lines.append(f"{key:<22} {before:>10} {value:>10} {change:>8}")
+    return "\n".join(lines)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    catalog_size = ensure_catalog()
+    corpus = args.corpus
+    if not (corpus / "manifest.json").exists():
+        print(f"Generating {args.emails} emails in {corpus}...")
+        generate(corpus, args.emails, load_catalog(), seed=args.seed)
+    manifest = load_manifest(corpus)
+
+    with CorpusLLMServer(manifest, latency=args.llm_latency, tokens_per_s=args.llm_tokens_per_s) as llm, tempfile.TemporaryDirectory() as scratch:
+        # Read at import by the agent modules: a fresh ledger so every email is unprocessed
+        os.environ["LLM_BASE_URL"] = llm.base_url
+        os.environ["EMAIL_LEDGER_PATH"] = str(Path(scratch) / "ledger.db")
+        os.environ["EXTRACTION_CACHE_PATH"] = str(args.extraction_cache or Path(scratch) / "extraction_cache.db")
+        if args.no_fast_path:
+            os.environ["FAST_EXTRACT"] = "false"
+        if args.stream_extraction:
+            os.environ["STREAM_EXTRACTION"] = "true"
+        from app.agents.process_emails import process_emails_batch
+
+        with mcp_server(Path(scratch) / "mcp.log"):
+            logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+            with contextlib.ExitStack() as stack:
+                if not args.verbose:
+                    # The workflow prints every step of every email
+                    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+                report = asyncio.run(process_emails_batch(corpus, args.concurrency, args.pool_size))
+        if report is None:
+            raise RuntimeError("The batch run produced no report; rerun with --verbose")
+        llm_requests = llm.request_count
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "concurrency": args.concurrency,
+            "pool_size": args.pool_size,
+            "llm_latency_s": args.llm_latency,
+            "llm_tokens_per_s": args.llm_tokens_per_s,
+            "fast_path": not args.no_fast_path,
+            "stream_extraction": args.stream_extraction,
+            "extraction_cache": str(args.extraction_cache) if args.extraction_cache else None,
+            "database": os.environ["DATABASE_URL"].split("://", 1)[0],
+            "catalog_size": catalog_size,
+            "python": platform.python_version(),
+        },
+        "corpus": {"dir": str(corpus), "seed": args.seed, **corpus_stats(manifest)},
+        "summary": {**summarize(report), "llm_requests": llm_requests},
+        "report": report,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end email throughput benchmark.")
+    parser.add_argument("--emails", type=int, default=500, help="Corpus size if it has to be generated")
+    parser.add_argument("--corpus", type=Path, default=Path("bench_emails"))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stand-in LLM call")
+    parser.add_argument("--llm-tokens-per-s", type=float, help="Stand-in LLM generation speed (default instant)")
+    parser.add_argument("--stream-extraction", action="store_true", help="Stream extractions and overlap cart work")
+    parser.add_argument("--no-fast-path", action="store_true", help="Extract every email with the LLM")
+    parser.add_argument("--extraction-cache", type=Path, help="Extraction cache file to reuse across runs")
+    parser.add_argument("--out", type=Path, help="Result file (default bench_results/throughput-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep the workflow's own output")
+    args = parser.parse_args()
+
+    result = run(args)
+    out = args.out or RESULTS_DIR / f"throughput-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    summary = result["summary"]
+    print(
+        f"{summary['emails']} emails ({summary['succeeded']} ok) at {summary['emails_per_sec']} emails/sec, "
+        f"concurrency {args.concurrency}, LLM latency {args.llm_latency}s\n"
+        f"LLM calls/email {summary['llm_calls_per_email']}, tool calls/email {summary['tool_calls_per_email']}, "
+        f"fallbacks/email {summary['fallbacks_per_email']}, fast-path hit rate {summary['fast_path_hit_rate']}, "
+        f"extraction cache hit rate {summary['extraction_cache_hit_rate']}\n"
+        f"Latency p50 {summary['p50_s']}s  p95 {summary['p95_s']}s  p99 {summary['p99_s']}s\n"
+        f"Saved {out}"
+    )
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(compare(summary, previous.get("summary", {})))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized FuzzyMatcher against difflib on synthetic catalogs.
+
+For each catalog size this reports the matcher build time, the latency of a
+single query, and the latency of one batched call for a typical email's worth
+of item names. difflib.get_close_matches over every name (the old fallback) is
+timed too, up to --difflib-max SKUs, since it grows linearly and gets slow.
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.fuzzy_matcher --skus 10000 100000 1000000
+"""
+import argparse
+import random
+import time
+from difflib import get_close_matches
+from typing import Any, Dict, List
+
+from app.storefront.services.fuzzy_matcher import FuzzyMatcher
+
+PRODUCTS = [
+    "Laptop", "Smartphone", "Tablet", "Monitor", "Keyboard", "Mouse", "Headphones",
+    "Desk Chair", "Standing Desk", "File Cabinet", "Network Switch", "Wireless AP",
+    "Patch Panel", "Surveillance Camera", "NVR System", "Conference Phone", "PTZ Camera",
+    "USB Hub", "Laptop Stand", "Wireless Charger",
+]
+BRANDS = ['Pro', 'Elite', 'Business', 'Enterprise', 'Premium', 'Advanced', 'Ultra', 'Max', 'Plus', 'Turbo']
+COLORS = ['Black', 'White', 'Silver', 'Gray', 'Blue', 'Red']
+
+# Misspelled and reordered names, like the ones extracted from emails
+QUERIES = [
+    "Elite Laptp (Black)", "business monitor 27 black", "Pro Netwrk Switch",
+    "Ergonomic Desk Chair Black", "survelance camera 4k", "Turbo USB hub white",
+    "conference phone", "Max Wireles Charger", "Premium standing desk", "PTZ camra",
+]
+
+
+def build_catalog(skus: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(BRANDS)} {rng.choice(PRODUCTS)} ({rng.choice(COLORS)}) {i:07d}"
+        for i in range(skus)
+    ]
+
+
+def main(sizes: List[int], difflib_max: int) -> List[Dict[str, Any]]:
+    rows = []
+    for skus in sizes:
+        names = build_catalog(skus)
+
+        started = time.perf_counter()
+        matcher = FuzzyMatcher(list(range(skus)), names)
+        build_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matcher.match_one(QUERIES[0], k=5)
+        single_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        matcher.match(QUERIES, k=5)
+        batch_ms = (time.perf_counter() - started) * 1000
+
+        row = {"skus": skus, "build_s": round(build_s, 2), "single_ms": round(single_ms, 2),
+               "batch_ms": round(batch_ms, 2), "batch_size": len(QUERIES)}
+        line = (f"skus={skus:<8} build {build_s:7.2f}s | single {single_ms:8.2f}ms | "
+                f"batch of {len(QUERIES)} {batch_ms:8.2f}ms")
+        if skus <= difflib_max:
+            started = time.perf_counter()
+            get_close_matches(QUERIES[0], names, n=5, cutoff=0.5)
+            row["difflib_single_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            line += f" | difflib single {row['difflib_single_ms']:9.2f}ms"
+        print(line)
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--difflib-max", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.skus, args.difflib_max)
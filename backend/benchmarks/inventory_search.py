@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compare InventoryService.list_stock_items search backends.
+
+Loads a synthetic catalog into a local database (SQLite by default) and times
+the same queries through the "sql" path (ILIKE + difflib fallback), the
+"memory" path (in-process token/trigram index) and the "trigram" path
+(pg_trgm similarity; only distinct from "memory" on Postgres with the
+extension installed). Queries mix substring hits, price/stock filters and
+misspellings that fall through to fuzzy matching.
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.inventory_search --skus 10000 50000
+    DATABASE_URL=postgresql://... PYTHONPATH=. python -m benchmarks.inventory_search --backends sql trigram
+
+Note: the benchmark drops and recreates all tables in the target database.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from app import create_app  # noqa: E402
+from app.database import db  # noqa: E402
+from app.storefront.models import StockItem  # noqa: E402
+from app.storefront.services.inventory import InventoryService  # noqa: E402
+
+PRODUCTS = [
+    ("Laptop", "High-performance business laptop"),
+    ("Monitor", "27-inch 4K monitor"),
+    ("Network Switch", "24-port gigabit switch"),
+    ("Desk Chair", "Ergonomic office chair"),
+    ("Surveillance Camera", "4K IP camera"),
+    ("Conference Phone", "Full-duplex speakerphone"),
+    ("Wireless Charger", "Qi-certified charger"),
+    ("Ethernet Cable", "Cat6, 25ft"),
+]
+BRANDS = ['Pro', 'Elite', 'Business', 'Enterprise', 'Premium', 'Advanced', 'Ultra', 'Max', 'Plus', 'Turbo']
+COLORS = ['Black', 'White', 'Silver', 'Gray', 'Blue', 'Red']
+
+# (search, filters) pairs; the last two only match through the fuzzy fallback
+QUERIES = [
+    ("Laptop", {}),
+    ("Elite Monitor", {}),
+    ("gigabit", {"in_stock": True}),
+    ("Chair", {"min_price": 100, "max_price": 300}),
+    ("Survelance Camera", {}),
+    ("Wirless Chargr", {}),
+]
+
+
+def load_catalog(skus: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(skus):
+        product, desc = PRODUCTS[i % len(PRODUCTS)]
+        brand, color = rng.choice(BRANDS), rng.choice(COLORS)
+        rows.append({
+            "name": f"{brand} {product} ({color}) {i:07d}",
+            "description": f"{desc} - {color} {brand} edition",
+            "cost": round(rng.uniform(5, 500), 2),
+            "list_price": round(rng.uniform(10, 1000), 2),
+            "quantity": rng.randint(0, 100),
+        })
+    db.session.bulk_insert_mappings(StockItem, rows)
+    db.session.commit()
+
+
+def time_backend(backend: str, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        for search, filters in QUERIES:
+            started = time.perf_counter()
+            InventoryService.list_stock_items(search=search, backend=backend, **filters)
+            timings.append(time.perf_counter() - started)
+    return {
+        "mean_ms": round(statistics.mean(timings) * 1000, 2),
+        "max_ms": round(max(timings) * 1000, 2),
+    }
+
+
+def main(sizes: List[int], repeat: int, backends: List[str]) -> List[Dict[str, Any]]:
+    app = create_app()
+    rows = []
+    with app.app_context():
+        for skus in sizes:
+            db.drop_all()
+            db.create_all()
+            load_catalog(skus)
+
+            started = time.perf_counter()
+            InventoryService.get_catalog_index(refresh=True)
+            build_s = time.perf_counter() - started
+
+            row = {"skus": skus, "index_build_s": round(build_s, 2)}
+            print(f"skus={skus:<8} index build {build_s:6.2f}s")
+            for backend in backends:
+                row[backend] = timing = time_backend(backend, repeat)
+                print(f"  {backend:>8} mean {timing['mean_ms']:9.2f}ms max {timing['max_ms']:9.2f}ms")
+            rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", default=["sql", "memory", "trigram"])
+    args = parser.parse_args()
+    main(args.skus, args.repeat, args.backends)
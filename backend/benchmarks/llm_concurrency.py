@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark item extraction throughput against a local fake LLM server.
+
+Runs the same batch of OrchestratorAgent.extract_items calls at increasing
+concurrency levels with three client setups:
+- blocking: synchronous OpenAI client called directly on the event loop
+  (the old behaviour, for reference)
+- threaded: synchronous OpenAI client offloaded onto the LLM thread pool
+- async: AsyncOpenAI client awaited directly
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.llm_concurrency --emails 64 --latency 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from typing import Any, Dict, List
+
+from openai import AsyncOpenAI, OpenAI  # type: ignore
+
+from app.agents.LLM.fake_server import FakeLLMServer
+from app.agents.OrchestratorAgent import OrchestratorAgent
+
+SAMPLE_EMAIL = """Dear Sales Team,
+
+Please send the following:
+1. 10x Laptop - Elite Laptop (Black) @ $1,199.99 each
+2. 5x Network Switch - Pro 24-port gigabit switch @ $379.99 each
+"""
+
+
+async def _blocking_extract(agent: OrchestratorAgent, email: str) -> list:
+    # Calls the sync client on the event loop, like the old code path
+    response = agent.llm.chat.completions.create(
+        model=agent.model_name,
+        messages=[{"role": "user", "content": email}],
+        response_format={"type": "json_object"},
+        max_tokens=512,
+    )
+    return [response.choices[0].message.content]
+
+
+async def run_level(agent: OrchestratorAgent, emails: int, concurrency: int, blocking: bool) -> float:
+    """Run `emails` extractions with at most `concurrency` in flight; return emails/sec."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            if blocking:
+                await _blocking_extract(agent, SAMPLE_EMAIL)
+            else:
+                await agent.extract_items(SAMPLE_EMAIL)
+
+    started = time.perf_counter()
+    # extract_items logs every response; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one() for _ in range(emails)))
+    return emails / (time.perf_counter() - started)
+
+
+async def main(emails: int, latency: float, levels: List[int]) -> List[Dict[str, Any]]:
+    rows = []
+    with FakeLLMServer(latency=latency) as server:
+        clients = {
+            "blocking": OpenAI(base_url=server.base_url, api_key="fake", max_retries=0),
+            "threaded": OpenAI(base_url=server.base_url, api_key="fake", max_retries=0),
+            "async": AsyncOpenAI(base_url=server.base_url, api_key="fake", max_retries=0),
+        }
+        for mode, llm in clients.items():
+            agent = OrchestratorAgent(
+                dev_prompt="", mcp_client=None, llm=llm, messages=[], tools=[], model_name="fake-model"
+            )
+            for concurrency in levels:
+                eps = await run_level(agent, emails, concurrency, blocking=(mode == "blocking"))
+                rows.append({"mode": mode, "concurrency": concurrency, "emails_per_sec": round(eps, 2)})
+                print(f"{mode:>9}  concurrency={concurrency:<4} {eps:8.2f} emails/sec")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+    asyncio.run(main(args.emails, args.latency, args.levels))
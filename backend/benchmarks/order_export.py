@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Measure memory and throughput of the streaming order export.
+
+Loads synthetic orders with several lines each into a local database (SQLite
+by default), streams /api/orders/export through the Flask test client in
+NDJSON and CSV, and reports bytes, orders/sec and the peak Python memory
+allocated while streaming (tracemalloc). The peak should stay flat as the
+number of orders grows.
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.order_export --orders 10000 100000
+    DATABASE_URL=postgresql://... PYTHONPATH=. python -m benchmarks.order_export
+
+Note: the benchmark drops and recreates all tables in the target database.
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.database import db  # noqa: E402
+from app.storefront.models import Order, OrderItem, StockItem  # noqa: E402
+
+
+def load_orders(orders: int, lines: int, seed: int = 7, batch: int = 20000) -> None:
+    rng = random.Random(seed)
+    skus = 200
+    db.session.execute(insert(StockItem), [
+        {"name": f"Item {i:05d}", "description": "", "cost": 1, "list_price": 2, "quantity": 100}
+        for i in range(skus)
+    ])
+    for offset in range(0, orders, batch):
+        ids = range(offset + 1, min(offset + batch, orders) + 1)
+        db.session.execute(insert(Order), [
+            {"id": i, "po_number": f"PO{i:09d}", "status": "ready", "total_amount": lines * 2} for i in ids
+        ])
+        db.session.execute(insert(OrderItem), [
+            {"order_id": i, "stock_item_id": s, "quantity": 1, "unit_cost": 1, "unit_price": 2}
+            for i in ids
+            for s in rng.sample(range(1, skus + 1), lines)
+        ])
+        db.session.commit()
+
+
+def stream_export(client, export_format: str) -> Dict[str, Any]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(f"/api/orders/export?format={export_format}", buffered=False)
+    size = chunks = 0
+    for chunk in response.response:
+        size += len(chunk)
+        chunks += 1
+    response.close()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes": size, "chunks": chunks, "seconds": round(elapsed, 2), "peak_mb": round(peak / 1e6, 2)}
+
+
+def main(sizes: List[int], lines: int, formats: List[str]) -> List[Dict[str, Any]]:
+    app = create_app()
+    rows = []
+    with app.app_context():
+        client = app.test_client()
+        for orders in sizes:
+            db.drop_all()
+            db.create_all()
+            load_orders(orders, lines)
+            db.session.remove()
+            for export_format in formats:
+                result = stream_export(client, export_format)
+                row = {"orders": orders, "format": export_format, **result}
+                rows.append(row)
+                print(
+                    f"orders={orders:<9} {export_format:>6} {result['bytes'] / 1e6:9.1f}MB "
+                    f"{orders / max(result['seconds'], 1e-9):10.0f} orders/s  peak {result['peak_mb']:6.2f}MB"
+                )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--formats", nargs="+", default=["ndjson", "csv"])
+    args = parser.parse_args()
+    main(args.orders, args.lines, args.formats)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare OFFSET and keyset pagination of orders at increasing page depths.
+
+Loads synthetic orders (1M by default) into a local database (SQLite by
+default) and times fetching one page at several depths, both with
+OFFSET/LIMIT and through OrderService.list_orders with a (created_at, id)
+cursor, with and without a status filter.
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.order_pagination --orders 1000000
+    DATABASE_URL=postgresql://... PYTHONPATH=. python -m benchmarks.order_pagination
+
+Note: the benchmark drops and recreates all tables in the target database.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.database import db  # noqa: E402
+from app.storefront.models import Order  # noqa: E402
+from app.storefront.services.order import OrderService  # noqa: E402
+
+STATUSES = ["draft", "ready", "submitted", "cancelled"]
+
+
+def load_orders(orders: int, seed: int = 7, batch: int = 50000) -> None:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for offset in range(0, orders, batch):
+        rows = [
+            {
+                "po_number": f"PO{i:09d}",
+                "status": rng.choice(STATUSES),
+                "total_amount": 0,
+                # Coarse timestamps so many orders share a created_at and the id tie-break matters
+                "created_at": start + timedelta(seconds=i // 3),
+                "updated_at": start + timedelta(seconds=i // 3),
+            }
+            for i in range(offset, min(offset + batch, orders))
+        ]
+        db.session.execute(insert(Order), rows)
+        db.session.commit()
+
+
+def offset_page(status: Optional[str], depth: int, limit: int) -> List[Order]:
+    query = Order.query
+    if status is not None:
+        query = query.filter_by(status=status)
+    return query.order_by(Order.created_at.desc(), Order.id.desc()).offset(depth).limit(limit).all()
+
+
+def cursor_at(status: Optional[str], depth: int) -> Optional[str]:
+    """Cursor for the order just before the given depth (computed once, untimed)."""
+    previous = offset_page(status, depth - 1, 1)
+    return OrderService.encode_cursor(previous[0].created_at, previous[0].id) if previous else None
+
+
+def timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        db.session.expire_all()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def main(orders: int, depths: List[int], limit: int, repeat: int) -> List[Dict[str, Any]]:
+    app = create_app()
+    rows = []
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        load_orders(orders)
+        print(f"loaded {orders} orders in {time.perf_counter() - started:.1f}s")
+
+        for status in (None, "ready"):
+            for depth in depths:
+                cursor = cursor_at(status, depth) if depth else None
+                if depth and cursor is None:
+                    continue  # fewer matching orders than this depth
+                same = [o.id for o in offset_page(status, depth, limit)] == [
+                    o.id for o in OrderService.list_orders(status=status, limit=limit, cursor=cursor)
+                ]
+                row = {
+                    "status": status or "*",
+                    "depth": depth,
+                    "offset_ms": timed(lambda: offset_page(status, depth, limit), repeat),
+                    "keyset_ms": timed(lambda: OrderService.list_orders(status=status, limit=limit, cursor=cursor), repeat),
+                    "same_page": same,
+                }
+                rows.append(row)
+                print(
+                    f"status={row['status']:<6} depth={depth:<8} offset {row['offset_ms']:9.2f}ms"
+                    f"   keyset {row['keyset_ms']:7.2f}ms   same page: {same}"
+                )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10000, 100000, 500000, 900000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.orders, args.depths, args.limit, args.repeat)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Count queries and time GET /api/orders style summary pages.
+
+Seeds orders with several lines each into a local database (SQLite by default)
+and compares the per-order loop (list_orders + get_order_summary for each
+order) with OrderService.list_order_summaries. The batched path issues the
+same number of queries for every page size; tests/test_order_summaries.py
+checks that.
+
+Usage:
+    PYTHONPATH=. python -m benchmarks.order_summaries --orders 1000 --lines 10
+
+Note: the benchmark drops and recreates all tables in the target database.
+"""
+import argparse
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.database import db  # noqa: E402
+from app.storefront.models import Order, OrderItem, StockItem  # noqa: E402
+from app.storefront.services.order import OrderService  # noqa: E402
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def load_orders(orders: int, lines: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    skus = max(lines * 5, 50)
+    db.session.bulk_insert_mappings(StockItem, [
+        {"name": f"Item {i:05d}", "description": "", "cost": 1, "list_price": 2, "quantity": 100}
+        for i in range(skus)
+    ])
+    db.session.bulk_insert_mappings(Order, [
+        {"status": "ready", "total_amount": lines * 2} for _ in range(orders)
+    ])
+    db.session.flush()
+    order_ids = [i for (i,) in db.session.query(Order.id)]
+    stock_ids = [i for (i,) in db.session.query(StockItem.id)]
+    db.session.bulk_insert_mappings(OrderItem, [
+        {"order_id": order_id, "stock_item_id": stock_id, "quantity": 1, "unit_cost": 1, "unit_price": 2}
+        for order_id in order_ids
+        for stock_id in rng.sample(stock_ids, lines)
+    ])
+    db.session.commit()
+
+
+def per_order_summaries(limit: int) -> List[Dict[str, Any]]:
+    return [OrderService.get_order_summary(o.id) for o in OrderService.list_orders(limit=limit)]
+
+
+def measure(fn, engine, limit: int) -> Dict[str, Any]:
+    db.session.expire_all()
+    # Measure cold builds, not the summary cache
+    OrderService.invalidate_summaries()
+    with QueryCounter(engine) as counter:
+        started = time.perf_counter()
+        fn(limit=limit)
+        elapsed = time.perf_counter() - started
+    return {"queries": counter.count, "ms": round(elapsed * 1000, 2)}
+
+
+def main(orders: int, lines: int, pages: List[int]) -> None:
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        load_orders(orders, lines)
+        engine = db.engine
+
+        for limit in pages:
+            loop = measure(per_order_summaries, engine, limit)
+            batched = measure(OrderService.list_order_summaries, engine, limit)
+            print(
+                f"page={limit:<5} per-order {loop['queries']:5d} queries {loop['ms']:9.2f}ms"
+                f"   batched {batched['queries']:3d} queries {batched['ms']:9.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=10)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100])
+    args = parser.parse_args()
+    main(args.orders, args.lines, args.pages)
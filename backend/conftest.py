@@ -0,0 +1,5 @@
+"""Makes the app package importable when pytest is run from another directory, e.g. the repo root."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
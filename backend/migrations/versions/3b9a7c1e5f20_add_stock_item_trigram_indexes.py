@@ -0,0 +1,71 @@
+"""Add pg_trgm GIN indexes on stock item name and description
+
+Revision ID: 3b9a7c1e5f20
+Revises: d6e4cb1f4749
+Create Date: 2026-10-17 09:00:00.000000
+
+Creating pg_trgm needs a role allowed to create extensions, which managed
+Postgres services and app roles often aren't. Without it the indexes are
+skipped with a warning and inventory search keeps using the memory backend
+(see InventoryService.list_stock_items); the warning prints the statements to
+run once a superuser has installed the extension.
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9a7c1e5f20'
+down_revision = 'd6e4cb1f4749'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.env')
+
+INDEXES = (
+    ('ix_stock_items_name_trgm', 'name'),
+    ('ix_stock_items_description_trgm', 'description'),
+)
+
+
+def _pg_trgm_installed(bind) -> bool:
+    """Install pg_trgm if it is missing; False if this role may not."""
+    if bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar():
+        return True
+    try:
+        # A savepoint, so a refusal doesn't abort the rest of the upgrade
+        with bind.begin_nested():
+            bind.execute(sa.text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    except sa.exc.DBAPIError as e:
+        statements = '; '.join(
+            f'CREATE INDEX {name} ON stock_items USING gin ({column} gin_trgm_ops)'
+            for name, column in INDEXES
+        )
+        logger.warning(
+            'Skipping the stock item trigram indexes: could not create the pg_trgm extension (%s). '
+            'Inventory search falls back to the memory backend. To enable trigram search, have a '
+            'superuser run CREATE EXTENSION pg_trgm, then run: %s',
+            str(e.orig).strip(), statements,
+        )
+        return False
+    return True
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql' and not _pg_trgm_installed(bind):
+        return
+    # Outside Postgres the postgresql_* options are ignored and plain indexes are built
+    for name, column in INDEXES:
+        op.create_index(
+            name, 'stock_items', [column],
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade():
+    # The indexes are missing if the upgrade couldn't install pg_trgm
+    for name, _ in reversed(INDEXES):
+        op.execute(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,47 @@
+"""Unique order line per (order_id, stock_item_id)
+
+Revision ID: c4d8e2a91b37
+Revises: 3b9a7c1e5f20
+Create Date: 2026-10-17 10:00:00.000000
+
+Duplicate lines are merged into the oldest one before the constraint is added.
+Run `flask reconcile-totals` afterwards if merged lines had different prices.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d8e2a91b37'
+down_revision = '3b9a7c1e5f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    duplicates = conn.execute(sa.text(
+        'SELECT order_id, stock_item_id, MIN(id), SUM(quantity) FROM order_items '
+        'GROUP BY order_id, stock_item_id HAVING COUNT(*) > 1'
+    )).fetchall()
+    for order_id, stock_item_id, keep_id, quantity in duplicates:
+        conn.execute(
+            sa.text('UPDATE order_items SET quantity = :quantity WHERE id = :keep_id'),
+            {'quantity': quantity, 'keep_id': keep_id},
+        )
+        conn.execute(
+            sa.text('DELETE FROM order_items WHERE order_id = :order_id '
+                    'AND stock_item_id = :stock_item_id AND id <> :keep_id'),
+            {'order_id': order_id, 'stock_item_id': stock_item_id, 'keep_id': keep_id},
+        )
+
+    with op.batch_alter_table('order_items') as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_order_items_order_stock', ['order_id', 'stock_item_id']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('order_items') as batch_op:
+        batch_op.drop_constraint('uq_order_items_order_stock', type_='unique')
@@ -0,0 +1,43 @@
+"""Order user_id foreign key and keyset pagination indexes
+
+Keyset pages compare (created_at, id) tuples, which never match a NULL
+created_at, so existing NULLs are backfilled and the column made NOT NULL.
+
+Revision ID: e7a5f3c20d14
+Revises: c4d8e2a91b37
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a5f3c20d14'
+down_revision = 'c4d8e2a91b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "UPDATE orders SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) "
+        "WHERE created_at IS NULL"
+    )
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_orders_user_id_users', 'users', ['user_id'], ['id'])
+        batch_op.create_index('ix_orders_user_id', ['user_id'])
+        batch_op.create_index('ix_orders_status_created_at_id', ['status', 'created_at', 'id'])
+        batch_op.create_index('ix_orders_created_at_id', ['created_at', 'id'])
+
+
+def downgrade():
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_index('ix_orders_created_at_id')
+        batch_op.drop_index('ix_orders_status_created_at_id')
+        batch_op.drop_index('ix_orders_user_id')
+        batch_op.drop_constraint('fk_orders_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
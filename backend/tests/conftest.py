@@ -0,0 +1,26 @@
+import os
+
+# The config reads DATABASE_URL at import time, so set it before anything imports app
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("TRACE_FILE", "")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """Flask app on a fresh schema in the test database."""
+    from app import create_app
+    from app.database import db
+    from app.storefront.services.inventory import InventoryService
+    from app.storefront.services.order import OrderService
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        OrderService.invalidate_summaries()
+        InventoryService._index_reset()
+        yield app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import httpx
+
+from app.agents.OrchestratorAgent import OrchestratorAgent
+
+LINES = [
+    {"stock_item_id": 7, "quantity": 2},
+    {"stock_item_id": "Pro Mouse (White)", "quantity": "3"},
+    {"stock_item_id": "mouse pro white", "quantity": 3},
+]
+
+
+class FakeMCP:
+    """MCP client that remembers add_items_to_cart batches like the server does.
+
+    `errors` are raised by successive add_items_to_cart calls; `applied` says
+    whether each of those calls reached the server and added its lines first.
+    """
+
+    def __init__(self, errors, applied):
+        self.errors = list(errors)
+        self.applied = list(applied)
+        self.batches = {}
+        self.added = []
+        self.calls = []
+
+    async def call_tool(self, name, arguments):
+        self.calls.append(name)
+        if name == "add_to_cart":
+            self.added.append(arguments["stock_item_id"])
+            return json.dumps({"msg": f"Item {arguments['stock_item_id']} added to cart"})
+        batch_id = arguments["batch_id"]
+        applies = self.applied.pop(0) if self.applied else True
+        if applies and batch_id not in self.batches:
+            self.added += [line["stock_item_id"] for line in arguments["items"]]
+            self.batches[batch_id] = {"results": [{"ok": True, "stock_item_id": 7 + i} for i in range(len(arguments["items"]))]}
+        if self.errors:
+            raise self.errors.pop(0)
+        return json.dumps(self.batches[batch_id])
+
+
+def add_lines(mcp):
+    agent = OrchestratorAgent("", mcp, None, [], [], model_name="test-model", extraction_cache=None)
+    flags, _ = asyncio.run(agent._add_lines(LINES, 1))
+    return flags
+
+
+def test_lost_reply_is_repeated_with_the_same_batch_and_adds_nothing_twice():
+    mcp = FakeMCP([httpx.ReadTimeout("timed out")], [True])
+    assert add_lines(mcp) == [True, True, True]
+    assert mcp.calls == ["add_items_to_cart", "add_items_to_cart"]
+    assert len(mcp.added) == len(LINES)
+
+
+def test_bulk_add_that_never_reached_the_server_is_retried_per_item():
+    mcp = FakeMCP([httpx.ConnectError("connection refused")], [False])
+    assert add_lines(mcp) == [True, True, True]
+    assert mcp.calls == ["add_items_to_cart"] + ["add_to_cart"] * 3
+    assert len(mcp.added) == len(LINES)
+
+
+def test_lines_are_not_retried_when_the_outcome_stays_unknown():
+    mcp = FakeMCP([httpx.ReadTimeout("timed out"), httpx.ConnectError("connection refused")], [True, False])
+    assert add_lines(mcp) == [None, None, None]
+    assert mcp.calls == ["add_items_to_cart", "add_items_to_cart"]
+    assert len(mcp.added) == len(LINES)
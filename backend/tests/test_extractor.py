@@ -0,0 +1,85 @@
+import pytest
+
+from app.agents.extractor import fast_extract, parse_line
+from app.database import db
+from app.storefront.models import StockItem
+from app.storefront.services.inventory import InventoryService
+
+CATALOG = [
+    ("Elite Ethernet Cable (White)", "Cat6, 25ft - White Elite edition", 12.65),
+    ("Max Patch Cable (Blue)", "Cat6, 3ft, 5-pack - Blue Max edition", 28.95),
+    ("Ultra Audio Cable (Gray)", "XLR cable, 25ft - Gray Ultra edition", 28.29),
+    ("Plus Laptop Stand (Silver)", "Adjustable aluminum stand - Silver color", 32.21),
+    ("Max Speaker Stand (White)", "Adjustable speaker stand - White Max edition", 67.90),
+    ("Elite Standing Desk (Gray)", "Electric height-adjustable desk - Gray Elite edition", 559.66),
+]
+
+
+def test_structured_list_is_accepted():
+    result = fast_extract(
+        "Hi team,\n\nPlease process the order below:\n\n"
+        "1. 2x Laptop - Elite Laptop (Black) @ $1,199.99 each\n"
+        "2. 3x Network Switch - Pro Network Switch (Gray) @ $399.99 each\n\n"
+        "Don't hesitate to call with questions.\n\nThanks,\nEmily"
+    )
+    assert result["accepted"], result["reason"]
+    assert [(item["name"], item["quantity"]) for item in result["items"]] == [
+        ("Elite Laptop (Black)", 2),
+        ("Pro Network Switch (Gray)", 3),
+    ]
+
+
+@pytest.mark.parametrize("correction", [
+    "But actually cancel the mouse.",
+    "Please remove the mouse from the order.",
+    "Make that 3 instead.",
+    "Don't send the mouse, we found one.",
+    "Please replace the mouse with the Elite model.",
+    "Never mind the mouse.",
+])
+def test_prose_correction_falls_back_to_the_llm(correction):
+    result = fast_extract(f"- Elite Laptop x 2\n- Mouse x 3\n{correction}")
+    assert not result["accepted"]
+    assert result["changes"] == [correction]
+
+
+def test_correction_at_the_start_of_an_item_line_falls_back():
+    result = fast_extract("- Elite Laptop x 2\n- Remove: Pro Mouse x 3")
+    assert not result["accepted"]
+
+
+def test_correction_in_a_table_email_falls_back():
+    result = fast_extract(
+        "| Item | Qty |\n|------|-----|\n| Elite Laptop (Black) | 2 |\n\n"
+        "Please switch the laptop to the silver one."
+    )
+    assert not result["accepted"]
+
+
+def test_parse_line_ignores_addresses():
+    assert parse_line("Austin, TX 78701") is None
+
+
+@pytest.mark.parametrize("line, catalog_name", [
+    # The right side only describes the item; the product type has to take part
+    ("3x Ethernet Cable - Cat6, 25ft", "Elite Ethernet Cable (White)"),
+    ("5x Laptop Stand - Adjustable stand", "Plus Laptop Stand (Silver)"),
+    # The right side is the catalog name
+    ("2x Laptop Stand - Plus Laptop Stand (Silver)", "Plus Laptop Stand (Silver)"),
+    # The quoted price picks among close matches
+    ("5x Stand - Adjustable stand @ $32.50 each", "Plus Laptop Stand (Silver)"),
+])
+def test_dash_lines_resolve_to_the_catalog_item(app, line, catalog_name):
+    for name, description, price in CATALOG:
+        db.session.add(StockItem(name=name, description=description, cost=1, list_price=price, quantity=50))
+    db.session.commit()
+    result = fast_extract(f"1. {line}")
+    assert result["accepted"], result["reason"]
+    item = result["items"][0]
+
+    # How add_items_to_cart resolves a name that isn't exact...
+    matches = InventoryService.fuzzy_match([item["name"]], k=3)[0]
+    assert InventoryService.prefer_quoted_price(matches, item.get("unit_price"))[0].name == catalog_name
+    # ...and how resolve_items ranks it for the fallback
+    candidates = InventoryService.resolve_items([item["name"]], unit_prices=[item.get("unit_price")])[0]
+    assert candidates[0]["name"] == catalog_name
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from app.monitoring.instruments import instrument_tool
+from app.monitoring.registry import registry
+
+
+def calls(tool, outcome):
+    line = f'mcp_tool_calls_total{{tool="{tool}",outcome="{outcome}"}} '
+    return next((float(row[len(line):]) for row in registry.render().splitlines() if row.startswith(line)), 0.0)
+
+
+@pytest.mark.parametrize("reply, outcome", [
+    ({"msg": "Item 3 added to cart"}, "ok"),
+    ({"msg": "Error adding item to cart: Insufficient stock"}, "error"),
+    ({"error": "Order not found"}, "error"),
+    ({"success": False}, "error"),
+    ([{"error": "Keyword is required"}], "error"),
+    ([{"id": 3, "name": "Elite Laptop (Black)"}], "ok"),
+])
+def test_tool_outcome_comes_from_the_payload(reply, outcome):
+    @instrument_tool
+    def tool():
+        return json.dumps(reply)
+
+    before = calls("tool", outcome)
+    assert tool() == json.dumps(reply)
+    assert calls("tool", outcome) == before + 1
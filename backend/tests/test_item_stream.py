@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+from app.agents.extraction_cache import ExtractionCache
+from app.agents.item_stream import ItemStreamParser, prefix_mismatches, remaining_items
+from app.agents.metrics import WorkflowMetrics
+from app.agents.OrchestratorAgent import OrchestratorAgent
+
+ITEMS = [
+    {"name": "Elite Laptop (Black)", "quantity": 2},
+    {"name": "Pro Mouse (White)", "quantity": 3},
+    {"name": "Elite Laptop (Black)", "quantity": 2},
+    {"name": "Max Monitor (Gray)", "quantity": 1},
+]
+
+
+def feed_in_pieces(parser, text, size=3):
+    completed = []
+    for i in range(0, len(text), size):
+        completed += parser.feed(text[i:i + size])
+    return completed
+
+
+def test_parser_returns_items_as_they_complete():
+    parser = ItemStreamParser()
+    text = json.dumps({"items": ITEMS, "notes": [{"name": "not an item"}]})
+    assert feed_in_pieces(parser, text) == ITEMS
+    assert parser.complete
+    assert parser.items == ITEMS
+
+
+def test_parser_never_returns_a_partial_item():
+    text = json.dumps({"items": ITEMS})
+    cut = text.index("Max Monitor")
+    parser = ItemStreamParser()
+    assert feed_in_pieces(parser, text[:cut]) == ITEMS[:3]
+    assert not parser.complete
+
+
+def test_remaining_items_is_positional():
+    # The retry words the first dispatched item differently
+    retry = [{"name": "Laptop, Elite, black", "quantity": 2}] + ITEMS[1:]
+    assert remaining_items(ITEMS[:2], retry) == ITEMS[2:]
+    assert prefix_mismatches(ITEMS[:2], retry) == 1
+    assert remaining_items(ITEMS, ITEMS[:2]) == []
+    assert prefix_mismatches(ITEMS, ITEMS[:2]) == 2
+
+
+class BrokenStreamLLM:
+    """Chat client whose streamed reply stops after `cut` characters and whose retry answers `retry`."""
+
+    def __init__(self, streamed, cut, retry):
+        self.streamed = streamed
+        self.cut = cut
+        self.retry = retry
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **kwargs):
+        if not stream:
+            message = SimpleNamespace(content=json.dumps({"items": self.retry}))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        text = json.dumps({"items": self.streamed})[:self.cut]
+        return iter([
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 4]))])
+            for i in range(0, len(text), 4)
+        ])
+
+
+def run_stream_extract(llm):
+    agent = OrchestratorAgent("", None, llm, [], [], model_name="test-model", extraction_cache=None)
+    queue = asyncio.Queue()
+    metrics = WorkflowMetrics()
+    sent = asyncio.run(agent._stream_extract("order email", queue, metrics))
+    queued = []
+    while (item := queue.get_nowait()) is not None:
+        queued.append(item)
+    return sent, queued, metrics
+
+
+def test_broken_stream_with_rephrased_retry_dispatches_each_item_once():
+    streamed = json.dumps({"items": ITEMS})
+    retry = [{"name": "Laptop Elite - Black", "quantity": 2}, {"name": "Mouse Pro (white)", "quantity": 3}] + ITEMS[2:]
+    llm = BrokenStreamLLM(ITEMS, streamed.index("Max Monitor"), retry)
+    sent, queued, metrics = run_stream_extract(llm)
+    assert queued == sent == ITEMS
+    assert metrics.counts["extract_items_retry.mismatch"] == 2
+
+
+def test_stream_cut_anywhere_dispatches_each_item_once():
+    streamed = json.dumps({"items": ITEMS})
+    for cut in range(len(streamed) + 1):
+        sent, queued, _ = run_stream_extract(BrokenStreamLLM(ITEMS, cut, ITEMS))
+        assert queued == ITEMS, cut
+
+
+class ThreadRecordingCache(ExtractionCache):
+    """Extraction cache that records which thread each read and write ran on."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(("get", threading.get_ident()))
+        return super().get(key)
+
+    def put(self, key, items, model):
+        self.threads.append(("put", threading.get_ident()))
+        return super().put(key, items, model)
+
+
+def test_extraction_cache_is_used_off_the_event_loop_thread(tmp_path):
+    cache = ThreadRecordingCache(tmp_path / "cache.db")
+    streamed = json.dumps({"items": ITEMS})
+    agent = OrchestratorAgent("", None, BrokenStreamLLM(ITEMS, len(streamed), ITEMS), [], [],
+                              model_name="test-model", extraction_cache=cache)
+
+    async def extract_twice():
+        sent = [await agent._stream_extract("order email", asyncio.Queue(), WorkflowMetrics()) for _ in range(2)]
+        return sent, threading.get_ident()
+
+    sent, loop_thread = asyncio.run(extract_twice())
+    assert sent == [ITEMS, ITEMS]
+    assert [op for op, _ in cache.threads] == ["get", "put", "get"]
+    assert all(thread != loop_thread for _, thread in cache.threads)
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.exc import IntegrityError
+
+from app.database import db
+from app.storefront.models import Order, OrderItem, StockItem
+from app.storefront.services.order import OrderService
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def load_orders(orders, lines):
+    db.session.bulk_insert_mappings(StockItem, [
+        {"name": f"Item {i:03d}", "description": "", "cost": 1, "list_price": 2, "quantity": 100}
+        for i in range(lines)
+    ])
+    db.session.bulk_insert_mappings(Order, [{"status": "ready", "total_amount": lines * 2} for _ in range(orders)])
+    db.session.flush()
+    stock_ids = [i for (i,) in db.session.query(StockItem.id)]
+    db.session.bulk_insert_mappings(OrderItem, [
+        {"order_id": order_id, "stock_item_id": stock_id, "quantity": 1, "unit_cost": 1, "unit_price": 2}
+        for (order_id,) in db.session.query(Order.id)
+        for stock_id in stock_ids
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize("limit", [1, 10, 50])
+def test_summary_page_uses_two_queries_whatever_its_size(app, limit):
+    load_orders(orders=50, lines=5)
+    versions = OrderService.list_order_versions(limit=limit)
+    db.session.expire_all()
+    with QueryCounter(db.engine) as counter:
+        summaries = OrderService.summaries_for_versions(versions)
+    assert len(summaries) == limit
+    assert all(len(summary["items"]) == 5 for summary in summaries)
+    assert counter.count == 2
+
+
+def test_cached_summaries_issue_no_queries(app):
+    load_orders(orders=10, lines=3)
+    versions = OrderService.list_order_versions(limit=10)
+    OrderService.summaries_for_versions(versions)
+    with QueryCounter(db.engine) as counter:
+        OrderService.summaries_for_versions(versions)
+    assert counter.count == 0
+
+
+def test_renaming_a_stock_item_refreshes_cached_summaries_and_etags(app):
+    load_orders(orders=1, lines=2)
+    order_id = db.session.query(Order.id).scalar()
+    client = app.test_client()
+    first = client.get(f"/api/orders/{order_id}")
+    listing = client.get("/api/orders")
+    assert client.get(f"/api/orders/{order_id}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    item = db.session.get(StockItem, first.json["items"][0]["stock_item_id"])
+    item.name = "Renamed Item"
+    db.session.commit()
+
+    again = client.get(f"/api/orders/{order_id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 200
+    assert again.json["items"][0]["name"] == "Renamed Item"
+    relisted = client.get("/api/orders", headers={"If-None-Match": listing.headers["ETag"]})
+    assert relisted.status_code == 200
+    assert relisted.json[0]["items"][0]["name"] == "Renamed Item"
+
+
+def test_pages_cover_every_order_and_created_at_is_required(app):
+    load_orders(orders=25, lines=1)
+    # Orders created in the same instant are ordered by id
+    db.session.query(Order).filter(Order.id <= 12).update({"created_at": datetime(2026, 1, 1)})
+    db.session.commit()
+    seen, cursor = [], None
+    while True:
+        versions = OrderService.list_order_versions(limit=10, cursor=cursor)
+        seen += [version.id for version in versions]
+        cursor = OrderService.next_cursor(versions, 10)
+        if cursor is None:
+            break
+    assert sorted(seen) == list(range(1, 26))
+    assert len(seen) == 25
+
+    with pytest.raises(IntegrityError):
+        db.session.execute(insert(Order).values(po_number="NULLDATE", status="draft", created_at=None))
+    db.session.rollback()
@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+from app.agents import process_emails
+
+
+class RecordingLedger:
+    def __init__(self):
+        self.marked = []
+
+    def mark(self, email_path, status):
+        self.marked.append((email_path, status, threading.get_ident()))
+
+
+class FakeAgent:
+    async def stream(self, question):
+        yield {"content": "Your order has been placed.", "is_task_complete": True}
+
+
+def test_ledger_writes_run_off_the_event_loop_thread(tmp_path, monkeypatch):
+    ledger = RecordingLedger()
+    monkeypatch.setattr(process_emails, "get_ledger", lambda: ledger)
+    email = tmp_path / "order.md"
+    email.write_text("Please send 2 Pro Mouse (White).")
+
+    async def run():
+        return await process_emails.process_email_file(FakeAgent(), None, email), threading.get_ident()
+
+    succeeded, loop_thread = asyncio.run(run())
+    assert succeeded
+    assert [(path, status) for path, status, _ in ledger.marked] == [(str(email), "completed")]
+    assert ledger.marked[0][2] != loop_thread
@@ -0,0 +1,28 @@
+import { io } from "socket.io-client";
+import { BASE_URL } from "./url";
+
+export const socket = io(BASE_URL, { autoConnect: false });
+
+export type OrderUpdatedEvent = {
+  order_id: number;
+  actions: Record<string, number>;
+};
+
+// Calls onUpdate for every order change until the returned cleanup runs
+export const subscribeToOrders = (
+  onUpdate: (event: OrderUpdatedEvent) => void
+): (() => void) => {
+  const join = () => socket.emit("join_orders");
+  socket.on("connect", join);
+  socket.on("order_updated", onUpdate);
+  if (socket.connected) {
+    join();
+  } else {
+    socket.connect();
+  }
+  return () => {
+    socket.emit("leave_orders");
+    socket.off("connect", join);
+    socket.off("order_updated", onUpdate);
+  };
+};
@@ -2,6 +2,7 @@ import { useState, useEffect } from "react";
 import OrderCard from "../ListItems/OrderCard";
 import type { Order } from "../../types/Order";
 import { getOrders } from "../../api/orders";
+import { subscribeToOrders } from "../../api/socket";
 
 const Orders = () => {
   const [orders, setOrders] = useState<Order[]>([]);
@@ -22,6 +23,15 @@ const Orders = () => {
       }
     };
     fetchOrders();
+
+    // Refetch when the server pushes a change instead of polling
+    return subscribeToOrders(async () => {
+      try {
+        setOrders(await getOrders());
+      } catch {
+        // Keep showing the last list; the next event retries
+      }
+    });
   }, []);
 
   return (